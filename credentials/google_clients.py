@@ -0,0 +1,132 @@
+import os
+import sys
+
+# Modul layer Lambda (google_rate_limit, google_auth_httplib2 vendored dengan pool dan
+# refresh token) harus menang atas versi site-packages, jadi path diatur di sini sebelum
+# import Google apa pun. Script di folder ini meng-import google_clients paling awal,
+# sebelum googleapiclient (yang ikut meng-import google_auth_httplib2).
+LAYER_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda-code', 'python'))
+if LAYER_DIR not in sys.path:
+    sys.path.insert(0, LAYER_DIR)
+
+from google.auth.transport.requests import AuthorizedSession
+from google.oauth2 import service_account
+from googleapiclient.discovery import build
+from googleapiclient.http import build_http
+import google_auth_httplib2
+import google_rate_limit
+import threading
+
+def build_rate_limited_service(name, version, creds, limiter=None):
+    """
+    Service googleapiclient yang semua request-nya melewati rate limiter Google
+    (GOOGLE_RATE_LIMITS, opsional Redis lewat GOOGLE_RATE_LIMIT_REDIS_URL).
+    build_http() dipakai agar 308 dari upload resumable tidak dianggap redirect.
+    """
+    http = google_auth_httplib2.AuthorizedHttp(creds, http=build_http())
+    http = google_rate_limit.rate_limited_http(http, project=getattr(creds, 'project_id', None), limiter=limiter)
+    return build(name, version, http=http, cache_discovery=False)
+
+
+class RateLimitedSession(AuthorizedSession):
+    """AuthorizedSession untuk gspread yang melewati rate limiter Google."""
+
+    def __init__(self, credentials, limiter=None):
+        super().__init__(credentials)
+        self.limiter = limiter or google_rate_limit.get_default_limiter()
+        self.project = getattr(credentials, 'project_id', None)
+
+    def request(self, method, url, *args, **kwargs):
+        api = google_rate_limit.api_for_uri(url)
+        if self.limiter is None or api is None:
+            return super().request(method, url, *args, **kwargs)
+
+        def send():
+            response = super(RateLimitedSession, self).request(method, url, *args, **kwargs)
+            return response.status_code, response.headers, response
+
+        return self.limiter.call(api, send, self.project, google_rate_limit.max_retries_from_env())
+
+
+class GoogleClientRegistry:
+    """
+    Cache bersama untuk credentials, service Google API, dan handle spreadsheet.
+
+    Setiap objek dibuat sekali per (file service account, set scope), sehingga
+    operasi bulk tidak mengulang discovery dan autentikasi di setiap panggilan.
+    Service googleapiclient memakai httplib2 yang tidak thread-safe, jadi service
+    di-cache per thread; credentials dan client gspread dibagi ke semua thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._credentials = {}
+        self._gspread_clients = {}
+        self._spreadsheets = {}
+        self._local = threading.local()
+
+    @staticmethod
+    def _key(service_account_file, scopes):
+        return (service_account_file, tuple(sorted(scopes)))
+
+    def credentials(self, service_account_file, scopes):
+        """Credentials service account, dimuat sekali per file dan set scope."""
+        key = self._key(service_account_file, scopes)
+        with self._lock:
+            creds = self._credentials.get(key)
+            if creds is None:
+                creds = service_account.Credentials.from_service_account_file(
+                    service_account_file, scopes=list(scopes)
+                )
+                self._credentials[key] = creds
+            return creds
+
+    def service(self, name, version, service_account_file, scopes):
+        """Service googleapiclient (mis. drive v3), dibangun sekali per thread."""
+        services = getattr(self._local, 'services', None)
+        if services is None:
+            services = self._local.services = {}
+
+        key = (name, version) + self._key(service_account_file, scopes)
+        service = services.get(key)
+        if service is None:
+            creds = self.credentials(service_account_file, scopes)
+            service = build_rate_limited_service(name, version, creds)
+            services[key] = service
+        return service
+
+    def gspread_client(self, service_account_file, scopes):
+        """Client gspread yang sudah diautorisasi, dibuat sekali per credentials."""
+        import gspread
+
+        key = self._key(service_account_file, scopes)
+        with self._lock:
+            client = self._gspread_clients.get(key)
+            if client is None:
+                creds = self.credentials(service_account_file, scopes)
+                client = gspread.authorize(creds, session=RateLimitedSession(creds))
+                self._gspread_clients[key] = client
+            return client
+
+    def spreadsheet(self, sheet_id, service_account_file, scopes):
+        """Handle gspread Spreadsheet untuk sheet_id, dibuka sekali per credentials."""
+        key = (sheet_id,) + self._key(service_account_file, scopes)
+        with self._lock:
+            spreadsheet = self._spreadsheets.get(key)
+            if spreadsheet is None:
+                client = self.gspread_client(service_account_file, scopes)
+                spreadsheet = client.open_by_key(sheet_id)
+                self._spreadsheets[key] = spreadsheet
+            return spreadsheet
+
+    def clear(self):
+        """Menghapus semua cache (mis. setelah credentials dirotasi)."""
+        with self._lock:
+            self._credentials.clear()
+            self._gspread_clients.clear()
+            self._spreadsheets.clear()
+            self._local = threading.local()
+
+
+# Registry default yang dipakai bersama oleh script di folder ini
+registry = GoogleClientRegistry()
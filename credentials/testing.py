@@ -1,7 +1,5 @@
-from googleapiclient.discovery import build
+from google_clients import registry
 from googleapiclient.http import MediaFileUpload
-from google.oauth2 import service_account
-import gspread
 
 # ==== Konfigurasi Credentials ====
 SERVICE_ACCOUNT_FILE = "./credentials/sheets-connection-471408-ef39a4069644.json"  # file service account
@@ -10,14 +8,15 @@ SCOPES = [
     "https://www.googleapis.com/auth/spreadsheets",
 ]
 
-# Load credentials
-creds = service_account.Credentials.from_service_account_file(
-    SERVICE_ACCOUNT_FILE, scopes=SCOPES
-)
+# Load credentials (di-cache oleh registry bersama service dan spreadsheet)
+creds = registry.credentials(SERVICE_ACCOUNT_FILE, SCOPES)
+
+def get_drive_service():
+    return registry.service("drive", "v3", SERVICE_ACCOUNT_FILE, SCOPES)
 
 # ==== Upload File ke Google Drive ====
 def upload_to_drive(file_path, file_name, folder_id=None):
-    drive_service = build("drive", "v3", credentials=creds)
+    drive_service = get_drive_service()
 
     file_metadata = {"name": file_name}
     if folder_id:
@@ -31,9 +30,29 @@ def upload_to_drive(file_path, file_name, folder_id=None):
     print(f"File uploaded to Drive, ID: {file.get('id')}, Parents: {file.get('parents')}")
     return file.get("id")
 
+def iter_files_in_folder(folder_id, page_size=1000, fields="id,name", drive_service=None):
+    """Generator semua file dalam folder, mengikuti nextPageToken sampai habis."""
+    if drive_service is None:
+        drive_service = get_drive_service()
+
+    page_token = None
+    while True:
+        response = drive_service.files().list(
+            q=f"'{folder_id}' in parents and trashed=false",
+            pageSize=page_size,
+            pageToken=page_token,
+            fields=f"nextPageToken, files({fields})"
+        ).execute()
+
+        yield from response.get('files', [])
+
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            break
+
 def list_files_in_folder(folder_id):
     
-    drive_service = build('drive', 'v3', credentials=creds)
+    drive_service = get_drive_service()
 
     try:
         folder = drive_service.files().get(
@@ -42,12 +61,10 @@ def list_files_in_folder(folder_id):
         ).execute()
         print(f"✅ Folder access OK: {folder['name']}")
         
-        # List files in folder
-        files = drive_service.files().list(
-            q=f"'{folder_id}' in parents",
-            fields='files(id,name)'
-        ).execute()
-        print(f"✅ Can list files: {len(files['files'])} files")
+        # List files in folder (semua halaman)
+        files = list(iter_files_in_folder(folder_id, drive_service=drive_service))
+        print(f"✅ Can list files: {len(files)} files")
+        return files
         
     except Exception as e:
         print(f"❌ Folder access failed: {e}")
@@ -56,12 +73,94 @@ def list_files_in_folder(folder_id):
 
 # ==== Tulis Data ke Google Sheets ====
 def write_to_sheets(sheet_id, range_name, values):
-    gc = gspread.authorize(creds)
-    sh = gc.open_by_key(sheet_id)
+    sh = registry.spreadsheet(sheet_id, SERVICE_ACCOUNT_FILE, SCOPES)
     worksheet = sh.sheet1
     worksheet.update(range_name, values)
     print(f"Data written to Google Sheets {sheet_id}")
 
+# ==== Bulk Write ke Google Sheets (values.batchUpdate) ====
+DEFAULT_CHUNK_ROWS = 1000          # baris per ValueRange
+DEFAULT_MAX_CELLS_PER_CALL = 200000  # batas sel per request batchUpdate
+DEFAULT_MAX_RANGES_PER_CALL = 100
+
+def _split_start_range(start_range):
+    """'Nilai!B2' -> ('Nilai', 2, 2); tanpa nama worksheet -> (None, row, col)."""
+    from gspread.utils import a1_to_rowcol
+
+    worksheet, _, cell = start_range.rpartition("!")
+    row, col = a1_to_rowcol(cell or "A1")
+    return worksheet or None, row, col
+
+def iter_value_ranges(start_range, rows, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Generator ValueRange untuk batchUpdate: rows (list atau generator) dipotong
+    per chunk_rows baris, masing-masing ditulis mulai dari sel kiri atas chunk.
+    Hanya satu chunk yang disimpan di memori pada satu waktu.
+    """
+    from gspread.utils import rowcol_to_a1
+
+    worksheet, row, col = _split_start_range(start_range)
+    prefix = f"{worksheet}!" if worksheet else ""
+
+    chunk = []
+    for values in rows:
+        chunk.append(list(values))
+        if len(chunk) >= chunk_rows:
+            yield {"range": prefix + rowcol_to_a1(row, col), "values": chunk}
+            row += len(chunk)
+            chunk = []
+    if chunk:
+        yield {"range": prefix + rowcol_to_a1(row, col), "values": chunk}
+
+def bulk_write_to_sheets(sheet_id, tables, chunk_rows=DEFAULT_CHUNK_ROWS,
+                         max_cells_per_call=DEFAULT_MAX_CELLS_PER_CALL,
+                         max_ranges_per_call=DEFAULT_MAX_RANGES_PER_CALL,
+                         value_input_option="USER_ENTERED"):
+    """
+    Menulis banyak tabel ke beberapa range/worksheet dengan values().batchUpdate.
+
+    tables: dict {"Nilai!A1": rows, "Rekap!A1": rows} atau list pasangan
+    (start_range, rows); rows boleh generator sehingga gradebook satu semester
+    tidak perlu dibangun utuh di memori. Chunk dari semua tabel digabung ke satu
+    request sampai batas sel/range tercapai, lalu request berikutnya dikirim.
+    Mengembalikan jumlah sel yang ditulis.
+    """
+    sh = registry.spreadsheet(sheet_id, SERVICE_ACCOUNT_FILE, SCOPES)
+    if isinstance(tables, dict):
+        tables = tables.items()
+
+    pending = []
+    pending_cells = 0
+    total_cells = 0
+    calls = 0
+
+    def flush():
+        nonlocal pending, pending_cells, calls
+        if not pending:
+            return
+        sh.values_batch_update({"valueInputOption": value_input_option, "data": pending})
+        calls += 1
+        pending = []
+        pending_cells = 0
+
+    try:
+        for start_range, rows in tables:
+            for value_range in iter_value_ranges(start_range, rows, chunk_rows):
+                cells = sum(len(values) for values in value_range["values"])
+                if pending and (pending_cells + cells > max_cells_per_call
+                                or len(pending) >= max_ranges_per_call):
+                    flush()
+                pending.append(value_range)
+                pending_cells += cells
+                total_cells += cells
+        flush()
+    except Exception as e:
+        print(f"❌ Bulk write ke Google Sheets gagal: {e}")
+        raise e
+
+    print(f"Data written to Google Sheets {sheet_id}: {total_cells} sel dalam {calls} request batchUpdate")
+    return total_cells
+
 # ==== Contoh Pemakaian ====
 if __name__ == "__main__":
     # Upload file ke Drive (pakai folder_id)
@@ -1,12 +1,32 @@
+from google_clients import build_rate_limited_service
 from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseUpload
+from googleapiclient.errors import HttpError, ResumableUploadError
+from googleapiclient.http import MediaFileUpload, MediaIoBaseUpload
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from io import BytesIO
 from datetime import datetime
+import json
+import mimetypes
+import os
+import threading
+
+# Ukuran chunk default upload resumable (harus kelipatan 256 KB)
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
+# File tempat menyimpan URI sesi upload resumable yang belum selesai
+DEFAULT_SESSION_FILE = './credentials/upload_sessions.json'
+
+# File tempat menyimpan start page token Drive changes API per folder
+DEFAULT_SYNC_STATE_FILE = './credentials/drive_sync_state.json'
 
 class ServiceAccountUploader:
-    def __init__(self):
+    def __init__(self, session_file=DEFAULT_SESSION_FILE, sync_state_file=DEFAULT_SYNC_STATE_FILE):
         self.service = None
+        self.creds = None
+        self.session_file = session_file
+        self.sync_state_file = sync_state_file
+        self._sessions_lock = threading.Lock()
+        self._local = threading.local()
         self.setup_service()
     
     def setup_service(self):
@@ -15,8 +35,8 @@ class ServiceAccountUploader:
             CLIENT_SERVICE_FILE = './credentials/sheets-connection-471408-ef39a4069644.json'
             SCOPE = ['https://www.googleapis.com/auth/drive']
             
-            creds = Credentials.from_service_account_file(CLIENT_SERVICE_FILE, scopes=SCOPE)
-            self.service = build('drive', 'v3', credentials=creds)
+            self.creds = Credentials.from_service_account_file(CLIENT_SERVICE_FILE, scopes=SCOPE)
+            self.service = build_rate_limited_service('drive', 'v3', self.creds)
             
             print("✅ Service Account berhasil diinisialisasi!")
             return True
@@ -112,20 +132,204 @@ class ServiceAccountUploader:
             print(f"❌ Error upload: {e}")
             return None
     
-    def list_files_in_folder(self, folder_id):
-        """List semua files dalam folder"""
+    def _thread_service(self):
+        """Service Drive per thread (httplib2 tidak thread-safe)"""
+        if threading.current_thread() is threading.main_thread():
+            return self.service
+        if getattr(self._local, 'service', None) is None:
+            self._local.service = build_rate_limited_service('drive', 'v3', self.creds)
+        return self._local.service
+    
+    def _load_sessions(self):
+        try:
+            with open(self.session_file, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+    
+    def _save_session(self, session_key, resumable_uri):
+        """Simpan (atau hapus jika resumable_uri None) URI sesi upload ke file"""
+        with self._sessions_lock:
+            sessions = self._load_sessions()
+            if resumable_uri:
+                sessions[session_key] = resumable_uri
+            else:
+                sessions.pop(session_key, None)
+            
+            tmp_file = self.session_file + '.tmp'
+            with open(tmp_file, 'w') as f:
+                json.dump(sessions, f, indent=2)
+            os.replace(tmp_file, self.session_file)
+    
+    def _start_upload_session(self, request):
+        """
+        Membuka sesi upload resumable (POST metadata) dan mengembalikan URI sesinya,
+        tanpa mengirim data file; URI bisa disimpan sebelum chunk pertama dikirim.
+        """
+        media = request.resumable
+        headers = dict(request.headers)
+        headers['X-Upload-Content-Type'] = media.mimetype()
+        headers['X-Upload-Content-Length'] = str(media.size())
+        headers['content-length'] = str(request.body_size)
+        
+        resp, content = request.http.request(request.uri, method=request.method, body=request.body, headers=headers)
+        if resp.status != 200 or 'location' not in resp:
+            raise ResumableUploadError(resp, content)
+        return resp['location']
+    
+    def _query_upload_session(self, request, resumable_uri):
+        """
+        Menanyakan posisi sesi upload ke server (PUT kosong dengan Content-Range bytes */size).
+        Mengembalikan (jumlah byte yang sudah diterima, metadata file jika upload sudah selesai).
+        """
+        size = request.resumable.size()
+        headers = {'Content-Range': f'bytes */{size}', 'content-length': '0'}
+        resp, content = request.http.request(resumable_uri, method='PUT', headers=headers)
+        
+        if resp.status in (200, 201):
+            return size, json.loads(content)
+        if resp.status == 308:
+            # Header Range "bytes=0-N": byte 0..N sudah diterima; tanpa Range belum ada data
+            received = resp.get('range')
+            return (int(received.rsplit('-', 1)[1]) + 1 if received else 0), None
+        raise HttpError(resp, content, uri=resumable_uri)
+    
+    def upload_path(self, file_path, folder_id, file_name=None, mime_type=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Upload file dari disk secara streaming per chunk.
+        
+        URI sesi resumable disimpan di session_file sebelum chunk pertama dikirim.
+        Jika upload terputus, pemanggilan ulang menanyakan posisi terakhir ke server
+        lalu melanjutkan dari sana (resumable_progress).
+        """
         if not self.service:
-            return []
+            print("❌ Service tidak tersedia")
+            return None
+        
+        file_name = file_name or os.path.basename(file_path)
+        mime_type = mime_type or mimetypes.guess_type(file_path)[0] or 'application/octet-stream'
+        stat = os.stat(file_path)
+        session_key = f"{os.path.abspath(file_path)}|{folder_id}|{stat.st_size}|{int(stat.st_mtime)}"
         
+        service = self._thread_service()
+        media = MediaFileUpload(file_path, mimetype=mime_type, chunksize=chunk_size, resumable=True)
+        request = service.files().create(
+            body={"name": file_name, "parents": [folder_id]},
+            media_body=media,
+            fields="id, name, webViewLink, parents"
+        )
+        
+        resumable_uri = self._load_sessions().get(session_key)
         try:
-            query = f"'{folder_id}' in parents and trashed=false"
+            uploaded_file = None
+            if resumable_uri:
+                print(f"🔁 Melanjutkan upload {file_name}...")
+                request.resumable_progress, uploaded_file = self._query_upload_session(request, resumable_uri)
+            else:
+                resumable_uri = self._start_upload_session(request)
+                self._save_session(session_key, resumable_uri)
+            request.resumable_uri = resumable_uri
+            
+            while uploaded_file is None:
+                status, uploaded_file = request.next_chunk(num_retries=3)
+                if status:
+                    print(f"   ⏫ {file_name}: {int(status.progress() * 100)}%")
+        except HttpError as e:
+            if resumable_uri and e.resp.status in (404, 410):
+                # Sesi sudah kadaluarsa, mulai upload dari awal
+                print(f"⚠️ Sesi upload {file_name} kadaluarsa, mengulang dari awal")
+                self._save_session(session_key, None)
+                return self.upload_path(file_path, folder_id, file_name, mime_type, chunk_size)
+            print(f"❌ Error upload {file_name}: {e}")
+            return None
+        except Exception as e:
+            print(f"❌ Error upload {file_name}: {e}")
+            return None
+        
+        self._save_session(session_key, None)
+        print(f"✅ {uploaded_file['name']} berhasil diupload (ID: {uploaded_file['id']})")
+        return uploaded_file
+    
+    def bulk_upload(self, files, folder_id, max_workers=4, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Upload banyak file sekaligus dengan thread pool terbatas.
+        
+        files (list atau generator) berisi path file di disk, atau tuple
+        (file_name, content, mime_type) untuk konten di memori. Mengembalikan
+        list hasil dengan urutan yang sama (None untuk file yang gagal).
+        """
+        files = list(files)
+        if not self.service:
+            print("❌ Service tidak tersedia")
+            return [None] * len(files)
+        
+        def upload_one(item):
+            if isinstance(item, (str, os.PathLike)):
+                return self.upload_path(item, folder_id, chunk_size=chunk_size)
+            file_name, content, mime_type = item
+            return self._upload_content(file_name, content, mime_type, folder_id, chunk_size)
+        
+        results = [None] * len(files)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(upload_one, item): i for i, item in enumerate(files)}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+        
+        success = sum(1 for result in results if result)
+        print(f"📦 Bulk upload selesai: {success}/{len(files)} file berhasil")
+        return results
+    
+    def _upload_content(self, file_name, file_content, mime_type, folder_id, chunk_size):
+        """Upload konten di memori dari thread worker"""
+        try:
+            media = MediaIoBaseUpload(
+                BytesIO(file_content.encode("utf-8") if isinstance(file_content, str) else file_content),
+                mimetype=mime_type,
+                chunksize=chunk_size,
+                resumable=True
+            )
+            uploaded_file = self._thread_service().files().create(
+                body={"name": file_name, "parents": [folder_id]},
+                media_body=media,
+                fields="id, name, webViewLink, parents"
+            ).execute(num_retries=3)
+            print(f"✅ {uploaded_file['name']} berhasil diupload (ID: {uploaded_file['id']})")
+            return uploaded_file
+        except Exception as e:
+            print(f"❌ Error upload {file_name}: {e}")
+            return None
+    
+    def iter_files_in_folder(self, folder_id, page_size=1000,
+                             fields="id, name, mimeType, webViewLink, modifiedTime",
+                             order_by="modifiedTime desc"):
+        """Generator semua file dalam folder, mengikuti semua halaman (pageToken)"""
+        query = f"'{folder_id}' in parents and trashed=false"
+        page_token = None
+        
+        while True:
             results = self.service.files().list(
                 q=query,
-                fields="files(id, name, mimeType, webViewLink, modifiedTime)",
-                orderBy="modifiedTime desc"
+                pageSize=page_size,
+                pageToken=page_token,
+                fields=f"nextPageToken, files({fields})",
+                orderBy=order_by,
+                supportsAllDrives=True,
+                includeItemsFromAllDrives=True
             ).execute()
             
-            files = results.get("files", [])
+            yield from results.get("files", [])
+            
+            page_token = results.get("nextPageToken")
+            if not page_token:
+                break
+    
+    def list_files_in_folder(self, folder_id):
+        """List semua files dalam folder"""
+        if not self.service:
+            return []
+        
+        try:
+            files = list(self.iter_files_in_folder(folder_id))
             print(f"\n📁 Files dalam folder ({len(files)} files):")
             
             if not files:
@@ -142,6 +346,82 @@ class ServiceAccountUploader:
             print(f"❌ Error listing files: {e}")
             return []
     
+    def _load_sync_state(self):
+        try:
+            with open(self.sync_state_file, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+    
+    def _save_sync_state(self, folder_id, page_token, file_ids):
+        state = self._load_sync_state()
+        state[folder_id] = {'page_token': page_token, 'file_ids': sorted(file_ids)}
+        tmp_file = self.sync_state_file + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_file, self.sync_state_file)
+    
+    def sync_folder(self, folder_id, page_size=1000):
+        """
+        Sinkronisasi inkremental isi folder memakai Drive changes API.
+        
+        Sync pertama melakukan listing penuh dan menyimpan start page token serta ID
+        file folder di sync_state_file; sync berikutnya hanya mengambil perubahan sejak
+        token itu. 'removed' hanya berisi file yang sebelumnya ada di folder (dihapus,
+        di-trash, atau dipindah keluar). Mengembalikan dict {'full_sync', 'changed', 'removed'}.
+        """
+        if not self.service:
+            return None
+        
+        folder_state = self._load_sync_state().get(folder_id)
+        
+        # State lama (hanya token, tanpa ID file) juga memicu sync penuh
+        if not isinstance(folder_state, dict):
+            start_token = self.service.changes().getStartPageToken(supportsAllDrives=True).execute()['startPageToken']
+            files = list(self.iter_files_in_folder(folder_id, page_size=page_size,
+                                                   fields="id, name, mimeType, modifiedTime"))
+            self._save_sync_state(folder_id, start_token, [f['id'] for f in files])
+            print(f"🔄 Sync penuh: {len(files)} file")
+            return {'full_sync': True, 'changed': files, 'removed': []}
+        
+        page_token = folder_state['page_token']
+        known_ids = set(folder_state.get('file_ids', []))
+        changed = {}
+        removed = []
+        while page_token:
+            response = self.service.changes().list(
+                pageToken=page_token,
+                pageSize=page_size,
+                spaces='drive',
+                includeRemoved=True,
+                supportsAllDrives=True,
+                includeItemsFromAllDrives=True,
+                fields="nextPageToken, newStartPageToken, "
+                       "changes(fileId, removed, file(id, name, mimeType, modifiedTime, parents, trashed))"
+            ).execute()
+            
+            for change in response.get('changes', []):
+                file_id = change.get('fileId')
+                if not file_id:
+                    continue
+                file = change.get('file') or {}
+                if change.get('removed') or file.get('trashed') or folder_id not in file.get('parents', []):
+                    # Perubahan di luar folder diabaikan kecuali file-nya dikenal
+                    changed.pop(file_id, None)
+                    if file_id in known_ids:
+                        known_ids.discard(file_id)
+                        removed.append(file_id)
+                else:
+                    changed[file_id] = file
+                    known_ids.add(file_id)
+            
+            if 'newStartPageToken' in response:
+                self._save_sync_state(folder_id, response['newStartPageToken'], known_ids)
+            page_token = response.get('nextPageToken')
+        
+        print(f"🔄 Sync inkremental: {len(changed)} berubah, {len(removed)} dihapus")
+        return {'full_sync': False, 'changed': list(changed.values()), 'removed': removed}
+    
     def create_subfolder(self, folder_name, parent_folder_id):
         """Buat subfolder dalam shared folder"""
         if not self.service:
@@ -169,6 +449,156 @@ class ServiceAccountUploader:
             print(f"❌ Error membuat subfolder: {e}")
             return None
 
+    def batch(self):
+        """Buat DriveBatch baru untuk mengantrekan operasi metadata"""
+        return DriveBatch(self.service)
+    
+    def create_subfolders(self, folder_names, parent_folder_id):
+        """Buat banyak subfolder sekaligus dengan batch request. Mengembalikan {nama: folder_id}"""
+        if not self.service:
+            return {}
+        
+        folder_ids = {}
+        batch = self.batch()
+        for name in folder_names:
+            batch.create_folder(name, parent_folder_id,
+                                callback=lambda folder, name=name: folder_ids.__setitem__(name, folder['id']))
+        batch.execute()
+        
+        print(f"✅ {len(folder_ids)}/{len(folder_names)} subfolder dibuat dalam {batch.round_trips} request")
+        return folder_ids
+    
+    def create_folder_tree(self, tree, parent_folder_id):
+        """
+        Buat pohon folder (mis. folder per mahasiswa beserta subfolder-nya).
+        
+        tree adalah dict {nama_folder: subtree}, subtree berupa dict atau None.
+        Setiap level dibuat dengan satu batch (maks 100 folder per request).
+        Mengembalikan dict {path: folder_id}, path dipisah '/'.
+        """
+        if not self.service:
+            return {}
+        
+        folder_ids = {}
+        level = [(parent_folder_id, '', name, subtree) for name, subtree in tree.items()]
+        round_trips = 0
+        
+        while level:
+            created = {}
+            batch = self.batch()
+            for parent_id, prefix, name, _ in level:
+                path = f"{prefix}{name}"
+                batch.create_folder(name, parent_id,
+                                    callback=lambda folder, path=path: created.__setitem__(path, folder['id']))
+            batch.execute()
+            round_trips += batch.round_trips
+            folder_ids.update(created)
+            
+            next_level = []
+            for _, prefix, name, subtree in level:
+                path = f"{prefix}{name}"
+                if subtree and path in created:
+                    next_level.extend((created[path], f"{path}/", child, child_tree)
+                                      for child, child_tree in subtree.items())
+            level = next_level
+        
+        print(f"✅ {len(folder_ids)} folder dibuat dalam {round_trips} request")
+        return folder_ids
+    
+    def get_files_metadata(self, file_ids, fields="id, name, mimeType, webViewLink, modifiedTime"):
+        """Ambil metadata banyak file sekaligus dengan batch request. Mengembalikan {file_id: metadata}"""
+        if not self.service:
+            return {}
+        
+        metadata = {}
+        batch = self.batch()
+        for file_id in file_ids:
+            batch.get_metadata(file_id, fields=fields,
+                               callback=lambda info, file_id=file_id: metadata.__setitem__(file_id, info))
+        batch.execute()
+        return metadata
+    
+    def share_files(self, file_ids, email, role="reader"):
+        """Beri permission ke email untuk banyak file sekaligus. Mengembalikan jumlah yang berhasil"""
+        if not self.service:
+            return 0
+        
+        batch = self.batch()
+        for file_id in file_ids:
+            batch.add_permission(file_id, email, role=role)
+        results = batch.execute()
+        return sum(1 for _, error in results if error is None)
+
+class DriveBatch:
+    """
+    Antrean operasi metadata Drive yang dikirim lewat batch endpoint Google
+    (new_batch_http_request), maksimal 100 operasi per HTTP request.
+    
+    Callback per item dipanggil dengan response jika berhasil; error dicetak
+    dan dikembalikan oleh execute().
+    """
+    MAX_BATCH_SIZE = 100
+    
+    def __init__(self, service):
+        self.service = service
+        self.round_trips = 0
+        self._pending = []
+    
+    def __len__(self):
+        return len(self._pending)
+    
+    def add(self, request, callback=None):
+        """Tambahkan request googleapiclient apa pun ke antrean"""
+        self._pending.append((request, callback))
+    
+    def create_folder(self, name, parent_folder_id, callback=None):
+        self.add(self.service.files().create(
+            body={
+                'name': name,
+                'mimeType': 'application/vnd.google-apps.folder',
+                'parents': [parent_folder_id]
+            },
+            fields='id, name, webViewLink'
+        ), callback)
+    
+    def get_metadata(self, file_id, fields="id, name, mimeType, webViewLink, modifiedTime", callback=None):
+        self.add(self.service.files().get(fileId=file_id, fields=fields), callback)
+    
+    def add_permission(self, file_id, email, role="reader", callback=None):
+        self.add(self.service.permissions().create(
+            fileId=file_id,
+            body={'type': 'user', 'role': role, 'emailAddress': email},
+            sendNotificationEmail=False,
+            fields='id'
+        ), callback)
+    
+    def execute(self):
+        """
+        Kirim semua operasi yang diantrekan. Mengembalikan list (response, error)
+        sesuai urutan operasi ditambahkan.
+        """
+        pending, self._pending = self._pending, []
+        results = [None] * len(pending)
+        
+        def on_response(request_id, response, exception):
+            index = int(request_id)
+            results[index] = (response, exception)
+            if exception is not None:
+                print(f"❌ Operasi batch #{index} gagal: {exception}")
+                return
+            callback = pending[index][1]
+            if callback:
+                callback(response)
+        
+        for start in range(0, len(pending), self.MAX_BATCH_SIZE):
+            batch = self.service.new_batch_http_request(callback=on_response)
+            for index in range(start, min(start + self.MAX_BATCH_SIZE, len(pending))):
+                batch.add(pending[index][0], request_id=str(index))
+            batch.execute()
+            self.round_trips += 1
+        
+        return results
+
 def main():
     print("🚀 SERVICE ACCOUNT UPLOADER")
     print("Menggunakan Shared Folder di Google Drive Biasa - GRATIS!")
@@ -265,9 +695,10 @@ Kelebihan metode ini:
         
         upload_folder = subfolder_id if subfolder_id else folder_id
         
-        for file_name, content in files_to_upload:
-            print(f"\n   📤 Uploading {file_name}...")
-            uploader.upload_file(file_name, content, "text/plain", upload_folder)
+        uploader.bulk_upload(
+            [(file_name, content, "text/plain") for file_name, content in files_to_upload],
+            upload_folder
+        )
         
         # 4. List semua files
         print(f"\n4️⃣ Final file listing...")
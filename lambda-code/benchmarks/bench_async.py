@@ -0,0 +1,161 @@
+"""
+Benchmark lambda_handler (thread pool) vs lambda_handler_async (asyncio).
+
+AWS dijalankan oleh server moto lokal (aiobotocore butuh endpoint HTTP sungguhan,
+bukan mock in-process) dengan latency buatan per request, dan Google Sheets/token
+oleh server lokal dari bench_pipeline. Kedua handler memproses event yang sama
+persis sehingga perbedaan waktu berasal dari cara I/O dijalankan.
+
+Moto memakai beberapa ms CPU per request di satu proses, sehingga pada batch besar
+server moto ikut membatasi kedua handler; speedup yang terukur adalah batas bawah.
+
+Butuh aiobotocore dan aiohttp. Jalankan dari folder lambda-code:
+    python benchmarks/bench_async.py --batches 1,10,50 --iterations 5
+    python benchmarks/bench_async.py --aws-latency-ms 30 --sheets-latency-ms 150
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bench_pipeline as pipeline
+
+
+def serve_moto(latency):
+    """Dijalankan di proses anak: server moto dengan jeda `latency` detik per request."""
+    from moto.moto_server.werkzeug_app import DomainDispatcherApplication, create_backend_app
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    app = DomainDispatcherApplication(create_backend_app)
+
+    def delayed_app(environ, start_response):
+        if latency and environ.get('HTTP_X_BENCH_SETUP') is None:
+            time.sleep(latency)
+        return app(environ, start_response)
+
+    server = make_server('127.0.0.1', 0, delayed_app, threaded=True, request_handler=QuietHandler)
+    print(server.server_address[1], flush=True)
+    server.serve_forever()
+
+
+def start_moto_server(latency):
+    """
+    Menjalankan server moto di proses terpisah (agar CPU moto tidak berebut GIL dengan
+    handler yang diukur); mengembalikan (process, url).
+    """
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), '--serve-moto', str(latency)],
+        stdout=subprocess.PIPE, text=True
+    )
+    port = int(process.stdout.readline())
+    return process, f"http://127.0.0.1:{port}"
+
+
+def _mark_setup_request(request, **kwargs):
+    request.headers['X-Bench-Setup'] = '1'
+
+
+def run_handler(handler, s3, label, payload_format, size, batch, args, rng):
+    """Menjalankan handler args.warmup + args.iterations kali; mengembalikan list latency (detik)."""
+    latencies = []
+    for iteration in range(args.warmup + args.iterations):
+        event = pipeline.upload_batch(s3, f"{label}-{batch}/{iteration}-{rng.random():.6f}",
+                                      payload_format, size, batch, rng)
+        output = io.StringIO()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(output):
+            response = handler(event, None)
+        elapsed = time.perf_counter() - start
+
+        if response['statusCode'] != 200:
+            raise RuntimeError(f"{label} gagal: {response['body'][:500]}")
+        if iteration >= args.warmup:
+            latencies.append(elapsed)
+    return latencies
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--batches', default='1,10,50', help='jumlah record per event, dipisah koma')
+    arg_parser.add_argument('--size', default='4KB', help='ukuran payload per record')
+    arg_parser.add_argument('--format', default='log', choices=['log', 'json'])
+    arg_parser.add_argument('--iterations', type=int, default=5)
+    arg_parser.add_argument('--warmup', type=int, default=1)
+    arg_parser.add_argument('--aws-latency-ms', type=float, default=20.0, help='latency buatan per request AWS')
+    arg_parser.add_argument('--sheets-latency-ms', type=float, default=100.0, help='latency buatan server Sheets')
+    arg_parser.add_argument('--sns', action='store_true', help='aktifkan publish SNS')
+    arg_parser.add_argument('--seed', type=int, default=42)
+    arg_parser.add_argument('--serve-moto', type=float, default=None, help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.serve_moto is not None:
+        serve_moto(args.serve_moto)
+        return
+
+    batches = [int(batch) for batch in args.batches.split(',') if batch]
+    size = pipeline.parse_size(args.size)
+
+    moto_server, aws_url = start_moto_server(args.aws_latency_ms / 1000)
+    google_server, google_url = pipeline.start_fake_google(args.sheets_latency_ms / 1000)
+    rng = random.Random(args.seed)
+
+    os.environ.update({
+        'AWS_DEFAULT_REGION': pipeline.REGION,
+        'AWS_REGION': pipeline.REGION,
+        'AWS_ACCESS_KEY_ID': 'testing',
+        'AWS_SECRET_ACCESS_KEY': 'testing',
+        'AWS_ENDPOINT_URL': aws_url,
+        'PROJECT_NAME': 'bench',
+        'ENVIRONMENT': 'local',
+        'IDEMPOTENCY_BACKEND': 'none',
+        'GOOGLE_SHEETS_ROOT_URL': google_url,
+    })
+    # Server Google lokal tanpa kuota; set GOOGLE_RATE_LIMITS untuk mengukur dengan limiter
+    os.environ.setdefault('GOOGLE_RATE_LIMITS', 'off')
+
+    with tempfile.TemporaryDirectory() as discovery_dir:
+        pipeline.write_local_discovery(discovery_dir, google_url)
+        os.environ['GOOGLE_DISCOVERY_DIR'] = discovery_dir
+        pipeline.setup_aws(google_url, args.sns)
+
+        import boto3
+        import lambda_function
+
+        # Upload payload (bukan bagian yang diukur) tidak dikenai latency buatan
+        s3 = boto3.client('s3', region_name=pipeline.REGION)
+        s3.meta.events.register('before-sign.s3.*', _mark_setup_request)
+        try:
+            print(f"Payload {args.format} {pipeline._format_size(size)}, latency AWS {args.aws_latency_ms:g} ms, "
+                  f"Sheets {args.sheets_latency_ms:g} ms, MAX_WORKERS sync = "
+                  f"{os.environ.get('MAX_WORKERS', lambda_function.DEFAULT_MAX_WORKERS)}")
+            print(f"{'record':>6} {'sync p50 ms':>12} {'async p50 ms':>13} {'sync ev/s':>10} {'async ev/s':>11} {'speedup':>8}")
+            for batch in batches:
+                sync_latencies = run_handler(lambda_function.lambda_handler, s3, 'sync',
+                                             args.format, size, batch, args, rng)
+                async_latencies = run_handler(lambda_function.lambda_handler_async, s3, 'async',
+                                              args.format, size, batch, args, rng)
+                sync_p50 = statistics.median(sync_latencies)
+                async_p50 = statistics.median(async_latencies)
+                print(f"{batch:6d} {sync_p50 * 1000:12.1f} {async_p50 * 1000:13.1f} "
+                      f"{batch / sync_p50:10.1f} {batch / async_p50:11.1f} {sync_p50 / async_p50:7.1f}x")
+        finally:
+            lambda_function._get_async_loop().run_until_complete(lambda_function.close_async_resources())
+            moto_server.terminate()
+            moto_server.wait()
+            google_server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark fase init (cold start) lambda_function berbasis `python -X importtime`.
+
+Setiap percobaan menjalankan interpreter baru sehingga tidak ada modul yang
+sudah ter-cache, lalu melaporkan waktu import lambda_function dan modul
+termahal yang ikut ter-import.
+
+Jalankan dari folder lambda-code:
+    python benchmarks/bench_coldstart.py --runs 5 --top 15
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+LAMBDA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Baris output -X importtime: "import time:   self [us] | cumulative | imported package"
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)')
+
+
+def run_importtime(module='lambda_function'):
+    """Menjalankan satu import di proses baru; mengembalikan list (module, self_us, cumulative_us, depth)."""
+    env = dict(os.environ)
+    env.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [LAMBDA_DIR, os.path.join(LAMBDA_DIR, 'python'),
+                                                      env.get('PYTHONPATH')]))
+
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=LAMBDA_DIR, env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Import {module} gagal:\n{proc.stderr[-2000:]}")
+
+    entries = []
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return entries
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--runs', type=int, default=5)
+    arg_parser.add_argument('--top', type=int, default=15)
+    arg_parser.add_argument('--module', default='lambda_function')
+    args = arg_parser.parse_args()
+
+    totals = []
+    last_entries = []
+    for _ in range(args.runs):
+        last_entries = run_importtime(args.module)
+        total = next(cumulative for name, _, cumulative, _ in last_entries if name == args.module)
+        totals.append(total)
+
+    print(f"Import {args.module} ({args.runs} runs, proses baru tiap run)")
+    print(f"  median : {statistics.median(totals) / 1000:.1f} ms")
+    print(f"  min    : {min(totals) / 1000:.1f} ms")
+    print(f"  max    : {max(totals) / 1000:.1f} ms")
+
+    top_level = {}
+    for name, _, cumulative, depth in last_entries:
+        root = name.split('.')[0]
+        if depth <= 1 and root != args.module:
+            top_level[root] = max(top_level.get(root, 0), cumulative)
+
+    print("\nPackage termahal (cumulative, run terakhir):")
+    for root, cumulative in sorted(top_level.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {root}")
+
+    heavy = [root for root in ('boto3', 'botocore', 'google', 'googleapiclient') if root in top_level]
+    if heavy:
+        print(f"\nPERINGATAN: SDK berat ter-import saat init: {', '.join(heavy)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark transport Google API: httplib2.Http baru per request vs pool keep-alive.
+
+Menjalankan server HTTPS lokal (sertifikat self-signed dibuat dengan openssl),
+lalu mengirim request dari beberapa thread. Server menghitung jumlah koneksi
+TLS yang dibuka sehingga terlihat berapa handshake yang dihemat oleh pool.
+
+Jalankan dari folder lambda-code:
+    python benchmarks/bench_http_pool.py --requests 200 --threads 8
+"""
+import argparse
+import os
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LAMBDA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(LAMBDA_DIR, 'python'))
+
+import httplib2
+import google_auth_httplib2
+
+RESPONSE_BODY = b'{"updates": {"updatedRange": "Sheet1!A1:E1"}}'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.stats_lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(RESPONSE_BODY)))
+        self.end_headers()
+        self.wfile.write(RESPONSE_BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Backlog default (5) membuat koneksi paralel menunggu retransmit SYN
+    request_queue_size = 128
+
+
+def start_https_server(workdir):
+    """Menjalankan server HTTPS lokal di thread latar; mengembalikan (server, url)."""
+    cert = os.path.join(workdir, 'cert.pem')
+    key = os.path.join(workdir, 'key.pem')
+    subprocess.run(
+        ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+         '-subj', '/CN=localhost', '-keyout', key, '-out', cert],
+        check=True, capture_output=True
+    )
+
+    server = _Server(('127.0.0.1', 0), _Handler)
+    server.connections = 0
+    server.stats_lock = threading.Lock()
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"https://localhost:{server.server_address[1]}/v4/spreadsheets/x/values/A:E:append"
+
+
+def run(label, server, url, make_http, requests, threads):
+    server.connections = 0
+
+    def one(_):
+        http = make_http()
+        request = google_auth_httplib2.Request(http)
+        response = request(url, method='POST', body=b'{"values": [[1, 2, 3]]}',
+                           headers={'Content-Type': 'application/json'}, timeout=10)
+        assert response.status == 200
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(one, range(requests)))
+    elapsed = time.perf_counter() - start
+
+    print(f"{label:<22} {elapsed * 1000:8.1f} ms  {requests / elapsed:8.1f} req/s  "
+          f"{server.connections:5d} koneksi TLS")
+    return elapsed
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--requests', type=int, default=200)
+    arg_parser.add_argument('--threads', type=int, default=8)
+    arg_parser.add_argument('--pool-size', type=int, default=8)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        server, url = start_https_server(workdir)
+        try:
+            fresh = run('Http baru per request', server, url,
+                        lambda: httplib2.Http(disable_ssl_certificate_validation=True),
+                        args.requests, args.threads)
+            pooled_http = google_auth_httplib2.make_pooled_http(
+                pool_size=args.pool_size, timeout=10, disable_ssl_certificate_validation=True
+            )
+            pooled = run('Pool keep-alive', server, url, lambda: pooled_http,
+                         args.requests, args.threads)
+            print(f"Speedup: {fresh / pooled:.1f}x")
+        finally:
+            server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Micro-benchmark parser log: process_log_content lama (per baris) vs LogParser satu-pass.
+
+Jalankan dari folder lambda-code:
+    python benchmarks/bench_parser.py --size-mb 5
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+from lambda_function import LogParser
+
+
+def legacy_process_log_content(log_content, filename):
+    """Salinan implementasi process_log_content sebelum LogParser (tanpa print)."""
+    data = {
+        "nrp": "N/A",
+        "score": "N/A",
+        "filename": filename
+    }
+
+    lines = log_content.strip().splitlines()
+
+    for line in lines:
+        line = line.strip()
+
+        if "NRP:" in line or "nim:" in line.lower() or "NIM:" in line:
+            try:
+                nrp = line.split(":")[1].strip().split(",")[0].split()[0]
+                data["nrp"] = nrp
+            except:
+                pass
+
+        if any(keyword in line.lower() for keyword in ["score:", "nilai:", "grade:"]):
+            try:
+                score_part = line.split(":")[1].strip()
+                score = ''.join(filter(str.isdigit, score_part.split()[0]))
+                if score:
+                    data["score"] = int(score)
+                    data["status"] = "Lulus" if int(score) >= 70 else "Tidak Lulus"
+            except:
+                pass
+
+        if any(keyword in line.lower() for keyword in ["status:", "result:"]):
+            try:
+                status = line.split(":")[1].strip()
+                data["status"] = status
+            except:
+                pass
+
+    return data
+
+
+def generate_log(size_mb, seed=42):
+    """Membuat log sintetis berukuran kira-kira size_mb MB."""
+    rng = random.Random(seed)
+    noise = [
+        "[INFO] Running test case {n}: LPUSH/LRANGE consistency",
+        "[DEBUG] redis> RPUSH queue:{n} item-{n}",
+        "[INFO] Assertion passed in {n} ms",
+        "[WARN] Retrying connection attempt {n}",
+    ]
+    lines = ["NRP: 5025211{:03d}, Nama: Mahasiswa".format(rng.randint(0, 999))]
+    target = size_mb * 1024 * 1024
+    size = 0
+    n = 0
+    while size < target:
+        line = rng.choice(noise).format(n=n)
+        lines.append(line)
+        size += len(line) + 1
+        n += 1
+    lines.append("Score: {}/100".format(rng.randint(0, 100)))
+    lines.append("Status: PASS")
+    return "\n".join(lines)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--size-mb', type=int, default=5)
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    args = arg_parser.parse_args()
+
+    content = generate_log(args.size_mb)
+    parser = LogParser()
+
+    legacy = legacy_process_log_content(content, 'bench.log')
+    current = parser.parse(content, 'bench.log')
+    print(f"Hasil lama : {legacy}")
+    print(f"Hasil baru : {current}")
+
+    legacy_time = min(timeit.repeat(lambda: legacy_process_log_content(content, 'bench.log'),
+                                    number=1, repeat=args.repeat))
+    current_time = min(timeit.repeat(lambda: parser.parse(content, 'bench.log'),
+                                     number=1, repeat=args.repeat))
+
+    print(f"Ukuran log : {len(content) / 1024 / 1024:.1f} MB")
+    print(f"Lama       : {legacy_time * 1000:.1f} ms")
+    print(f"LogParser  : {current_time * 1000:.1f} ms")
+    print(f"Speedup    : {legacy_time / current_time:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
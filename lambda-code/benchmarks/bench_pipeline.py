@@ -0,0 +1,483 @@
+"""
+Benchmark end-to-end lambda_handler tanpa AWS dan Google sungguhan.
+
+S3, SES, SNS dan Secrets Manager dijalankan dengan moto (in-process), sedangkan
+Google Sheets dan endpoint token OAuth diganti server HTTP lokal. Service Sheets
+tetap dibangun oleh kode Lambda (discovery document dengan rootUrl lokal, service
+account dengan token_uri lokal), jadi jalur HTTP/pool/refresh token ikut terukur.
+
+Untuk setiap ukuran payload dan format (log / JSON report) handler dipanggil
+beberapa kali dengan event S3 sintetis, lalu dilaporkan latency, events/detik,
+waktu per tahap (secrets, s3, parse, sheet, email, sns) dan memori.
+
+Jalankan dari folder lambda-code:
+    python benchmarks/bench_pipeline.py --sizes 1KB,256KB,4MB --batch 10 --iterations 5
+    python benchmarks/bench_pipeline.py --save baseline.json
+    python benchmarks/bench_pipeline.py --baseline baseline.json --tolerance 0.25
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import re
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LAMBDA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, LAMBDA_DIR)
+sys.path.insert(0, os.path.join(LAMBDA_DIR, 'python'))
+
+REGION = 'us-east-1'
+BUCKET = 'bench-hasil-penilaian'
+SENDER = 'asisten@example.com'
+RECIPIENT = 'dosen@example.com'
+
+# Fungsi lambda_function yang diukur per tahap (nama tahap -> nama fungsi)
+STAGES = {
+    'secrets': ['get_all_secrets'],
+    'google_init': ['get_google_services'],
+    'parse': ['process_result_content', 'process_log_stream'],
+    'sheet': ['append_rows_to_sheet'],
+    'email': ['send_email_notification', 'send_digest_emails'],
+    'sns': ['publish_result_notification'],
+}
+
+SIZE_PATTERN = re.compile(r'^(\d+(?:\.\d+)?)\s*([KMG]?B)?$', re.IGNORECASE)
+SIZE_UNITS = {'B': 1, 'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3}
+
+
+def parse_size(text):
+    """'256KB' -> 262144."""
+    match = SIZE_PATTERN.match(text.strip())
+    if not match:
+        raise argparse.ArgumentTypeError(f"Ukuran tidak valid: {text}")
+    number, unit = match.groups()
+    return int(float(number) * SIZE_UNITS[(unit or 'B').upper()])
+
+
+# ==== Server Google lokal (token OAuth + Sheets values.append) ====
+
+class _FakeGoogleHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length)
+
+        if self.path.startswith('/token'):
+            payload = {'access_token': 'bench-token', 'expires_in': 3600, 'token_type': 'Bearer'}
+        elif ':append' in self.path:
+            rows = len(json.loads(body or b'{}').get('values', []))
+            with self.server.stats_lock:
+                self.server.append_calls += 1
+                self.server.rows += rows
+            if self.server.latency:
+                time.sleep(self.server.latency)
+            payload = {'updates': {'updatedRange': f'Sheet1!A1:E{rows}', 'updatedRows': rows}}
+        else:
+            self.send_error(404)
+            return
+
+        data = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _FakeGoogleServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def start_fake_google(latency):
+    """Menjalankan server Google lokal; mengembalikan (server, base_url)."""
+    server = _FakeGoogleServer(('127.0.0.1', 0), _FakeGoogleHandler)
+    server.stats_lock = threading.Lock()
+    server.append_calls = 0
+    server.rows = 0
+    server.latency = latency
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+def write_local_discovery(directory, base_url):
+    """Menyalin discovery document Sheets dengan rootUrl diarahkan ke server lokal."""
+    from googleapiclient.discovery_cache import get_static_doc
+
+    document = json.loads(get_static_doc('sheets', 'v4'))
+    document['rootUrl'] = base_url
+    document['baseUrl'] = base_url
+    with open(os.path.join(directory, 'sheets.v4.json'), 'w', encoding='utf-8') as f:
+        json.dump(document, f)
+
+
+def make_service_account(base_url):
+    """Service account palsu dengan kunci RSA baru dan token_uri ke server lokal."""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()
+    ).decode()
+    return {
+        'type': 'service_account',
+        'project_id': 'bench',
+        'private_key_id': 'bench',
+        'private_key': pem,
+        'client_email': 'bench@bench.iam.gserviceaccount.com',
+        'client_id': '1',
+        'token_uri': base_url + 'token',
+    }
+
+
+# ==== Setup AWS (moto) ====
+
+def setup_aws(base_url, with_sns):
+    """Membuat bucket, identitas SES, secrets dan (opsional) topic SNS di moto."""
+    import boto3
+
+    boto3.client('s3', region_name=REGION).create_bucket(Bucket=BUCKET)
+    boto3.client('ses', region_name=REGION).verify_email_identity(EmailAddress=SENDER)
+
+    project_name = os.environ['PROJECT_NAME']
+    environment = os.environ['ENVIRONMENT']
+    secrets_client = boto3.client('secretsmanager', region_name=REGION)
+    secrets = {
+        'google-sheet-id': {'sheet_id': 'bench-sheet'},
+        'email-config': {'sender_email': SENDER, 'recipient_email': RECIPIENT},
+        'google-creds': {'credentials': make_service_account(base_url)},
+    }
+    for suffix, value in secrets.items():
+        secrets_client.create_secret(Name=f"{project_name}-{environment}-{suffix}",
+                                     SecretString=json.dumps(value))
+
+    if with_sns:
+        topic = boto3.client('sns', region_name=REGION).create_topic(Name='bench-hasil')
+        os.environ['SNS_TOPIC_ARN'] = topic['TopicArn']
+
+
+# ==== Payload dan event sintetis ====
+
+LOG_NOISE = [
+    "[INFO] Running test case {n}: LPUSH/LRANGE consistency",
+    "[DEBUG] redis> RPUSH queue:{n} item-{n}",
+    "[INFO] Assertion passed in {n} ms",
+    "[WARN] Retrying connection attempt {n}",
+]
+
+
+def generate_log(size, rng):
+    nrp = f"5025211{rng.randint(0, 999):03d}"
+    lines = [f"NRP: {nrp}, Nama: Mahasiswa"]
+    total = len(lines[0])
+    n = 0
+    while total < size:
+        line = rng.choice(LOG_NOISE).format(n=n)
+        lines.append(line)
+        total += len(line) + 1
+        n += 1
+    lines.append(f"Score: {rng.randint(0, 100)}/100")
+    lines.append("Status: PASS")
+    return "\n".join(lines).encode('utf-8')
+
+
+def generate_json_report(size, rng):
+    """Report berformat RedisListTester::generateJsonReport berukuran kira-kira size byte."""
+    results = []
+    total = 0
+    n = 0
+    while total < size or not results:
+        passed = rng.random() < 0.8
+        item = {'test_name': f'test_case_{n}', 'status': 'PASS' if passed else 'FAIL',
+                'duration_ms': rng.randint(1, 500),
+                'message': 'ok' if passed else 'expected LRANGE to return 3 items'}
+        results.append(item)
+        total += len(json.dumps(item)) + 2
+        n += 1
+    passed = sum(1 for item in results if item['status'] == 'PASS')
+    report = {
+        'test_session': {'nrp': f"5025211{rng.randint(0, 999):03d}"},
+        'summary': {'total_tests': len(results), 'passed': passed,
+                    'success_rate': passed * 100.0 / len(results)},
+        'test_results': results,
+    }
+    return json.dumps(report).encode('utf-8')
+
+
+def upload_batch(s3, prefix, payload_format, size, count, rng):
+    """Mengunggah count payload ke moto S3; mengembalikan event S3 berisi count record."""
+    records = []
+    for i in range(count):
+        if payload_format == 'json':
+            body, key, content_type = generate_json_report(size, rng), f"{prefix}/{i}.json", 'application/json'
+        else:
+            body, key, content_type = generate_log(size, rng), f"{prefix}/{i}.log", 'text/plain'
+        response = s3.put_object(Bucket=BUCKET, Key=key, Body=body, ContentType=content_type)
+        records.append({
+            'eventSource': 'aws:s3',
+            'eventName': 'ObjectCreated:Put',
+            's3': {
+                'bucket': {'name': BUCKET},
+                'object': {'key': key, 'size': len(body), 'eTag': response['ETag'].strip('"')},
+            },
+        })
+    return {'Records': records}
+
+
+# ==== Instrumentasi tahap ====
+
+class StageTimer:
+    """Membungkus fungsi lambda_function dan menjumlahkan durasinya per tahap (lintas thread)."""
+
+    def __init__(self, module):
+        self.module = module
+        self.totals = defaultdict(float)
+        self.counts = defaultdict(int)
+        self._lock = threading.Lock()
+        self._originals = {}
+
+    def install(self):
+        for stage, names in STAGES.items():
+            for name in names:
+                original = getattr(self.module, name)
+                self._originals[name] = original
+                setattr(self.module, name, self._wrap(stage, original))
+        # Baca objek S3 diukur di level klien boto3
+        s3 = self.module.get_aws_client('s3')
+        original_get_object = s3.get_object
+        self._originals['s3.get_object'] = (s3, original_get_object)
+        s3.get_object = self._wrap('s3', original_get_object)
+
+    def uninstall(self):
+        for name, original in self._originals.items():
+            if name == 's3.get_object':
+                client, method = original
+                client.get_object = method
+            else:
+                setattr(self.module, name, original)
+
+    def _wrap(self, stage, func):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                with self._lock:
+                    self.totals[stage] += elapsed
+                    self.counts[stage] += 1
+        timed.__wrapped__ = func
+        return timed
+
+    def reset(self):
+        with self._lock:
+            self.totals.clear()
+            self.counts.clear()
+
+
+# ==== Runner ====
+
+def run_scenario(lambda_function, timer, s3, payload_format, size, args, rng):
+    """Menjalankan args.iterations invocation untuk satu kombinasi format/ukuran."""
+    latencies = []
+    stage_totals = defaultdict(float)
+    peak_memory = 0
+    failures = 0
+
+    for iteration in range(args.warmup + args.iterations):
+        measured = iteration >= args.warmup
+        event = upload_batch(s3, f"{payload_format}-{size}/{iteration}-{rng.random():.6f}",
+                             payload_format, size, args.batch, rng)
+        if args.cold:
+            lambda_function.invalidate_cache()
+
+        timer.reset()
+        if args.trace_memory:
+            tracemalloc.start()
+
+        output = io.StringIO()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(output if not args.verbose else sys.stdout):
+            response = lambda_function.lambda_handler(event, None)
+        elapsed = time.perf_counter() - start
+
+        if args.trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            peak_memory = max(peak_memory, peak)
+
+        if response['statusCode'] != 200:
+            failures += 1
+            if failures == 1:
+                print(f"  PERINGATAN: invocation gagal: {response['body'][:500]}")
+
+        if measured:
+            latencies.append(elapsed)
+            for stage, total in timer.totals.items():
+                stage_totals[stage] += total
+
+    events = args.batch * len(latencies)
+    total_time = sum(latencies)
+    return {
+        'format': payload_format,
+        'size': size,
+        'invocations': len(latencies),
+        'events': events,
+        'failures': failures,
+        'latency_p50_ms': statistics.median(latencies) * 1000,
+        'latency_p95_ms': _percentile(latencies, 95) * 1000,
+        'events_per_second': events / total_time if total_time else 0.0,
+        'stages_ms': {stage: total * 1000 / len(latencies) for stage, total in stage_totals.items()},
+        'tracemalloc_peak_mb': peak_memory / 1024 / 1024 if args.trace_memory else None,
+    }
+
+
+def _percentile(values, percent):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(percent / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def _format_size(size):
+    for unit in ('GB', 'MB', 'KB'):
+        if size >= SIZE_UNITS[unit]:
+            return f"{size / SIZE_UNITS[unit]:g}{unit}"
+    return f"{size}B"
+
+
+def print_report(results, google_server):
+    stage_names = list(STAGES.keys()) + ['s3']
+    header = f"{'format':<6} {'ukuran':>7} {'p50 ms':>9} {'p95 ms':>9} {'events/s':>9}"
+    header += ''.join(f" {stage:>11}" for stage in stage_names)
+    print("\nWaktu tahap = rata-rata ms kumulatif per invocation (dijumlah lintas thread)")
+    print(header)
+    for result in results:
+        line = (f"{result['format']:<6} {_format_size(result['size']):>7} {result['latency_p50_ms']:9.1f} "
+                f"{result['latency_p95_ms']:9.1f} {result['events_per_second']:9.1f}")
+        line += ''.join(f" {result['stages_ms'].get(stage, 0.0):11.1f}" for stage in stage_names)
+        if result['tracemalloc_peak_mb'] is not None:
+            line += f"  peak {result['tracemalloc_peak_mb']:.1f} MB"
+        if result['failures']:
+            line += f"  GAGAL {result['failures']}"
+        print(line)
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"\nMax RSS proses: {max_rss:.1f} MB")
+    print(f"Sheets append: {google_server.append_calls} request, {google_server.rows} baris")
+
+
+def compare_baseline(results, baseline_path, tolerance):
+    """Membandingkan p50 dan events/s dengan baseline; mengembalikan daftar regresi."""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {(item['format'], item['size']): item for item in json.load(f)['results']}
+
+    regressions = []
+    for result in results:
+        previous = baseline.get((result['format'], result['size']))
+        if previous is None:
+            continue
+        label = f"{result['format']} {_format_size(result['size'])}"
+        if result['latency_p50_ms'] > previous['latency_p50_ms'] * (1 + tolerance):
+            regressions.append(f"{label}: p50 {previous['latency_p50_ms']:.1f} -> {result['latency_p50_ms']:.1f} ms")
+        if result['events_per_second'] < previous['events_per_second'] * (1 - tolerance):
+            regressions.append(f"{label}: events/s {previous['events_per_second']:.1f} -> {result['events_per_second']:.1f}")
+    return regressions
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--sizes', default='1KB,256KB,4MB', help='ukuran payload, dipisah koma')
+    arg_parser.add_argument('--formats', default='log,json', help='log dan/atau json')
+    arg_parser.add_argument('--batch', type=int, default=10, help='record S3 per event')
+    arg_parser.add_argument('--iterations', type=int, default=5)
+    arg_parser.add_argument('--warmup', type=int, default=1, help='invocation awal yang tidak diukur')
+    arg_parser.add_argument('--sheets-latency-ms', type=float, default=0.0, help='latency buatan server Sheets')
+    arg_parser.add_argument('--cold', action='store_true', help='kosongkan cache secrets/service tiap invocation')
+    arg_parser.add_argument('--sns', action='store_true', help='aktifkan publish SNS')
+    arg_parser.add_argument('--trace-memory', action='store_true', help='ukur peak alokasi dengan tracemalloc (lebih lambat)')
+    arg_parser.add_argument('--verbose', action='store_true', help='tampilkan output print handler')
+    arg_parser.add_argument('--seed', type=int, default=42)
+    arg_parser.add_argument('--save', help='simpan hasil ke file JSON')
+    arg_parser.add_argument('--baseline', help='bandingkan dengan file JSON hasil --save')
+    arg_parser.add_argument('--tolerance', type=float, default=0.2, help='batas regresi relatif terhadap baseline')
+    args = arg_parser.parse_args()
+
+    sizes = [parse_size(size) for size in args.sizes.split(',') if size]
+    formats = [name.strip() for name in args.formats.split(',') if name.strip()]
+
+    os.environ.update({
+        'AWS_DEFAULT_REGION': REGION,
+        'AWS_REGION': REGION,
+        'AWS_ACCESS_KEY_ID': 'testing',
+        'AWS_SECRET_ACCESS_KEY': 'testing',
+        'PROJECT_NAME': 'bench',
+        'ENVIRONMENT': 'local',
+        'IDEMPOTENCY_BACKEND': 'none',
+    })
+    # Server Google lokal tanpa kuota; set GOOGLE_RATE_LIMITS untuk mengukur dengan limiter
+    os.environ.setdefault('GOOGLE_RATE_LIMITS', 'off')
+
+    from moto import mock_aws
+
+    google_server, base_url = start_fake_google(args.sheets_latency_ms / 1000)
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as discovery_dir, mock_aws():
+        write_local_discovery(discovery_dir, base_url)
+        os.environ['GOOGLE_DISCOVERY_DIR'] = discovery_dir
+        setup_aws(base_url, args.sns)
+
+        import boto3
+        import lambda_function
+
+        timer = StageTimer(lambda_function)
+        timer.install()
+        s3 = boto3.client('s3', region_name=REGION)
+        try:
+            results = []
+            for payload_format in formats:
+                for size in sizes:
+                    print(f"Menjalankan {payload_format} {_format_size(size)} "
+                          f"({args.iterations} x {args.batch} record)...")
+                    results.append(run_scenario(lambda_function, timer, s3, payload_format, size, args, rng))
+        finally:
+            timer.uninstall()
+            google_server.shutdown()
+
+    print_report(results, google_server)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'args': vars(args), 'results': results}, f, indent=2)
+        print(f"Hasil disimpan ke {args.save}")
+
+    if args.baseline:
+        regressions = compare_baseline(results, args.baseline, args.tolerance)
+        if regressions:
+            print("\nREGRESI terdeteksi:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"\nTidak ada regresi di atas {args.tolerance:.0%} dibanding {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
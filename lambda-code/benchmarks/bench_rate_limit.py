@@ -0,0 +1,153 @@
+"""
+Benchmark update_google_sheet dari banyak container sekaligus, dengan dan tanpa rate limiter.
+
+Server Sheets lokal menegakkan kuota (token bucket --quota request/detik, burst
+--quota-burst) dan membalas 429 dengan Retry-After saat kuota habis. Setiap
+"container" adalah thread dengan service Sheets sendiri yang memanggil
+update_google_sheet sebanyak --requests kali. Semua container memakai limiter
+bawaan proses, setara dengan container Lambda yang berbagi bucket di Redis.
+
+Mode "tanpa" (GOOGLE_RATE_LIMITS=off) memperlihatkan baris yang hilang karena 429;
+mode "limiter" menahan request di sisi klien dengan rate --limit (default sama
+dengan kuota) sehingga throughput mendekati kuota tanpa kehilangan baris.
+
+Jalankan dari folder lambda-code:
+    python benchmarks/bench_rate_limit.py --containers 20 --requests 10 --quota 20
+    python benchmarks/bench_rate_limit.py --limit 25 --quota 20   # limit di atas kuota
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bench_pipeline as pipeline
+
+
+class _QuotaGoogleHandler(pipeline._FakeGoogleHandler):
+    """Server Google lokal yang membalas 429 + Retry-After saat kuota append habis."""
+
+    def do_POST(self):
+        if ':append' in self.path and not self.server.take_quota():
+            length = int(self.headers.get('Content-Length', 0))
+            self.rfile.read(length)
+            data = b'{"error": {"code": 429, "status": "RESOURCE_EXHAUSTED"}}'
+            self.send_response(429)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Retry-After', str(self.server.retry_after))
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        super().do_POST()
+
+
+def start_quota_google(quota, burst, retry_after, latency):
+    """Seperti pipeline.start_fake_google, dengan kuota append per detik."""
+    server = pipeline._FakeGoogleServer(('127.0.0.1', 0), _QuotaGoogleHandler)
+    server.stats_lock = threading.Lock()
+    server.append_calls = 0
+    server.rows = 0
+    server.latency = latency
+    server.retry_after = retry_after
+    server.rejected = 0
+
+    tokens = [float(burst)]
+    updated = [time.monotonic()]
+
+    def take_quota():
+        with server.stats_lock:
+            now = time.monotonic()
+            tokens[0] = min(burst, tokens[0] + (now - updated[0]) * quota)
+            updated[0] = now
+            if tokens[0] >= 1:
+                tokens[0] -= 1
+                return True
+            server.rejected += 1
+            return False
+
+    server.take_quota = take_quota
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+def run_containers(lambda_function, credentials, containers, requests):
+    """Menjalankan semua container; mengembalikan (berhasil, gagal, detik)."""
+    counts = {'ok': 0, 'lost': 0}
+    counts_lock = threading.Lock()
+    # Service dibangun di luar pengukuran (build_from_document butuh CPU)
+    services = [lambda_function.build_google_service('sheets', 'v4', credentials) for _ in range(containers)]
+
+    def container(index):
+        for number in range(requests):
+            ok = lambda_function.update_google_sheet(services[index], 'bench-sheet', {
+                'nrp': f"{index:03d}{number:04d}", 'score': 90, 'status': 'PASS', 'filename': 'bench.log'
+            })
+            with counts_lock:
+                counts['ok' if ok else 'lost'] += 1
+
+    threads = [threading.Thread(target=container, args=(index,)) for index in range(containers)]
+    output = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return counts['ok'], counts['lost'], time.perf_counter() - start
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--containers', type=int, default=20, help='jumlah container (thread) paralel')
+    arg_parser.add_argument('--requests', type=int, default=10, help='update_google_sheet per container')
+    arg_parser.add_argument('--quota', type=float, default=20.0, help='kuota server, request append per detik')
+    arg_parser.add_argument('--quota-burst', type=float, default=5.0)
+    arg_parser.add_argument('--limit', type=float, default=None, help='rate limiter klien (default = kuota)')
+    arg_parser.add_argument('--retry-after', type=int, default=1, help='Retry-After pada respons 429 (detik)')
+    arg_parser.add_argument('--sheets-latency-ms', type=float, default=20.0)
+    args = arg_parser.parse_args()
+
+    limit = args.limit or args.quota
+    server, base_url = start_quota_google(args.quota, args.quota_burst, args.retry_after,
+                                          args.sheets_latency_ms / 1000)
+
+    with tempfile.TemporaryDirectory() as discovery_dir:
+        pipeline.write_local_discovery(discovery_dir, base_url)
+        os.environ['GOOGLE_DISCOVERY_DIR'] = discovery_dir
+
+        import google_rate_limit
+        import lambda_function
+
+        credentials = lambda_function.load_google_credentials(
+            {'credentials': pipeline.make_service_account(base_url)}
+        )
+
+        total = args.containers * args.requests
+        print(f"{args.containers} container x {args.requests} request, kuota {args.quota:g}/s "
+              f"(burst {args.quota_burst:g}), limiter {limit:g}/s, Retry-After {args.retry_after} s")
+        print(f"{'mode':<8} {'berhasil':>8} {'hilang':>7} {'429':>6} {'detik':>7} {'req/s':>7} {'% kuota':>8}")
+        try:
+            for mode, spec in (('tanpa', 'off'), ('limiter', f"sheets={limit:g}/{args.quota_burst:g}")):
+                os.environ['GOOGLE_RATE_LIMITS'] = spec
+                google_rate_limit._default_limiter = None
+                with server.stats_lock:
+                    server.rejected = 0
+
+                ok, lost, elapsed = run_containers(lambda_function, credentials, args.containers, args.requests)
+                rate = ok / elapsed
+                print(f"{mode:<8} {ok:8d} {lost:7d} {server.rejected:6d} {elapsed:7.2f} "
+                      f"{rate:7.1f} {rate / args.quota * 100:7.0f}%")
+                if ok + lost != total:
+                    raise RuntimeError(f"{mode}: {ok + lost} dari {total} request selesai")
+        finally:
+            server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+"""
+Benchmark ingestion langsung dari S3 vs lewat antrean SQS (batch) untuk lonjakan upload.
+
+Dengan moto, bucket dikonfigurasi mengirim notifikasi ObjectCreated ke antrean SQS,
+lalu sejumlah file diunggah sekaligus. Mode "langsung" memanggil lambda_handler
+sekali per notifikasi (seperti trigger S3 saat ini); mode "sqs" menarik pesan dari
+antrean per batch seperti event source mapping dan memanggil lambda_handler sekali
+per batch, lalu menghapus pesan yang tidak ada di batchItemFailures.
+
+Antrean juga diberi satu pesan duplikat dan satu pesan rusak untuk memeriksa dedupe
+dan partial batch response.
+
+Jalankan dari folder lambda-code:
+    python benchmarks/bench_sqs.py --files 200 --batch-size 50
+    python benchmarks/bench_sqs.py --files 100 --batch-size 100 --cold
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bench_pipeline as pipeline
+
+QUEUE_NAME = 'bench-hasil-penilaian'
+SQS_RECEIVE_MAX = 10
+
+
+def setup_queue(s3, sqs):
+    """Membuat antrean dan notifikasi bucket -> SQS; mengembalikan (queue_url, queue_arn)."""
+    queue_url = sqs.create_queue(QueueName=QUEUE_NAME, Attributes={'VisibilityTimeout': '300'})['QueueUrl']
+    queue_arn = sqs.get_queue_attributes(QueueUrl=queue_url, AttributeNames=['QueueArn'])['Attributes']['QueueArn']
+    s3.put_bucket_notification_configuration(
+        Bucket=pipeline.BUCKET,
+        NotificationConfiguration={
+            'QueueConfigurations': [{'QueueArn': queue_arn, 'Events': ['s3:ObjectCreated:*']}]
+        }
+    )
+    return queue_url, queue_arn
+
+
+def receive_batch(sqs, queue_url, queue_arn, batch_size):
+    """Menarik sampai batch_size pesan dan membungkusnya seperti event SQS untuk Lambda."""
+    records = []
+    while len(records) < batch_size:
+        response = sqs.receive_message(
+            QueueUrl=queue_url,
+            MaxNumberOfMessages=min(SQS_RECEIVE_MAX, batch_size - len(records)),
+            AttributeNames=['All']
+        )
+        messages = response.get('Messages', [])
+        if not messages:
+            break
+        for message in messages:
+            records.append({
+                'messageId': message['MessageId'],
+                'receiptHandle': message['ReceiptHandle'],
+                'body': message['Body'],
+                'attributes': message.get('Attributes', {}),
+                'eventSource': 'aws:sqs',
+                'eventSourceARN': queue_arn,
+                'awsRegion': pipeline.REGION,
+            })
+    return records
+
+
+def invoke(lambda_function, event, cold):
+    if cold:
+        lambda_function.invalidate_cache()
+    output = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        response = lambda_function.lambda_handler(event, None)
+    return response, time.perf_counter() - start
+
+
+def run_direct(lambda_function, events, cold):
+    """Satu invocation per notifikasi S3; mengembalikan (invocations, total detik, gagal)."""
+    total = 0.0
+    failed = 0
+    for event in events:
+        response, elapsed = invoke(lambda_function, event, cold)
+        total += elapsed
+        failed += len(response.get('batchItemFailures', []))
+    return len(events), total, failed
+
+
+def run_sqs(lambda_function, sqs, queue_url, queue_arn, batch_size, cold):
+    """Mengosongkan antrean per batch; mengembalikan (invocations, total detik, messageId gagal)."""
+    invocations = 0
+    total = 0.0
+    failed_ids = []
+    while True:
+        records = receive_batch(sqs, queue_url, queue_arn, batch_size)
+        if not records:
+            break
+        response, elapsed = invoke(lambda_function, {'Records': records}, cold)
+        invocations += 1
+        total += elapsed
+
+        failed = {item['itemIdentifier'] for item in response.get('batchItemFailures', [])}
+        failed_ids.extend(failed)
+        done = [record for record in records if record['messageId'] not in failed]
+        for start in range(0, len(done), SQS_RECEIVE_MAX):
+            sqs.delete_message_batch(QueueUrl=queue_url, Entries=[
+                {'Id': str(i), 'ReceiptHandle': record['receiptHandle']}
+                for i, record in enumerate(done[start:start + SQS_RECEIVE_MAX])
+            ])
+    return invocations, total, failed_ids
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--files', type=int, default=200, help='jumlah file dalam lonjakan upload')
+    arg_parser.add_argument('--size', default='4KB')
+    arg_parser.add_argument('--batch-size', type=int, default=50, help='pesan SQS per invocation')
+    arg_parser.add_argument('--cold', action='store_true', help='kosongkan cache secrets/service tiap invocation')
+    arg_parser.add_argument('--seed', type=int, default=42)
+    args = arg_parser.parse_args()
+
+    size = pipeline.parse_size(args.size)
+    os.environ.update({
+        'AWS_DEFAULT_REGION': pipeline.REGION,
+        'AWS_REGION': pipeline.REGION,
+        'AWS_ACCESS_KEY_ID': 'testing',
+        'AWS_SECRET_ACCESS_KEY': 'testing',
+        'PROJECT_NAME': 'bench',
+        'ENVIRONMENT': 'local',
+        'IDEMPOTENCY_BACKEND': 'memory',
+    })
+    # Server Google lokal tanpa kuota; set GOOGLE_RATE_LIMITS untuk mengukur dengan limiter
+    os.environ.setdefault('GOOGLE_RATE_LIMITS', 'off')
+
+    from moto import mock_aws
+
+    google_server, base_url = pipeline.start_fake_google(0)
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as discovery_dir, mock_aws():
+        pipeline.write_local_discovery(discovery_dir, base_url)
+        os.environ['GOOGLE_DISCOVERY_DIR'] = discovery_dir
+        pipeline.setup_aws(base_url, False)
+
+        import boto3
+        import lambda_function
+
+        s3 = boto3.client('s3', region_name=pipeline.REGION)
+        sqs = boto3.client('sqs', region_name=pipeline.REGION)
+        queue_url, queue_arn = setup_queue(s3, sqs)
+
+        try:
+            # Mode langsung: event S3 satu record per invocation
+            direct_event = pipeline.upload_batch(s3, 'langsung', 'log', size, args.files, rng)
+            # Notifikasi upload di atas juga masuk antrean; buang agar mode sqs mulai bersih
+            sqs.purge_queue(QueueUrl=queue_url)
+            direct = run_direct(lambda_function, [{'Records': [record]} for record in direct_event['Records']],
+                                args.cold)
+
+            # Mode sqs: lonjakan upload masuk antrean, ditambah pesan duplikat dan pesan rusak
+            pipeline.upload_batch(s3, 'antrean', 'log', size, args.files, rng)
+            first = sqs.receive_message(QueueUrl=queue_url, MaxNumberOfMessages=1, VisibilityTimeout=0)['Messages'][0]
+            sqs.send_message(QueueUrl=queue_url, MessageBody=first['Body'])
+            sqs.send_message(QueueUrl=queue_url, MessageBody='bukan json')
+            queued_rows = google_server.rows
+            sqs_invocations, sqs_total, failed_ids = run_sqs(
+                lambda_function, sqs, queue_url, queue_arn, args.batch_size, args.cold
+            )
+            sqs_rows = google_server.rows - queued_rows
+        finally:
+            google_server.shutdown()
+
+        remaining = sqs.get_queue_attributes(
+            QueueUrl=queue_url, AttributeNames=['ApproximateNumberOfMessages', 'ApproximateNumberOfMessagesNotVisible']
+        )['Attributes']
+
+    invocations, direct_total, direct_failed = direct
+    print(f"{args.files} file {pipeline._format_size(size)}, batch SQS {args.batch_size}"
+          f"{', cache dikosongkan tiap invocation' if args.cold else ''}")
+    print(f"{'mode':<9} {'invocation':>10} {'total ms':>10} {'ms/file':>8} {'gagal':>6}")
+    print(f"{'langsung':<9} {invocations:10d} {direct_total * 1000:10.1f} "
+          f"{direct_total * 1000 / args.files:8.2f} {direct_failed:6d}")
+    print(f"{'sqs':<9} {sqs_invocations:10d} {sqs_total * 1000:10.1f} "
+          f"{sqs_total * 1000 / args.files:8.2f} {len(failed_ids):6d}")
+    print(f"\nBaris sheet mode sqs: {sqs_rows} (file unik {args.files}, duplikat tidak ditulis ulang)")
+    print(f"Pesan dilaporkan gagal: {len(failed_ids)} (diharapkan 1 pesan rusak)")
+    print(f"Sisa pesan di antrean: {json.dumps(remaining)}")
+
+
+if __name__ == '__main__':
+    main()
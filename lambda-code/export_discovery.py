@@ -0,0 +1,89 @@
+"""
+Menyalin discovery document Google API (Sheets, Drive) ke folder layer Lambda.
+
+lambda_function.build_google_service() membaca file ini dengan build_from_document
+sehingga cold start tidak perlu mengambil atau mencari discovery document.
+
+Jalankan dari folder lambda-code setelah `pip install -t python ...`:
+    python export_discovery.py            # tulis python/discovery/*.json
+    python export_discovery.py --verify   # cek build service tanpa jaringan
+"""
+import argparse
+import os
+import socket
+import sys
+
+LAMBDA_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT_DIR = os.path.join(LAMBDA_DIR, 'python', 'discovery')
+
+SERVICES = [
+    ('sheets', 'v4'),
+    ('drive', 'v3'),
+]
+
+
+def export_documents(output_dir):
+    """Menulis discovery document statis bawaan googleapiclient ke output_dir."""
+    from googleapiclient.discovery_cache import get_static_doc
+
+    os.makedirs(output_dir, exist_ok=True)
+    for service_name, version in SERVICES:
+        document = get_static_doc(service_name, version)
+        if document is None:
+            raise RuntimeError(f"Discovery document {service_name} {version} tidak ada di googleapiclient")
+
+        path = os.path.join(output_dir, f"{service_name}.{version}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(document)
+        print(f"✅ {path} ({len(document)} bytes)")
+
+
+def _block_network(*args, **kwargs):
+    raise RuntimeError("Akses jaringan diblokir saat verifikasi")
+
+
+def verify_offline(output_dir):
+    """Membangun semua service dari folder discovery dengan socket diblokir."""
+    os.environ['GOOGLE_DISCOVERY_DIR'] = output_dir
+    # Modul layer (google_auth_httplib2 vendored, google_rate_limit) seperti di /opt/python
+    sys.path.insert(0, os.path.join(LAMBDA_DIR, 'python'))
+    sys.path.insert(0, LAMBDA_DIR)
+
+    from google.auth.credentials import AnonymousCredentials
+    from lambda_function import build_google_service
+
+    original_connect = socket.socket.connect
+    original_create_connection = socket.create_connection
+    socket.socket.connect = _block_network
+    socket.create_connection = _block_network
+    try:
+        for service_name, version in SERVICES:
+            if not os.path.isfile(os.path.join(output_dir, f"{service_name}.{version}.json")):
+                raise RuntimeError(f"{service_name}.{version}.json belum diekspor ke {output_dir}")
+
+            service = build_google_service(service_name, version, AnonymousCredentials())
+            if service_name == 'sheets':
+                request = service.spreadsheets().values().append(
+                    spreadsheetId='dummy', range='A:E', valueInputOption='USER_ENTERED', body={'values': []}
+                )
+            else:
+                request = service.files().list(pageSize=1)
+            print(f"✅ {service_name} {version} dibangun offline: {request.method} {request.uri}")
+    finally:
+        socket.socket.connect = original_connect
+        socket.create_connection = original_create_connection
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--output-dir', default=DEFAULT_OUTPUT_DIR)
+    arg_parser.add_argument('--verify', action='store_true', help='hanya verifikasi build offline')
+    args = arg_parser.parse_args()
+
+    if not args.verify:
+        export_documents(args.output_dir)
+    verify_offline(args.output_dir)
+
+
+if __name__ == '__main__':
+    main()
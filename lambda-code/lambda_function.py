@@ -1,178 +1,729 @@
 import json
-import boto3
 import os
-from io import BytesIO
 from datetime import datetime
 import base64
+import codecs
+import hashlib
+import html
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from string import Template
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+from urllib.parse import quote, unquote_plus
 
-# Import library Google
-from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseUpload
+# boto3 dan library Google di-import secara lazy (saat pertama dipakai) agar
+# fase init cold start tidak membayar SDK yang belum tentu digunakan.
 
-# Inisialisasi Klien AWS
-s3_client = boto3.client('s3')
-ses_client = boto3.client('ses', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
-sns_client = boto3.client('sns')
-secrets_manager_client = boto3.client('secretsmanager')
+# Klien AWS dibuat saat pertama dipakai lalu dipakai ulang selama container hidup
+_aws_clients = {}
+_aws_clients_lock = threading.Lock()
+
+def get_aws_client(service_name):
+    """Mengembalikan klien boto3 untuk service_name, dibuat sekali per container."""
+    client = _aws_clients.get(service_name)
+    if client is not None:
+        return client
+    
+    with _aws_clients_lock:
+        client = _aws_clients.get(service_name)
+        if client is None:
+            import boto3
+            
+            if service_name == 'ses':
+                client = boto3.client('ses', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
+            else:
+                client = boto3.client(service_name)
+            _aws_clients[service_name] = client
+        return client
+
+_LAZY_CLIENT_NAMES = {
+    's3_client': 's3',
+    'ses_client': 'ses',
+    'sns_client': 'sns',
+    'secrets_manager_client': 'secretsmanager',
+}
+
+def __getattr__(name):
+    """Kompatibilitas untuk kode luar yang masih mengakses lambda_function.s3_client dkk."""
+    if name in _LAZY_CLIENT_NAMES:
+        return get_aws_client(_LAZY_CLIENT_NAMES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Jumlah worker default untuk memproses banyak record S3 sekaligus
+DEFAULT_MAX_WORKERS = 8
+
+# File log di atas ukuran ini dibaca secara streaming per chunk
+DEFAULT_STREAM_THRESHOLD_BYTES = 1024 * 1024
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Pool koneksi keep-alive untuk Google API (dipakai ulang antar invocation)
+DEFAULT_GOOGLE_HTTP_POOL_SIZE = 10
+DEFAULT_GOOGLE_HTTP_TIMEOUT = 30
+
+# Timeout default (detik) per sink aksi pasca-parsing
+SINK_TIMEOUTS = {'sheet': 60, 'email': 15, 'sns': 15}
+
+# File hasil di atas ukuran ini dikirim lewat SNS sebagai pointer S3 (claim-check);
+# base64 menambah ~33%, jadi 150 KB masih muat di batas pesan SNS 256 KB
+DEFAULT_SNS_INLINE_MAX_BYTES = 150 * 1024
+DEFAULT_ARTIFACT_MULTIPART_BYTES = 8 * 1024 * 1024
+
+# Executor terpisah untuk sink agar tidak berebut worker dengan pemrosesan record;
+# dibuat saat pertama dipakai dengan ukuran dari env MAX_WORKERS
+_sink_executor = None
+_sink_executor_lock = threading.Lock()
+
+# Template SES yang sudah dipastikan ada (untuk mode digest)
+_ses_templates_ready = set()
+
+# Lama (detik) sebuah event S3 diingat untuk mendeteksi duplikat
+DEFAULT_IDEMPOTENCY_TTL = 7 * 24 * 3600
+
+# Cache level modul yang bertahan antar invocation pada container yang sama (warm start)
+DEFAULT_CACHE_TTL = 300
+_cache = {}
+_cache_lock = threading.Lock()
+_cache_stats = {'hits': 0, 'misses': 0}
+
+def get_cached(name, loader, ttl=None):
+    """
+    Mengambil nilai dari cache modul, memanggil loader() jika belum ada atau kadaluarsa.
+    
+    TTL (detik) default diambil dari env CACHE_TTL_SECONDS.
+    """
+    if ttl is None:
+        ttl = int(os.environ.get('CACHE_TTL_SECONDS', DEFAULT_CACHE_TTL))
+    
+    with _cache_lock:
+        entry = _cache.get(name)
+        if entry is not None and entry[1] > time.monotonic():
+            _cache_stats['hits'] += 1
+            print(f"Cache hit: {name}")
+            return entry[0]
+        
+        _cache_stats['misses'] += 1
+        print(f"Cache miss: {name}")
+        value = loader()
+        _cache[name] = (value, time.monotonic() + ttl)
+        return value
+
+def invalidate_cache(name=None):
+    """Menghapus satu entry cache, atau semua entry jika name tidak diberikan."""
+    with _cache_lock:
+        if name is None:
+            _cache.clear()
+        else:
+            _cache.pop(name, None)
+
+# Level log (env LOG_LEVEL); dump event/hasil lengkap hanya dicetak pada DEBUG
+LOG_LEVELS = {'DEBUG': 10, 'INFO': 20, 'WARNING': 30, 'ERROR': 40}
+
+def log_enabled(level):
+    """True jika pesan dengan level ini perlu dicetak menurut env LOG_LEVEL (default INFO)."""
+    current = LOG_LEVELS.get(os.environ.get('LOG_LEVEL', 'INFO').upper(), LOG_LEVELS['INFO'])
+    return LOG_LEVELS[level] >= current
+
+# Nama metrik CloudWatch per tahap pipeline
+METRIC_STAGES = {
+    'secrets': 'Secrets',
+    'google_init': 'GoogleInit',
+    's3_read': 'S3Read',
+    'parse': 'Parse',
+    'sheet': 'Sheet',
+    'email': 'Email',
+    'sns': 'Sns',
+}
+
+class InvocationMetrics:
+    """
+    Akumulator metrik satu invocation: durasi per tahap (ms, dijumlah lintas thread),
+    jumlah error per tahap dan counter lain (bytes dibaca, cache hit, dll).
+    Ditulis sekali di akhir invocation sebagai CloudWatch Embedded Metric Format.
+    """
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations = {}
+        self.errors = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+    
+    def add_duration(self, stage, seconds):
+        with self._lock:
+            self.durations[stage] = self.durations.get(stage, 0.0) + seconds * 1000
+    
+    def add_error(self, stage):
+        with self._lock:
+            self.errors[stage] = self.errors.get(stage, 0) + 1
+    
+    def increment(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+    
+    def to_emf(self, namespace, function_name, properties=None):
+        """Record EMF (dict) dengan dimensi FunctionName."""
+        values = {'InvocationDuration': (time.perf_counter() - self.started) * 1000}
+        units = {'InvocationDuration': 'Milliseconds'}
+        
+        with self._lock:
+            for stage, label in METRIC_STAGES.items():
+                values[f'{label}Duration'] = self.durations.get(stage, 0.0)
+                units[f'{label}Duration'] = 'Milliseconds'
+                values[f'{label}Errors'] = self.errors.get(stage, 0)
+                units[f'{label}Errors'] = 'Count'
+            for name, value in self.counters.items():
+                values[name] = value
+                units[name] = 'Bytes' if name.startswith('Bytes') else 'Count'
+        
+        record = {
+            '_aws': {
+                'Timestamp': int(time.time() * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace': namespace,
+                    'Dimensions': [['FunctionName']],
+                    'Metrics': [{'Name': name, 'Unit': units[name]} for name in values]
+                }]
+            },
+            'FunctionName': function_name,
+            **(properties or {}),
+        }
+        record.update({name: round(value, 3) if isinstance(value, float) else value
+                       for name, value in values.items()})
+        return record
+
+# Metrik invocation yang sedang berjalan (satu invocation per container pada satu waktu)
+_current_metrics = None
+
+@contextmanager
+def metric_stage(stage):
+    """Mengukur durasi blok kode sebagai tahap `stage`; exception dihitung sebagai error tahap."""
+    metrics = _current_metrics
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        if metrics is not None:
+            metrics.add_error(stage)
+        raise
+    finally:
+        if metrics is not None:
+            metrics.add_duration(stage, time.perf_counter() - start)
+
+def record_metric(name, value=1):
+    """Menambah counter pada metrik invocation yang sedang berjalan."""
+    metrics = _current_metrics
+    if metrics is not None:
+        metrics.increment(name, value)
+
+def emit_invocation_metrics(metrics, context=None, properties=None):
+    """Mencetak satu baris JSON EMF; CloudWatch Logs mengubahnya menjadi metrik."""
+    properties = dict(properties or {})
+    request_id = getattr(context, 'aws_request_id', None)
+    if request_id:
+        properties['RequestId'] = request_id
+    
+    record = metrics.to_emf(
+        os.environ.get('METRICS_NAMESPACE', 'GradingPipeline'),
+        os.environ.get('AWS_LAMBDA_FUNCTION_NAME', 'local'),
+        properties
+    )
+    print(json.dumps(record, separators=(',', ':')))
 
 def get_secret(secret_name):
     """Mengambil secret dari AWS Secrets Manager."""
     try:
-        response = secrets_manager_client.get_secret_value(SecretId=secret_name)
+        response = get_aws_client('secretsmanager').get_secret_value(SecretId=secret_name)
         secret = json.loads(response['SecretString'])
         return secret
     except Exception as e:
         print(f"Error mengambil secret {secret_name}: {e}")
         raise e
 
+@dataclass(frozen=True)
+class GradingConfig:
+    """Konfigurasi yang dibutuhkan handler, diambil dari Secrets Manager."""
+    google_sheet_id: str
+    sender_email: str
+    recipient_email: str
+    google_creds: dict = field(default=None, repr=False)
+    
+    def missing_fields(self):
+        """Daftar field konfigurasi yang masih kosong."""
+        return [name for name in ('google_sheet_id', 'sender_email', 'recipient_email')
+                if not getattr(self, name)]
+
+def _secret_name(suffix):
+    """Nama lengkap secret berdasarkan PROJECT_NAME dan ENVIRONMENT."""
+    project_name = os.environ.get('PROJECT_NAME', 'skripsi')
+    environment = os.environ.get('ENVIRONMENT', 'dev')
+    return f"{project_name}-{environment}-{suffix}"
+
+def get_secrets_bulk(secret_names):
+    """
+    Mengambil beberapa secret sekaligus.
+    
+    Menggunakan satu panggilan BatchGetSecretValue; jika tidak tersedia (boto3 lama
+    atau role tidak punya izin), secret diambil secara paralel dengan get_secret.
+    Mengembalikan dict {secret_name: secret_dict}.
+    """
+    secret_names = list(secret_names)
+    
+    try:
+        response = get_aws_client('secretsmanager').batch_get_secret_value(SecretIdList=secret_names)
+        errors = response.get('Errors', [])
+        if errors:
+            raise ValueError(f"Secret tidak bisa diambil: {[err.get('SecretId') for err in errors]}")
+        
+        secrets = {item['Name']: json.loads(item['SecretString']) for item in response['SecretValues']}
+        missing = [name for name in secret_names if name not in secrets]
+        if missing:
+            raise ValueError(f"Secret tidak ditemukan: {missing}")
+        return secrets
+    except Exception as e:
+        print(f"BatchGetSecretValue gagal ({e}), fallback ke pengambilan paralel")
+    
+    with ThreadPoolExecutor(max_workers=len(secret_names)) as executor:
+        return dict(zip(secret_names, executor.map(get_secret, secret_names)))
+
 def get_all_secrets():
-    """Mengambil semua secrets yang diperlukan."""
+    """Mengambil semua secrets yang diperlukan dalam satu kali jalan."""
     try:
-        project_name = os.environ.get('PROJECT_NAME', 'skripsi')
-        environment = os.environ.get('ENVIRONMENT', 'dev')
-        
-        # Ambil Google Sheet ID
-        sheet_secret_name = f"{project_name}-{environment}-google-sheet-id"
-        sheet_secret = get_secret(sheet_secret_name)
-        
-        # Ambil Email Config  
-        email_secret_name = f"{project_name}-{environment}-email-config"
-        email_secret = get_secret(email_secret_name)
-        
-        # Gabungkan semua secrets
-        all_secrets = {
-            'google_sheet_id': sheet_secret.get('sheet_id'),
-            'sender_email': email_secret.get('sender_email'),
-            'recipient_email': email_secret.get('recipient_email')
-        }
+        sheet_secret_name = _secret_name('google-sheet-id')
+        email_secret_name = _secret_name('email-config')
+        creds_secret_name = _secret_name('google-creds')
+        
+        secrets = get_secrets_bulk([sheet_secret_name, email_secret_name, creds_secret_name])
+        sheet_secret = secrets[sheet_secret_name]
+        email_secret = secrets[email_secret_name]
+        
+        config = GradingConfig(
+            google_sheet_id=sheet_secret.get('sheet_id'),
+            sender_email=email_secret.get('sender_email'),
+            recipient_email=email_secret.get('recipient_email'),
+            google_creds=secrets[creds_secret_name]
+        )
         
-        print(f"Secrets berhasil diambil: {list(all_secrets.keys())}")
-        return all_secrets
+        print(f"Secrets berhasil diambil: {list(secrets.keys())}")
+        return config
         
     except Exception as e:
         print(f"Error mengambil secrets: {e}")
         raise e
 
-def get_google_services():
-    """Menginisialisasi layanan Google Sheets."""
+def get_google_services(creds_secret=None):
+    """
+    Menginisialisasi layanan Google Sheets.
+    
+    creds_secret dapat diberikan dari GradingConfig.google_creds agar secret
+    tidak diambil ulang dari Secrets Manager.
+    """
     try:
-        project_name = os.environ.get('PROJECT_NAME', 'skripsi')
-        environment = os.environ.get('ENVIRONMENT', 'dev')
-        
-        # Ambil Google credentials dari secret manager
-        creds_secret_name = f"{project_name}-{environment}-google-creds"
-        creds_secret = get_secret(creds_secret_name)
-        
-        # Parse credentials JSON
-        if 'credentials' in creds_secret:
-            creds_json = creds_secret['credentials']
-            if isinstance(creds_json, str):
-                creds_data = json.loads(creds_json)
-            else:
-                creds_data = creds_json
-        else:
-            raise ValueError("Credentials not found in secret")
-        
-        creds = Credentials.from_service_account_info(
-            creds_data,
-            scopes=[
-                'https://www.googleapis.com/auth/spreadsheets',
-            ]
-        )
+        if creds_secret is None:
+            # Ambil Google credentials dari secret manager
+            creds_secret = get_secret(_secret_name('google-creds'))
         
-        sheets_service = build('sheets', 'v4', credentials=creds)
+        creds = load_google_credentials(creds_secret)
+        sheets_service = build_google_service('sheets', 'v4', creds)
         return sheets_service
         
     except Exception as e:
         print(f"Error menginisialisasi Google services: {e}")
         raise e
 
-def process_log_content(log_content, filename):
+def load_google_credentials(creds_secret):
+    """Membuat credentials service account (scope Sheets) dari isi secret google-creds."""
+    from google.oauth2.service_account import Credentials
+    
+    # Parse credentials JSON
+    if 'credentials' in creds_secret:
+        creds_json = creds_secret['credentials']
+        if isinstance(creds_json, str):
+            creds_data = json.loads(creds_json)
+        else:
+            creds_data = creds_json
+    else:
+        raise ValueError("Credentials not found in secret")
+    
+    return Credentials.from_service_account_info(
+        creds_data,
+        scopes=[
+            'https://www.googleapis.com/auth/spreadsheets',
+        ]
+    )
+
+def _discovery_dirs():
+    """Lokasi discovery document offline: env GOOGLE_DISCOVERY_DIR, layer Lambda, lalu folder lokal."""
+    dirs = []
+    if os.environ.get('GOOGLE_DISCOVERY_DIR'):
+        dirs.append(os.environ['GOOGLE_DISCOVERY_DIR'])
+    dirs.append('/opt/python/discovery')
+    dirs.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python', 'discovery'))
+    return dirs
+
+def build_google_service(service_name, version, credentials):
+    """
+    Membangun service Google API tanpa mengambil discovery document dari jaringan.
+    
+    Jika {service_name}.{version}.json ada di folder discovery (dibundel di layer oleh
+    export_discovery.py), service dibangun dengan build_from_document. Jika tidak,
+    dipakai discovery document statis bawaan googleapiclient (static_discovery=True).
+    """
+    from googleapiclient.discovery import build, build_from_document
+    
+    auth_kwargs = _google_auth_kwargs(credentials)
+    
+    for directory in _discovery_dirs():
+        path = os.path.join(directory, f"{service_name}.{version}.json")
+        if os.path.isfile(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                document = f.read()
+            return build_from_document(document, **auth_kwargs)
+    
+    return build(service_name, version, static_discovery=True, cache_discovery=False, **auth_kwargs)
+
+def _google_auth_kwargs(credentials):
+    """
+    Argumen autentikasi untuk build(): AuthorizedHttp di atas pool koneksi keep-alive
+    bersama (GOOGLE_HTTP_POOL_SIZE, GOOGLE_HTTP_TIMEOUT) yang me-refresh token sebelum
+    kadaluarsa (GOOGLE_TOKEN_REFRESH_SKEW). GOOGLE_HTTP_POOL_SIZE=0 memakai satu koneksi
+    httplib2 biasa. Semua request melewati rate limiter Google (google_rate_limit,
+    GOOGLE_RATE_LIMITS) kecuali dimatikan.
+    """
+    import google_auth_httplib2
+    import google_rate_limit
+    
+    pool_size = int(os.environ.get('GOOGLE_HTTP_POOL_SIZE', DEFAULT_GOOGLE_HTTP_POOL_SIZE))
+    timeout = float(os.environ.get('GOOGLE_HTTP_TIMEOUT', DEFAULT_GOOGLE_HTTP_TIMEOUT))
+    if pool_size <= 0:
+        import httplib2
+        http = httplib2.Http(timeout=timeout)
+    else:
+        http = google_auth_httplib2.make_pooled_http(pool_size=pool_size, timeout=timeout)
+    refresh_skew = float(os.environ.get('GOOGLE_TOKEN_REFRESH_SKEW', google_auth_httplib2.DEFAULT_REFRESH_SKEW))
+    authorized_http = google_auth_httplib2.AuthorizedHttp(credentials, http=http, refresh_skew=refresh_skew)
+    return {'http': google_rate_limit.rate_limited_http(authorized_http, project=getattr(credentials, 'project_id', None))}
+
+@dataclass(frozen=True)
+class FieldSpec:
+    """
+    Spesifikasi satu field yang diekstrak dari log.
+    
+    keywords: label sebelum tanda ':' (case-insensitive), misalnya ('nrp', 'nim').
+    value_pattern: regex dengan satu grup untuk nilai setelah ':'.
+    convert: mengubah string nilai; mengembalikan None jika nilai tidak valid.
+    after: hook opsional after(data, value) yang dipanggil setelah field diisi.
+    """
+    name: str
+    keywords: tuple
+    value_pattern: str = r'([^\s,:]+)'
+    convert: object = None
+    after: object = None
+
+def _derive_status(data, score):
+    """Tentukan status berdasarkan score."""
+    data["status"] = "Lulus" if score >= 70 else "Tidak Lulus"
+
+DEFAULT_FIELD_SPECS = (
+    FieldSpec('nrp', ('nrp', 'nim')),
+    FieldSpec('score', ('score', 'nilai', 'grade'), r'[^\s\d]*(\d+)', int, _derive_status),
+    FieldSpec('status', ('status', 'result'), r'([^:\r\n]*)', str.strip),
+)
+
+class LogParser:
+    """
+    Ekstraktor log satu-pass.
+    
+    Semua keyword FieldSpec digabung menjadi satu regex terkompilasi sehingga isi log
+    hanya dipindai sekali tanpa lower()/split() per baris. Nilai diambil langsung dari
+    posisi setelah keyword. Jika satu field muncul lebih dari sekali, nilai terakhir
+    yang dipakai.
+    """
+    
+    def __init__(self, field_specs=DEFAULT_FIELD_SPECS):
+        self.field_specs = tuple(field_specs)
+        self._spec_by_keyword = {}
+        for spec in self.field_specs:
+            for keyword in spec.keywords:
+                self._spec_by_keyword[keyword.lower()] = spec
+        
+        # Keyword terpanjang didahulukan agar alternation tidak berhenti di prefix
+        keywords = sorted(self._spec_by_keyword, key=len, reverse=True)
+        keyword_regex = '(' + '|'.join(re.escape(keyword) for keyword in keywords) + '):'
+        self._keyword_pattern = re.compile(keyword_regex)
+        self._keyword_pattern_ci = re.compile(keyword_regex, re.IGNORECASE)
+        self._value_patterns = {
+            spec.name: re.compile(r'[ \t]*' + spec.value_pattern) for spec in self.field_specs
+        }
+    
+    def parse(self, log_content, filename):
+        """Mengembalikan dict hasil parsing dengan bentuk yang sama seperti process_log_content."""
+        data = self._initial_data(filename)
+        self._scan(log_content, data)
+        return data
+    
+    def parse_stream(self, blocks, filename, required_fields=None):
+        """
+        Versi streaming dari parse(): blocks adalah iterable teks yang masing-masing
+        berakhir di batas baris (lihat iter_text_blocks).
+        
+        Jika required_fields diberikan, pembacaan berhenti segera setelah semua field
+        tersebut ditemukan. Mengembalikan tuple (data, stopped_early).
+        """
+        data = self._initial_data(filename)
+        remaining = set(required_fields or ())
+        
+        for block in blocks:
+            found = self._scan(block, data)
+            if remaining:
+                remaining -= found
+                if not remaining:
+                    return data, True
+        
+        return data, False
+    
+    async def parse_stream_async(self, blocks, filename, required_fields=None):
+        """Seperti parse_stream(), tetapi blocks adalah async iterable (lihat aiter_text_blocks)."""
+        data = self._initial_data(filename)
+        remaining = set(required_fields or ())
+        
+        async for block in blocks:
+            found = self._scan(block, data)
+            if remaining:
+                remaining -= found
+                if not remaining:
+                    return data, True
+        
+        return data, False
+    
+    def _initial_data(self, filename):
+        return {
+            "nrp": "N/A",
+            "score": "N/A",
+            "filename": filename
+        }
+    
+    def _scan(self, text, data):
+        """Memindai text dan mengisi data; mengembalikan set nama field yang ditemukan."""
+        found = set()
+        
+        # Pencarian keyword case-sensitive pada salinan lowercase jauh lebih cepat dari
+        # re.IGNORECASE; hanya bisa dipakai jika lower() tidak mengubah offset karakter.
+        lowered = text.lower()
+        if len(lowered) == len(text):
+            matches = self._keyword_pattern.finditer(lowered)
+        else:
+            matches = self._keyword_pattern_ci.finditer(text)
+        
+        for match in matches:
+            spec = self._spec_by_keyword[match.group(1).lower()]
+            value_match = self._value_patterns[spec.name].match(text, match.end())
+            if value_match and self._apply(data, spec, value_match.group(1)):
+                found.add(spec.name)
+        
+        return found
+    
+    def _apply(self, data, spec, raw_value):
+        value = spec.convert(raw_value) if spec.convert else raw_value
+        if value is None or value == '':
+            return False
+        data[spec.name] = value
+        if spec.after:
+            spec.after(data, value)
+        return True
+
+_default_log_parser = LogParser()
+
+def process_log_content(log_content, filename, parser=None):
     """
     Memproses isi file log untuk mendapatkan data.
     
-    CATATAN: Sesuaikan fungsi ini dengan format log Anda
+    CATATAN: Sesuaikan DEFAULT_FIELD_SPECS (atau berikan LogParser sendiri) dengan format log Anda
     """
     print(f"Memproses isi log dari file: {filename}")
     
-    # Inisialisasi data default
+    parser = parser or _default_log_parser
+    data = parser.parse(log_content, filename)
+    
+    _log_parse_result(data)
+    return data
+
+def iter_text_blocks(chunks, encoding='utf-8'):
+    """
+    Mengubah iterable bytes (mis. StreamingBody.iter_chunks()) menjadi blok teks.
+    
+    Decoding dilakukan secara incremental sehingga karakter multi-byte yang terpotong
+    antar chunk tetap benar, dan setiap blok berakhir di batas baris.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending = ''
+    
+    for chunk in chunks:
+        pending += decoder.decode(chunk)
+        cut = pending.rfind('\n') + 1
+        if cut:
+            yield pending[:cut]
+            pending = pending[cut:]
+    
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending
+
+async def aiter_text_blocks(chunks, encoding='utf-8'):
+    """Versi async dari iter_text_blocks untuk chunk dari async iterable (mis. aiobotocore)."""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending = ''
+    
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        cut = pending.rfind('\n') + 1
+        if cut:
+            yield pending[:cut]
+            pending = pending[cut:]
+    
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending
+
+def process_log_stream(chunks, filename, required_fields=None, parser=None):
+    """Memproses log secara streaming tanpa menyimpan seluruh isi file di memori."""
+    print(f"Memproses log secara streaming dari file: {filename}")
+    
+    parser = parser or _default_log_parser
+    data, stopped_early = parser.parse_stream(iter_text_blocks(chunks), filename, required_fields)
+    
+    if stopped_early:
+        print("Semua field wajib ditemukan, pembacaan dihentikan lebih awal")
+    _log_parse_result(data)
+    return data
+
+def _log_parse_result(data):
+    """Ringkasan hasil parsing; isi lengkap (termasuk test_results) hanya pada LOG_LEVEL=DEBUG."""
+    if log_enabled('DEBUG'):
+        print(f"Hasil parsing: {data}")
+    else:
+        print(f"Hasil parsing: nrp={data.get('nrp')}, score={data.get('score')}, status={data.get('status')}")
+
+def is_json_report(content, filename, content_type=None):
+    """Cek apakah konten adalah JSON report dari tester PHP (berdasarkan Content-Type, ekstensi, atau isi)."""
+    if content_type and 'json' in content_type.lower():
+        return True
+    if filename.lower().endswith('.json'):
+        return True
+    return content.lstrip()[:1] == '{'
+
+def _report_number(value):
+    """Angka dari field report (mis. 75, "75", "75%"), atau None jika tidak bisa dibaca."""
+    if isinstance(value, str):
+        value = value.strip().rstrip('%').strip()
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def process_json_report(report, filename):
+    """
+    Mengambil data dari JSON report tester PHP (mis. RedisListTester::generateJsonReport).
+    
+    Score diambil dari summary.success_rate, status diturunkan dari score seperti
+    pada parser log, dan hasil per test disimpan di test_results. Field yang tidak
+    bisa dibaca (mis. success_rate bukan angka) dibiarkan N/A tanpa membuang field lain.
+    """
+    summary = report['summary']
+    session = report.get('test_session') or {}
+    
     data = {
         "nrp": "N/A",
-        "score": "N/A", 
+        "score": "N/A",
         "filename": filename
     }
     
-    try:
-        # Contoh parsing - sesuaikan dengan format log Anda
-        lines = log_content.strip().splitlines()
-        
-        for line in lines:
-            line = line.strip()
-            
-            # Ekstrak NRP/NIM
-            if "NRP:" in line or "nim:" in line.lower() or "NIM:" in line:
-                try:
-                    nrp = line.split(":")[1].strip().split(",")[0].split()[0]
-                    data["nrp"] = nrp
-                except:
-                    pass
-            
-            # Ekstrak Score/Nilai
-            if any(keyword in line.lower() for keyword in ["score:", "nilai:", "grade:"]):
-                try:
-                    score_part = line.split(":")[1].strip()
-                    score = ''.join(filter(str.isdigit, score_part.split()[0]))
-                    if score:
-                        data["score"] = int(score)
-                        # Tentukan status berdasarkan score
-                        data["status"] = "Lulus" if int(score) >= 70 else "Tidak Lulus"
-                except:
-                    pass
-            
-            # Ekstrak status langsung jika ada
-            if any(keyword in line.lower() for keyword in ["status:", "result:"]):
-                try:
-                    status = line.split(":")[1].strip()
-                    data["status"] = status
-                except:
-                    pass
-        
-        print(f"Hasil parsing: {data}")
-        return data
+    for source in (report, session):
+        nrp = source.get('nrp') or source.get('nim')
+        if nrp:
+            data["nrp"] = str(nrp)
+            break
+    
+    success_rate = _report_number(summary.get('success_rate'))
+    if success_rate is None and summary.get('success_rate') is not None:
+        print(f"success_rate tidak valid di {filename}: {summary.get('success_rate')!r}")
+    if success_rate is None:
+        total_tests = _report_number(summary.get('total_tests'))
+        passed = _report_number(summary.get('passed', 0))
+        if total_tests and passed is not None:
+            success_rate = passed / total_tests * 100
+    if success_rate is not None:
+        score = round(success_rate)
+        data["score"] = score
+        _derive_status(data, score)
+    
+    data["tests_passed"] = summary.get('passed')
+    data["tests_total"] = summary.get('total_tests')
+    data["test_results"] = [
+        {'test_name': result.get('test_name'), 'status': result.get('status')}
+        for result in report.get('test_results') or [] if isinstance(result, dict)
+    ]
+    
+    return data
+
+def process_result_content(content, filename, content_type=None):
+    """
+    Memproses file hasil penilaian sesuai jenisnya.
+    
+    JSON report dari tester PHP di-decode langsung; log teks biasa (atau JSON yang
+    tidak berformat report) diproses dengan process_log_content.
+    """
+    if is_json_report(content, filename, content_type):
+        try:
+            report = json.loads(content)
+        except ValueError as e:
+            print(f"File bukan JSON valid ({e}), memakai parser log")
+            report = None
         
-    except Exception as e:
-        print(f"Error saat memproses log: {e}")
-        return data
+        if isinstance(report, dict) and isinstance(report.get('summary'), dict):
+            print(f"Memproses JSON report dari file: {filename}")
+            data = process_json_report(report, filename)
+            _log_parse_result(data)
+            return data
+        if report is not None:
+            print("JSON tidak berformat report tester, memakai parser log")
+    
+    return process_log_content(content, filename)
+
+def build_sheet_row(data):
+    """Menyusun satu baris sheet dari data hasil parsing - sesuaikan urutan kolom dengan sheet Anda."""
+    timestamp = data.get('timestamp', datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    return [
+        timestamp,
+        data.get('nrp', 'N/A'),
+        data.get('score', 'N/A'),
+        data.get('status', 'N/A'),
+        data.get('filename', 'N/A')
+    ]
+
+def append_rows_to_sheet(service, sheet_id, rows):
+    """Menambahkan beberapa baris ke Google Sheet dalam satu panggilan API."""
+    body = {
+        'values': rows,
+        'majorDimension': 'ROWS'
+    }
+    
+    return service.spreadsheets().values().append(
+        spreadsheetId=sheet_id,
+        range='A:E',  # Sesuaikan dengan jumlah kolom
+        valueInputOption='USER_ENTERED',
+        insertDataOption='INSERT_ROWS',
+        body=body
+    ).execute()
 
 def update_google_sheet(service, sheet_id, data):
     """Menambahkan baris baru ke Google Sheet."""
     try:
-        # Siapkan data untuk sheet - sesuaikan urutan kolom dengan sheet Anda
-        timestamp = data.get('timestamp', datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-        values = [
-            [
-                timestamp,
-                data.get('nrp', 'N/A'),
-                data.get('score', 'N/A'),
-                data.get('status', 'N/A'),
-                data.get('filename', 'N/A')
-            ]
-        ]
-        
-        body = {
-            'values': values,
-            'majorDimension': 'ROWS'
-        }
-        
-        # Tambahkan ke sheet
-        result = service.spreadsheets().values().append(
-            spreadsheetId=sheet_id,
-            range='A:E',  # Sesuaikan dengan jumlah kolom
-            valueInputOption='USER_ENTERED',
-            insertDataOption='INSERT_ROWS',
-            body=body
-        ).execute()
+        result = append_rows_to_sheet(service, sheet_id, [build_sheet_row(data)])
         
         print(f"Data berhasil ditambahkan ke Google Sheet. Updated range: {result.get('updates', {}).get('updatedRange')}")
         return True
@@ -181,36 +732,99 @@ def update_google_sheet(service, sheet_id, data):
         print(f"Error saat update Google Sheet: {e}")
         return False
 
-def send_email_notification(sender_email, recipient_email, data, log_filename):
-    """Mengirim notifikasi email menggunakan Amazon SES."""
-    try:
-        nrp = data.get('nrp', 'N/A')
-        score = data.get('score', 'N/A')
-        status = data.get('status', 'N/A')
-        timestamp = data.get('timestamp', 'N/A')
+class SheetBatchWriter:
+    """
+    Mengumpulkan baris hasil penilaian dan mengirimnya ke Google Sheet dalam satu append.
+    
+    Buffer di-flush saat jumlah baris mencapai max_rows, saat baris tertua sudah
+    menunggu lebih dari max_wait detik, atau saat flush() dipanggil di akhir invocation.
+    Flush yang gagal dicoba ulang dengan exponential backoff.
+    """
+    
+    def __init__(self, service, sheet_id, max_rows=100, max_wait=5.0, max_retries=3, backoff_base=1.0):
+        self.service = service
+        self.sheet_id = sheet_id
+        self.max_rows = max_rows
+        self.max_wait = max_wait
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.api_calls = 0
+        self._buffer = []
+        self._oldest = None
+        self._status = {}
+        self._lock = threading.Lock()
+        # Status dibaca dengan lock terpisah agar succeeded() tidak menunggu flush yang melewati timeout
+        self._status_lock = threading.Lock()
+    
+    def add(self, key, data):
+        """Menambahkan baris ke buffer; key dipakai untuk menanyakan status lewat succeeded()."""
+        with self._lock:
+            self._buffer.append((key, build_sheet_row(data)))
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            
+            if len(self._buffer) >= self.max_rows or time.monotonic() - self._oldest >= self.max_wait:
+                self._flush_locked()
+    
+    def flush(self):
+        """Mengirim semua baris yang masih ada di buffer. Mengembalikan True jika berhasil."""
+        with self._lock:
+            return self._flush_locked()
+    
+    def succeeded(self, key):
+        """True/False jika baris untuk key sudah di-flush, None jika belum."""
+        with self._status_lock:
+            return self._status.get(key)
+    
+    def _flush_locked(self):
+        if not self._buffer:
+            return True
         
-        subject = f"Hasil Penilaian Otomatis - NRP: {nrp}"
+        batch, self._buffer, self._oldest = self._buffer, [], None
+        rows = [row for _, row in batch]
         
-        body_html = f"""
-        <html>
-        <head>
+        ok = False
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.api_calls += 1
+                with metric_stage('sheet'):
+                    result = append_rows_to_sheet(self.service, self.sheet_id, rows)
+                print(f"{len(rows)} baris ditambahkan ke Google Sheet. Updated range: {result.get('updates', {}).get('updatedRange')}")
+                ok = True
+                break
+            except Exception as e:
+                print(f"Error saat update Google Sheet (percobaan {attempt + 1}/{self.max_retries + 1}): {e}")
+                if attempt < self.max_retries:
+                    time.sleep(self.backoff_base * (2 ** attempt) + random.uniform(0, self.backoff_base))
+        
+        with self._status_lock:
+            for key, _ in batch:
+                self._status[key] = ok
+        return ok
+
+# Template email dikompilasi sekali per container; nilai disisipkan dengan string.Template
+EMAIL_STYLE = """
             <style>
-                body {{ font-family: Arial, sans-serif; margin: 20px; }}
-                .container {{ max-width: 600px; margin: 0 auto; }}
-                .header {{ background-color: #f8f9fa; padding: 20px; border-radius: 8px; }}
-                .content {{ padding: 20px; }}
-                .data-table {{ width: 100%; border-collapse: collapse; margin: 20px 0; }}
-                .data-table th, .data-table td {{ border: 1px solid #ddd; padding: 12px; text-align: left; }}
-                .data-table th {{ background-color: #f2f2f2; }}
-                .status-lulus {{ color: #28a745; font-weight: bold; }}
-                .status-tidak-lulus {{ color: #dc3545; font-weight: bold; }}
-            </style>
+                body { font-family: Arial, sans-serif; margin: 20px; }
+                .container { max-width: 600px; margin: 0 auto; }
+                .header { background-color: #f8f9fa; padding: 20px; border-radius: 8px; }
+                .content { padding: 20px; }
+                .data-table { width: 100%; border-collapse: collapse; margin: 20px 0; }
+                .data-table th, .data-table td { border: 1px solid #ddd; padding: 12px; text-align: left; }
+                .data-table th { background-color: #f2f2f2; }
+                .status-lulus { color: #28a745; font-weight: bold; }
+                .status-tidak-lulus { color: #dc3545; font-weight: bold; }
+            </style>"""
+
+RESULT_EMAIL_TEMPLATE = Template("""
+        <html>
+        <head>""" + EMAIL_STYLE + """
         </head>
         <body>
             <div class="container">
                 <div class="header">
                     <h1>🎓 Hasil Penilaian Otomatis</h1>
-                    <p>Penilaian untuk file: <strong>{log_filename}</strong></p>
+                    <p>Penilaian untuk file: <strong>$log_filename</strong></p>
                 </div>
                 
                 <div class="content">
@@ -222,19 +836,19 @@ def send_email_notification(sender_email, recipient_email, data, log_filename):
                         </tr>
                         <tr>
                             <td>NRP</td>
-                            <td>{nrp}</td>
+                            <td>$nrp</td>
                         </tr>
                         <tr>
                             <td>Skor</td>
-                            <td>{score}</td>
+                            <td>$score</td>
                         </tr>
                         <tr>
                             <td>Status</td>
-                            <td class="{'status-lulus' if 'lulus' in str(status).lower() else 'status-tidak-lulus'}">{status}</td>
+                            <td class="$status_class">$status</td>
                         </tr>
                         <tr>
                             <td>Waktu Proses</td>
-                            <td>{timestamp}</td>
+                            <td>$timestamp</td>
                         </tr>
                     </table>
                     <p><em>Email ini dikirim secara otomatis oleh sistem penilaian.</em></p>
@@ -242,16 +856,84 @@ def send_email_notification(sender_email, recipient_email, data, log_filename):
             </div>
         </body>
         </html>
-        """
+        """)
+
+DIGEST_EMAIL_TEMPLATE = Template("""
+        <html>
+        <head>""" + EMAIL_STYLE + """
+        </head>
+        <body>
+            <div class="container">
+                <div class="header">
+                    <h1>🎓 Ringkasan Hasil Penilaian Otomatis</h1>
+                    <p>Jumlah file dinilai: <strong>$count</strong></p>
+                </div>
+                
+                <div class="content">
+                    <table class="data-table">
+                        <tr>
+                            <th>File</th>
+                            <th>NRP</th>
+                            <th>Skor</th>
+                            <th>Status</th>
+                        </tr>$rows
+                    </table>
+                    <p><em>Email ini dikirim secara otomatis oleh sistem penilaian.</em></p>
+                </div>
+            </div>
+        </body>
+        </html>
+        """)
+
+DIGEST_ROW_TEMPLATE = Template("""
+                        <tr>
+                            <td>$log_filename</td>
+                            <td>$nrp</td>
+                            <td>$score</td>
+                            <td class="$status_class">$status</td>
+                        </tr>""")
+
+# Batas tujuan per panggilan SendBulkTemplatedEmail
+SES_BULK_MAX_DESTINATIONS = 50
+
+def _email_fields(data, log_filename):
+    """Nilai (sudah di-escape) untuk disisipkan ke template email."""
+    status = data.get('status', 'N/A')
+    passed = 'lulus' in str(status).lower() and 'tidak' not in str(status).lower()
+    return {
+        'log_filename': html.escape(str(log_filename)),
+        'nrp': html.escape(str(data.get('nrp', 'N/A'))),
+        'score': html.escape(str(data.get('score', 'N/A'))),
+        'status': html.escape(str(status)),
+        'status_class': 'status-lulus' if passed else 'status-tidak-lulus',
+        'timestamp': html.escape(str(data.get('timestamp', 'N/A')))
+    }
+
+def render_result_email(data, log_filename):
+    """Mengembalikan (subject, body_html) untuk satu hasil penilaian."""
+    subject = f"Hasil Penilaian Otomatis - NRP: {data.get('nrp', 'N/A')}"
+    return subject, RESULT_EMAIL_TEMPLATE.substitute(_email_fields(data, log_filename))
+
+def render_digest_email(items):
+    """Mengembalikan (subject, body_html) untuk ringkasan banyak hasil; items berisi (data, log_filename)."""
+    rows = ''.join(DIGEST_ROW_TEMPLATE.substitute(_email_fields(data, log_filename)) for data, log_filename in items)
+    subject = f"Ringkasan Hasil Penilaian Otomatis - {len(items)} file"
+    return subject, DIGEST_EMAIL_TEMPLATE.substitute(count=len(items), rows=rows)
+
+def send_email_notification(sender_email, recipient_email, data, log_filename):
+    """Mengirim notifikasi email menggunakan Amazon SES."""
+    try:
+        subject, body_html = render_result_email(data, log_filename)
         
-        ses_client.send_email(
-            Destination={'ToAddresses': [recipient_email]},
-            Message={
-                'Body': {'Html': {'Charset': 'UTF-8', 'Data': body_html}},
-                'Subject': {'Charset': 'UTF-8', 'Data': subject},
-            },
-            Source=sender_email
-        )
+        with metric_stage('email'):
+            get_aws_client('ses').send_email(
+                Destination={'ToAddresses': [recipient_email]},
+                Message={
+                    'Body': {'Html': {'Charset': 'UTF-8', 'Data': body_html}},
+                    'Subject': {'Charset': 'UTF-8', 'Data': subject},
+                },
+                Source=sender_email
+            )
         
         print(f"Email notifikasi berhasil dikirim ke {recipient_email}")
         return True
@@ -260,136 +942,1292 @@ def send_email_notification(sender_email, recipient_email, data, log_filename):
         print(f"Error mengirim email: {e}")
         return False
 
-def send_notification_with_attachment_via_sns(topic_arn, data, zip_file_path):
-    """Send via SNS dengan size checking"""
+def _ensure_digest_ses_template(template_name):
+    """Membuat template SES pass-through untuk digest jika belum ada (sekali per container)."""
+    if template_name in _ses_templates_ready:
+        return
+    try:
+        get_aws_client('ses').create_template(Template={
+            'TemplateName': template_name,
+            'SubjectPart': '{{subject}}',
+            'HtmlPart': '{{{body_html}}}'
+        })
+    except get_aws_client('ses').exceptions.AlreadyExistsException:
+        pass
+    _ses_templates_ready.add(template_name)
+
+def send_digest_emails(sender_email, digests):
+    """
+    Mengirim satu email ringkasan per penerima.
     
-    # Check file size
-    file_size = os.path.getsize(zip_file_path)
-    max_sns_size = 200 * 1024  # 200 KB (buffer untuk metadata)
+    digests: dict {recipient_email: [(data, log_filename), ...]}. Jika penerima lebih
+    dari satu, email dikirim lewat SendBulkTemplatedEmail (maks 50 tujuan per panggilan).
+    Mengembalikan dict {recipient_email: bool}.
+    """
+    rendered = {recipient: render_digest_email(items) for recipient, items in digests.items()}
+    status = {}
     
-    if file_size > max_sns_size:
-        raise ValueError(f"File too large ({file_size} bytes) for SNS. Maximum allowed: {max_sns_size} bytes")
+    if len(rendered) == 1:
+        recipient, (subject, body_html) = next(iter(rendered.items()))
+        try:
+            with metric_stage('email'):
+                get_aws_client('ses').send_email(
+                    Destination={'ToAddresses': [recipient]},
+                    Message={
+                        'Body': {'Html': {'Charset': 'UTF-8', 'Data': body_html}},
+                        'Subject': {'Charset': 'UTF-8', 'Data': subject},
+                    },
+                    Source=sender_email
+                )
+            print(f"Email ringkasan ({len(digests[recipient])} hasil) berhasil dikirim ke {recipient}")
+            status[recipient] = True
+        except Exception as e:
+            print(f"Error mengirim email ringkasan: {e}")
+            status[recipient] = False
+        return status
     
-    # Small file - send via SNS
-    with open(zip_file_path, 'rb') as f:
-        file_content_base64 = base64.b64encode(f.read()).decode('utf-8')
+    template_name = os.environ.get('SES_DIGEST_TEMPLATE', 'penilaian-digest')
+    recipients = list(rendered)
     
+    for start in range(0, len(recipients), SES_BULK_MAX_DESTINATIONS):
+        chunk = recipients[start:start + SES_BULK_MAX_DESTINATIONS]
+        try:
+            _ensure_digest_ses_template(template_name)
+            with metric_stage('email'):
+                response = get_aws_client('ses').send_bulk_templated_email(
+                    Source=sender_email,
+                    Template=template_name,
+                    DefaultTemplateData=json.dumps({'subject': '', 'body_html': ''}),
+                    Destinations=[
+                        {
+                            'Destination': {'ToAddresses': [recipient]},
+                            'ReplacementTemplateData': json.dumps({
+                                'subject': rendered[recipient][0],
+                                'body_html': rendered[recipient][1]
+                            })
+                        }
+                        for recipient in chunk
+                    ]
+                )
+            for recipient, item in zip(chunk, response['Status']):
+                status[recipient] = item.get('Status') == 'Success'
+            print(f"Email ringkasan bulk dikirim ke {len(chunk)} penerima")
+        except Exception as e:
+            print(f"Error mengirim email ringkasan bulk: {e}")
+            for recipient in chunk:
+                status[recipient] = False
+    
+    return status
+
+def _result_notification_request(topic_arn, data):
+    """Argumen SNS Publish untuk ringkasan hasil penilaian."""
     message = {
         'nrp': data.get('nrp'),
-        'score': data.get('score'), 
+        'score': data.get('score'),
         'status': data.get('status'),
-        'file_attachment': file_content_base64,
-        'file_name': os.path.basename(zip_file_path),
-        'file_size': file_size
+        'filename': data.get('filename')
     }
-    
+    return {
+        'TopicArn': topic_arn,
+        'Message': json.dumps(message),
+        'Subject': f"Hasil Penilaian - {data.get('nrp')}"
+    }
+
+def publish_result_notification(topic_arn, data):
+    """Mempublikasikan ringkasan hasil penilaian (tanpa lampiran) ke SNS."""
     try:
-        sns_client.publish(
-            TopicArn=topic_arn,
-            Message=json.dumps(message),
-            Subject=f"Hasil Penilaian - {data.get('nrp')}"
-        )
-        print("File sent via SNS successfully")
+        with metric_stage('sns'):
+            get_aws_client('sns').publish(**_result_notification_request(topic_arn, data))
+        print("Notifikasi SNS berhasil dikirim")
         return True
     except Exception as e:
         print(f"SNS failed: {e}")
         return False
 
-def lambda_handler(event, context):
-    """Fungsi utama yang dieksekusi oleh AWS Lambda."""
+def _sink_timeout(sink):
+    """Timeout (detik) untuk sink: env SINK_TIMEOUT_<NAMA>_SECONDS atau SINK_TIMEOUTS."""
+    return float(os.environ.get(f'SINK_TIMEOUT_{sink.upper()}_SECONDS', SINK_TIMEOUTS.get(sink, 30)))
+
+def _get_sink_executor():
+    """Executor sink, berukuran MAX_WORKERS x jumlah sink agar aksi tiap worker tidak mengantre."""
+    global _sink_executor
+    if _sink_executor is None:
+        with _sink_executor_lock:
+            if _sink_executor is None:
+                max_workers = max(1, int(os.environ.get('MAX_WORKERS', DEFAULT_MAX_WORKERS)))
+                _sink_executor = ThreadPoolExecutor(max_workers=max_workers * len(SINK_TIMEOUTS),
+                                                    thread_name_prefix='sink')
+    return _sink_executor
+
+class PendingAction:
+    """
+    Aksi sink yang sedang berjalan di executor sink. Timeout dihitung sejak aksi
+    mulai dijalankan, sehingga waktu mengantre di executor tidak dianggap timeout.
+    """
+    
+    def __init__(self, func, sink):
+        self.sink = sink
+        self.timeout = _sink_timeout(sink)
+        self._started = threading.Event()
+        self._started_at = None
+        self.future = _get_sink_executor().submit(self._run, func)
+    
+    def _run(self, func):
+        self._started_at = time.monotonic()
+        self._started.set()
+        return func()
+    
+    def result(self):
+        """Hasil aksi, atau False jika error atau melewati timeout."""
+        try:
+            self._started.wait()
+            remaining = max(0, self._started_at + self.timeout - time.monotonic())
+            return self.future.result(timeout=remaining)
+        except FuturesTimeoutError:
+            print(f"Aksi {self.sink} melewati timeout {self.timeout} detik")
+            return False
+        except Exception as e:
+            print(f"Error menjalankan aksi {self.sink}: {e}")
+            return False
+
+def start_actions(actions):
+    """
+    Memulai aksi pasca-parsing (SES, SNS) di executor sink tanpa menunggu hasilnya.
+    actions: dict {nama_hasil: (callable, nama_sink)}; hasil diambil dengan collect_actions.
+    """
+    return {name: PendingAction(func, sink) for name, (func, sink) in actions.items()}
+
+def collect_actions(pending):
+    """Menunggu aksi dari start_actions; mengembalikan dict {nama_hasil: hasil}."""
+    return {name: action.result() for name, action in pending.items()}
+
+def dispatch_actions(actions):
+    """
+    Menjalankan semua aksi pasca-parsing (SES, SNS) secara paralel dan menunggu hasilnya.
+    
+    actions: dict {nama_hasil: (callable, nama_sink)}. Setiap sink punya timeout
+    sendiri (SINK_TIMEOUTS atau env SINK_TIMEOUT_<NAMA>_SECONDS). Aksi yang error
+    atau melewati timeout dicatat sebagai False. Mengembalikan dict {nama_hasil: hasil}.
+    """
+    return collect_actions(start_actions(actions))
+
+def send_notification_with_attachment_via_sns(topic_arn, data, zip_file_path):
+    """Send via SNS dengan size checking"""
+    
+    # Check file size
+    file_size = os.path.getsize(zip_file_path)
+    max_sns_size = 200 * 1024  # 200 KB (buffer untuk metadata)
+    
+    if file_size > max_sns_size:
+        raise ValueError(f"File too large ({file_size} bytes) for SNS. Maximum allowed: {max_sns_size} bytes")
+    
+    # Small file - send via SNS
+    with open(zip_file_path, 'rb') as f:
+        file_content_base64 = base64.b64encode(f.read()).decode('utf-8')
+    
+    message = {
+        'nrp': data.get('nrp'),
+        'score': data.get('score'), 
+        'status': data.get('status'),
+        'delivery': 'inline',
+        'file_attachment': file_content_base64,
+        'file_name': os.path.basename(zip_file_path),
+        'file_size': file_size
+    }
+    
+    try:
+        get_aws_client('sns').publish(
+            TopicArn=topic_arn,
+            Message=json.dumps(message),
+            Subject=f"Hasil Penilaian - {data.get('nrp')}"
+        )
+        print("File sent via SNS successfully")
+        return True
+    except Exception as e:
+        print(f"SNS failed: {e}")
+        return False
+
+def _file_sha256(file_path, chunk_size=STREAM_CHUNK_SIZE):
+    """Checksum SHA-256 file, dibaca per chunk agar memori tetap kecil."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def upload_result_artifact(file_path, bucket, key):
+    """
+    Mengunggah file hasil ke S3 secara streaming (multipart untuk file besar).
+    
+    Ambang dan ukuran part multipart diatur lewat env ARTIFACT_MULTIPART_THRESHOLD_BYTES
+    dan ARTIFACT_MULTIPART_CHUNK_BYTES. Mengembalikan dict pointer artifact.
+    """
+    from boto3.s3.transfer import TransferConfig
+    
+    file_size = os.path.getsize(file_path)
+    checksum = _file_sha256(file_path)
+    transfer_config = TransferConfig(
+        multipart_threshold=int(os.environ.get('ARTIFACT_MULTIPART_THRESHOLD_BYTES', DEFAULT_ARTIFACT_MULTIPART_BYTES)),
+        multipart_chunksize=int(os.environ.get('ARTIFACT_MULTIPART_CHUNK_BYTES', DEFAULT_ARTIFACT_MULTIPART_BYTES)),
+        max_concurrency=4
+    )
+    
+    get_aws_client('s3').upload_file(
+        file_path, bucket, key,
+        ExtraArgs={'Metadata': {'sha256': checksum}},
+        Config=transfer_config
+    )
+    print(f"Artifact diunggah ke s3://{bucket}/{key} ({file_size} bytes)")
     
-    print("=== MULAI PROSES LAMBDA ===")
-    print(f"Event: {json.dumps(event, indent=2)}")
+    return {
+        'bucket': bucket,
+        'key': key,
+        'size': file_size,
+        'sha256': checksum,
+        'file_name': os.path.basename(file_path)
+    }
+
+def send_notification_with_claim_check_via_sns(topic_arn, data, file_path, bucket=None, presign_expires=None):
+    """
+    Claim-check: file diunggah ke S3 dan SNS hanya menerima pointer (bucket, key,
+    ukuran, checksum, opsional presigned URL), sehingga ukuran file tidak dibatasi
+    limit payload SNS dan tidak perlu dimuat ke memori.
+    """
+    if bucket is None:
+        bucket = os.environ.get('ARTIFACT_BUCKET') or os.environ.get('S3_BUCKET_NAME')
+    if not bucket:
+        raise ValueError("ARTIFACT_BUCKET atau S3_BUCKET_NAME belum diset untuk mode claim-check")
+    if presign_expires is None:
+        presign_expires = int(os.environ.get('ARTIFACT_PRESIGN_EXPIRES_SECONDS', 0))
+    
+    prefix = os.environ.get('ARTIFACT_PREFIX', 'artifacts/')
+    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    key = f"{prefix}{data.get('nrp', 'N/A')}/{timestamp}-{os.path.basename(file_path)}"
     
     try:
-        if 'Records' not in event or len(event['Records']) == 0:
-            raise ValueError("Event tidak mengandung Records S3")
+        artifact = upload_result_artifact(file_path, bucket, key)
+        if presign_expires > 0:
+            artifact['presigned_url'] = get_aws_client('s3').generate_presigned_url(
+                'get_object', Params={'Bucket': bucket, 'Key': key}, ExpiresIn=presign_expires
+            )
+            artifact['presigned_url_expires_in'] = presign_expires
         
-        s3_record = event['Records'][0]['s3']
-        s3_bucket = s3_record['bucket']['name']
-        s3_key = s3_record['object']['key']
-        
-        print(f"Mendeteksi file baru: s3://{s3_bucket}/{s3_key}")
+        message = {
+            'nrp': data.get('nrp'),
+            'score': data.get('score'),
+            'status': data.get('status'),
+            'delivery': 'claim_check',
+            'artifact': artifact
+        }
         
-        print("Mengambil secrets dari Secret Manager...")
-        secrets = get_all_secrets()
+        get_aws_client('sns').publish(
+            TopicArn=topic_arn,
+            Message=json.dumps(message),
+            Subject=f"Hasil Penilaian - {data.get('nrp')}"
+        )
+        print("Pointer artifact dikirim via SNS")
+        return True
+    except Exception as e:
+        print(f"SNS claim-check failed: {e}")
+        return False
+
+def send_result_artifact_via_sns(topic_arn, data, file_path, mode=None):
+    """
+    Mengirim file hasil lewat SNS sesuai SNS_DELIVERY_MODE:
+    inline (base64 di pesan), claim_check (pointer S3), atau auto (default) -
+    inline untuk file kecil (<= SNS_INLINE_MAX_BYTES), claim-check untuk sisanya.
+    """
+    if mode is None:
+        mode = os.environ.get('SNS_DELIVERY_MODE', 'auto').lower()
+    
+    if mode == 'auto':
+        inline_max = int(os.environ.get('SNS_INLINE_MAX_BYTES', DEFAULT_SNS_INLINE_MAX_BYTES))
+        mode = 'inline' if os.path.getsize(file_path) <= inline_max else 'claim_check'
+    
+    if mode == 'inline':
+        return send_notification_with_attachment_via_sns(topic_arn, data, file_path)
+    if mode == 'claim_check':
+        return send_notification_with_claim_check_via_sns(topic_arn, data, file_path)
+    raise ValueError(f"SNS_DELIVERY_MODE tidak dikenal: {mode}")
+
+class InMemoryIdempotencyStore:
+    """
+    Idempotency store LRU di memori.
+    
+    Cocok untuk testing; di Lambda hanya mendeteksi duplikat yang datang ke
+    container yang sama.
+    """
+    
+    def __init__(self, max_entries=10000, ttl=DEFAULT_IDEMPOTENCY_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def claim(self, key):
+        """Menandai key sebagai diproses. False jika key sudah pernah diklaim (duplikat)."""
+        now = time.time()
+        with self._lock:
+            expires_at = self._entries.get(key)
+            if expires_at is not None and expires_at > now:
+                self._entries.move_to_end(key)
+                return False
+            
+            self._entries[key] = now + self.ttl
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return True
+    
+    def release(self, key):
+        """Menghapus klaim agar key bisa diproses ulang (mis. setelah gagal)."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+class FileIdempotencyStore:
+    """
+    Idempotency store berbasis file marker di sebuah direktori (mis. mount EFS).
+    
+    Klaim memakai O_CREAT|O_EXCL sehingga atomik antar proses yang berbagi direktori.
+    """
+    
+    def __init__(self, directory, ttl=DEFAULT_IDEMPOTENCY_TTL):
+        self.directory = directory
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+    
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha256(key.encode('utf-8')).hexdigest())
+    
+    def claim(self, key):
+        path = self._path(key)
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) < self.ttl:
+                    return False
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            return self.claim(key)
         
-        sheets_service = get_google_services()
+        with os.fdopen(fd, 'w') as f:
+            f.write(key)
+        return True
+    
+    def release(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+class DynamoDBIdempotencyStore:
+    """
+    Idempotency store di tabel DynamoDB (partition key string 'pk', atribut TTL 'expires_at').
+    
+    Klaim memakai conditional put sehingga aman untuk banyak container sekaligus.
+    """
+    
+    def __init__(self, table_name, ttl=DEFAULT_IDEMPOTENCY_TTL, client=None):
+        self.table_name = table_name
+        self.ttl = ttl
+        self.client = client or get_aws_client('dynamodb')
+    
+    def claim(self, key):
+        now = int(time.time())
+        try:
+            self.client.put_item(
+                TableName=self.table_name,
+                Item={'pk': {'S': key}, 'expires_at': {'N': str(now + self.ttl)}},
+                ConditionExpression='attribute_not_exists(pk) OR expires_at < :now',
+                ExpressionAttributeValues={':now': {'N': str(now)}}
+            )
+            return True
+        except self.client.exceptions.ConditionalCheckFailedException:
+            return False
+    
+    def release(self, key):
+        self.client.delete_item(TableName=self.table_name, Key={'pk': {'S': key}})
+
+_idempotency_store = None
+_idempotency_lock = threading.Lock()
+
+def get_idempotency_store():
+    """
+    Mengembalikan idempotency store sesuai env IDEMPOTENCY_BACKEND.
+    
+    memory (default), file (IDEMPOTENCY_DIR), dynamodb (IDEMPOTENCY_TABLE), atau none.
+    """
+    global _idempotency_store
+    
+    with _idempotency_lock:
+        if _idempotency_store is None:
+            backend = os.environ.get('IDEMPOTENCY_BACKEND', 'memory').lower()
+            ttl = int(os.environ.get('IDEMPOTENCY_TTL_SECONDS', DEFAULT_IDEMPOTENCY_TTL))
+            
+            if backend == 'none':
+                return None
+            elif backend == 'file':
+                _idempotency_store = FileIdempotencyStore(os.environ.get('IDEMPOTENCY_DIR', '/tmp/idempotency'), ttl)
+            elif backend == 'dynamodb':
+                _idempotency_store = DynamoDBIdempotencyStore(os.environ['IDEMPOTENCY_TABLE'], ttl)
+            else:
+                _idempotency_store = InMemoryIdempotencyStore(ttl=ttl)
         
-        print("Membaca file dari S3...")
+        return _idempotency_store
+
+def idempotency_key(s3_record):
+    """Key idempotency dari record S3: bucket/key/versionId/eTag."""
+    s3_object = s3_record['object']
+    return '/'.join([
+        s3_record['bucket']['name'],
+        unquote_plus(s3_object['key']),
+        s3_object.get('versionId') or '-',
+        s3_object.get('eTag') or '-'
+    ])
+
+def process_s3_record(s3_record, config, sheet_writer, row_key=None, pending=None):
+    """
+    Memproses satu record S3: baca file, parsing, antrekan baris sheet dan kirim email.
+    
+    Baris sheet dicatat di sheet_writer dengan row_key (default idempotency_key record),
+    sehingga dua versi object yang sama dalam satu batch punya status sendiri-sendiri.
+    Jika pending (list) diberikan, aksi email/SNS tidak ditunggu: pasangan
+    (result, aksi) ditambahkan ke pending dan hasilnya diambil oleh pemanggil.
+    """
+    if row_key is None:
+        row_key = idempotency_key(s3_record)
+    s3_bucket = s3_record['bucket']['name']
+    s3_key = unquote_plus(s3_record['object']['key'])
+    
+    print(f"Mendeteksi file baru: s3://{s3_bucket}/{s3_key}")
+    
+    print("Membaca file dari S3...")
+    try:
+        with metric_stage('s3_read'):
+            response = get_aws_client('s3').get_object(Bucket=s3_bucket, Key=s3_key)
+        content_type = response.get('ContentType')
+        content_length = response.get('ContentLength', 0)
+    except Exception as e:
+        print(f"Error membaca file dari S3: {e}")
+        raise RuntimeError(f'Gagal membaca file S3: {str(e)}')
+    record_metric('BytesRead', content_length)
+    
+    stream_threshold = int(os.environ.get('STREAM_THRESHOLD_BYTES', DEFAULT_STREAM_THRESHOLD_BYTES))
+    json_expected = (content_type and 'json' in content_type.lower()) or s3_key.lower().endswith('.json')
+    
+    if content_length >= stream_threshold and not json_expected:
+        # File log besar: baca per chunk agar memori tetap kecil
+        print(f"Membaca file secara streaming. Ukuran: {content_length} bytes")
+        required_fields = [name for name in os.environ.get('STREAM_REQUIRED_FIELDS', '').split(',') if name]
+        body = response['Body']
+        try:
+            # Baca dan parsing berjalan bersamaan, dicatat sebagai tahap parse
+            with metric_stage('parse'):
+                processed_data = process_log_stream(
+                    body.iter_chunks(STREAM_CHUNK_SIZE), s3_key, required_fields
+                )
+        except UnicodeDecodeError as e:
+            raise RuntimeError(f'Gagal membaca file S3: {str(e)}')
+        finally:
+            body.close()
+    else:
         try:
-            response = s3_client.get_object(Bucket=s3_bucket, Key=s3_key)
-            log_content = response['Body'].read().decode('utf-8')
+            with metric_stage('s3_read'):
+                log_content = response['Body'].read().decode('utf-8')
             print(f"File berhasil dibaca. Ukuran: {len(log_content)} karakter")
         except Exception as e:
             print(f"Error membaca file dari S3: {e}")
-            return {
-                'statusCode': 500, 
-                'body': json.dumps({'error': f'Gagal membaca file S3: {str(e)}'})
-            }
+            raise RuntimeError(f'Gagal membaca file S3: {str(e)}')
         
-        # 5. Proses konten log
+        # Proses konten log
         print("Memproses konten log...")
-        processed_data = process_log_content(log_content, s3_key)
-        
-        # 6. Ambil konfigurasi dari secrets
-        sheet_id = secrets.get('google_sheet_id')
-        sender_email = secrets.get('sender_email')
-        recipient_email = secrets.get('recipient_email')
-        
-        # Validasi konfigurasi
-        missing_configs = []
-        if not sheet_id: missing_configs.append('google_sheet_id')
-        if not sender_email: missing_configs.append('sender_email')
-        if not recipient_email: missing_configs.append('recipient_email')
-        
-        if missing_configs:
-            raise ValueError(f"Konfigurasi tidak lengkap di Secret Manager: {', '.join(missing_configs)}")
-        
-        # 7. Jalankan semua aksi
-        print("Menjalankan aksi...")
-        
-        # Update Google Sheet
-        print("Updating Google Sheet...")
-        sheet_result = update_google_sheet(sheets_service, sheet_id, processed_data)
-        
-        # Send Email Notification
-        print("Sending email notification...")
-        email_result = send_email_notification(
-            sender_email, 
-            recipient_email, 
+        with metric_stage('parse'):
+            processed_data = process_result_content(log_content, s3_key, content_type)
+    
+    # Baris Google Sheet dikirim bersama-sama oleh SheetBatchWriter
+    sheet_writer.add(row_key, processed_data)
+    
+    # Jalankan semua aksi secara paralel
+    print("Menjalankan aksi...")
+    actions = {}
+    
+    # Pada mode digest, email dikirim sekali untuk seluruh batch oleh process_s3_records
+    if not is_digest_mode():
+        actions['email_sent'] = (lambda: send_email_notification(
+            config.sender_email, 
+            config.recipient_email, 
             processed_data, 
             os.path.basename(s3_key)
-        )
-        
-        # 8. Kumpulkan hasil
-        results = {
-            'file_processed': s3_key,
-            'data_extracted': processed_data,
-            'sheet_updated': sheet_result,
-            'email_sent': email_result,
-            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        ), 'email')
+    
+    topic_arn = os.environ.get('SNS_TOPIC_ARN')
+    if topic_arn:
+        actions['sns_published'] = (lambda: publish_result_notification(topic_arn, processed_data), 'sns')
+    
+    result = {
+        'file_processed': s3_key,
+        'data_extracted': processed_data,
+        'sheet_queued': True,
+        'sheet_updated': None,
+        'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
+    if pending is None:
+        result.update(dispatch_actions(actions))
+    else:
+        pending.append((result, start_actions(actions)))
+    return result
+
+def _duplicate_result(s3_record, key):
+    """Hasil untuk event yang sudah pernah diproses."""
+    return {
+        'file_processed': unquote_plus(s3_record['object']['key']),
+        'idempotency_key': key,
+        'duplicate': True,
+        'sheet_updated': False,
+        'email_sent': False,
+        'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
+
+def process_s3_record_once(s3_record, config, sheet_writer, store, pending=None):
+    """
+    Seperti process_s3_record, tetapi event yang sudah pernah diproses (retry S3 atau
+    notifikasi ganda) dilewati sebelum memanggil Google atau SES.
+    """
+    key = idempotency_key(s3_record)
+    
+    if store is not None and not store.claim(key):
+        print(f"Event duplikat dilewati: {key}")
+        return _duplicate_result(s3_record, key)
+    
+    try:
+        result = process_s3_record(s3_record, config, sheet_writer, row_key=key, pending=pending)
+    except Exception:
+        if store is not None:
+            store.release(key)
+        raise
+    
+    result['idempotency_key'] = key
+    return result
+
+def process_s3_records(records, config, sheet_writer, max_workers=None, store=None):
+    """
+    Memproses semua record S3 dalam satu event secara paralel.
+    
+    Aksi email/SNS tiap record tidak ditunggu oleh worker; flush Google Sheet
+    dijalankan sebagai aksi sink 'sheet' (dengan timeout sendiri) bersamaan dengan
+    aksi yang masih berjalan, lalu semuanya ditunggu. Baris yang flush-nya melewati
+    timeout dicatat sheet_updated False.
+    
+    Mengembalikan tuple (results, failures). failures mengikuti format
+    partial batch response: [{'itemIdentifier': ..., 'error': ...}]
+    """
+    if max_workers is None:
+        max_workers = int(os.environ.get('MAX_WORKERS', DEFAULT_MAX_WORKERS))
+    max_workers = max(1, min(max_workers, len(records)))
+    
+    results = []
+    failures = []
+    pending = []  # (result, aksi email/SNS yang masih berjalan)
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(process_s3_record_once, record['s3'], config, sheet_writer, store, pending): record
+            for record in records
         }
+        for future in as_completed(futures):
+            record = futures[future]
+            item_id = _record_identifier(record)
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"Error memproses {item_id}: {e}")
+                failures.append({'itemIdentifier': item_id, 'error': str(e),
+                                 'idempotency_key': _record_idempotency_key(record)})
+    
+    digest = None
+    if is_digest_mode():
+        digest = start_actions({'digest': (lambda: send_result_digest(config, results), 'email')})
+    
+    # Kirim sisa baris di buffer sementara email/SNS masih berjalan, lalu tunggu semuanya
+    print("Updating Google Sheet...")
+    sheet = start_actions({'sheet_flushed': (sheet_writer.flush, 'sheet')})
+    for result, actions in pending:
+        result.update(collect_actions(actions))
+    collect_actions(sheet)
+    if digest is not None:
+        collect_actions(digest)
+        for result in results:
+            if not result.get('duplicate'):
+                result.setdefault('email_sent', False)
+    
+    # Catat status sheet per file
+    for result in results:
+        if result.get('duplicate'):
+            continue
+        result['sheet_updated'] = bool(sheet_writer.succeeded(result['idempotency_key']))
+        if not result['sheet_updated'] and store:
+            # Baris tidak tersimpan, izinkan event yang sama diproses ulang
+            store.release(result['idempotency_key'])
+    
+    return results, failures
+
+def is_digest_mode():
+    """True jika env EMAIL_MODE=digest (satu email ringkasan per penerima per batch)."""
+    return os.environ.get('EMAIL_MODE', 'per_result').lower() == 'digest'
+
+def send_result_digest(config, results):
+    """Mengirim email ringkasan untuk semua hasil baru dalam batch dan mencatat email_sent per hasil."""
+    fresh = [result for result in results if not result.get('duplicate')]
+    if not fresh:
+        return
+    
+    print("Sending digest email notification...")
+    digests = {config.recipient_email: [
+        (result['data_extracted'], os.path.basename(result['file_processed'])) for result in fresh
+    ]}
+    status = send_digest_emails(config.sender_email, digests)
+    for result in fresh:
+        result['email_sent'] = status.get(config.recipient_email, False)
+
+def _record_identifier(record):
+    """Identifier unik untuk sebuah record S3 (bucket/key)."""
+    try:
+        s3_record = record['s3']
+        return f"{s3_record['bucket']['name']}/{unquote_plus(s3_record['object']['key'])}"
+    except (KeyError, TypeError):
+        return 'unknown'
+
+def _handler_response(results, failures, records, sqs_info=None):
+    """
+    Response handler dengan partial batch response (batchItemFailures); untuk event
+    SQS identifier-nya adalah messageId (lihat sqs_batch_item_failures).
+    """
+    if sqs_info is not None:
+        batch_item_failures = sqs_batch_item_failures(*sqs_info, results, failures)
+    else:
+        batch_item_failures = [{'itemIdentifier': f['itemIdentifier']} for f in failures]
+    
+    return {
+        'statusCode': 200 if not batch_item_failures else 500,
+        'batchItemFailures': batch_item_failures,
+        'body': json.dumps({
+            'message': f'Proses {len(results)}/{len(records)} file berhasil diselesaikan!',
+            'results': results,
+            'failures': failures,
+            'cache': dict(_cache_stats)
+        }, indent=2)
+    }
+
+def _handler_error_response(error_msg, event):
+    """
+    Response handler saat seluruh invocation gagal. Untuk event SQS semua pesan
+    dilaporkan gagal; tanpa batchItemFailures Lambda akan menghapus seluruh batch.
+    """
+    response = {
+        'statusCode': 500,
+        'body': json.dumps({
+            'error': error_msg,
+            'files': [_record_identifier(r) for r in event.get('Records', [])]
+        })
+    }
+    if is_sqs_event(event):
+        response['batchItemFailures'] = [{'itemIdentifier': r.get('messageId')} for r in event['Records']]
+    return response
+
+def _record_idempotency_key(record):
+    """idempotency_key untuk record event, None jika record tidak berbentuk notifikasi S3."""
+    try:
+        return idempotency_key(record['s3'])
+    except (KeyError, TypeError):
+        return None
+
+def is_sqs_event(event):
+    """True jika event berasal dari event source mapping SQS (notifikasi S3 dibungkus pesan SQS)."""
+    records = event.get('Records') or []
+    return bool(records) and all(record.get('eventSource') == 'aws:sqs' for record in records)
+
+def unwrap_sqs_records(sqs_records):
+    """
+    Membuka pesan SQS berisi notifikasi S3 (langsung, atau lewat SNS fan-out).
+    
+    Objek yang sama (idempotency_key sama) dalam satu batch hanya diproses sekali.
+    Mengembalikan tuple (s3_records, message_ids, invalid_message_ids) dengan
+    message_ids = {idempotency_key: [messageId, ...]}.
+    """
+    s3_records = []
+    message_ids = {}
+    invalid_message_ids = []
+    
+    for message in sqs_records:
+        message_id = message.get('messageId')
+        try:
+            body = json.loads(message['body'])
+            if body.get('Type') == 'Notification' and 'Message' in body:
+                body = json.loads(body['Message'])
+            if body.get('Event') == 's3:TestEvent':
+                print(f"Pesan SQS {message_id} adalah s3:TestEvent, dilewati")
+                continue
+            records = body['Records']
+            keys = [idempotency_key(record['s3']) for record in records]
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            print(f"Pesan SQS {message_id} tidak berisi notifikasi S3 yang valid: {e}")
+            invalid_message_ids.append(message_id)
+            continue
         
-        print(f"=== PROSES SELESAI ===")
+        for record, key in zip(records, keys):
+            if key not in message_ids:
+                message_ids[key] = []
+                s3_records.append(record)
+            if message_id not in message_ids[key]:
+                message_ids[key].append(message_id)
+    
+    print(f"Pesan SQS: {len(sqs_records)}, objek S3 unik: {len(s3_records)}, pesan tidak valid: {len(invalid_message_ids)}")
+    return s3_records, message_ids, invalid_message_ids
+
+def sqs_batch_item_failures(message_ids, invalid_message_ids, results, failures):
+    """
+    batchItemFailures berisi messageId SQS: pesan tidak valid, pesan yang record-nya
+    gagal, dan pesan yang barisnya tidak tersimpan di sheet (agar dicoba ulang).
+    """
+    failed = dict.fromkeys(invalid_message_ids)
+    
+    for failure in failures:
+        failed.update(dict.fromkeys(message_ids.get(failure.get('idempotency_key'), [])))
+    for result in results:
+        if not result.get('duplicate') and not result.get('sheet_updated'):
+            failed.update(dict.fromkeys(message_ids.get(result.get('idempotency_key'), [])))
+    
+    return [{'itemIdentifier': message_id} for message_id in failed]
+
+def _begin_invocation(event, title):
+    """Memulai metrik invocation dan log awal event; mengembalikan (metrics, cache_before)."""
+    global _current_metrics
+    
+    metrics = _current_metrics = InvocationMetrics()
+    print(f"=== MULAI PROSES {title} ===")
+    if log_enabled('DEBUG'):
+        print(f"Event: {json.dumps(event, indent=2)}")
+    return metrics, dict(_cache_stats)
+
+def _event_records(event, metrics):
+    """
+    Record S3 yang akan diproses beserta info SQS (None untuk notifikasi S3 langsung):
+    tuple (records, sqs_info) dengan sqs_info = (message_ids, invalid_message_ids).
+    """
+    if 'Records' not in event or len(event['Records']) == 0:
+        raise ValueError("Event tidak mengandung Records S3")
+    
+    if is_sqs_event(event):
+        metrics.increment('SqsMessages', len(event['Records']))
+        records, message_ids, invalid_message_ids = unwrap_sqs_records(event['Records'])
+        sqs_info = (message_ids, invalid_message_ids)
+    else:
+        records, sqs_info = event['Records'], None
+    
+    print(f"Jumlah record dalam event: {len(records)}")
+    metrics.increment('Records', len(records))
+    return records, sqs_info
+
+def _check_config(config):
+    """Menolak konfigurasi yang tidak lengkap."""
+    missing_configs = config.missing_fields()
+    if missing_configs:
+        # Secret mungkin baru diperbarui, paksa ambil ulang pada invocation berikutnya
+        invalidate_cache('secrets')
+        raise ValueError(f"Konfigurasi tidak lengkap di Secret Manager: {', '.join(missing_configs)}")
+
+def _records_response(metrics, results, failures, records, sqs_info, api_calls):
+    """Mencatat ringkasan dan metrik hasil batch, lalu membangun response handler."""
+    print("=== PROSES SELESAI ===")
+    duplicates = sum(1 for result in results if result.get('duplicate'))
+    print(f"Berhasil: {len(results)}, Gagal: {len(failures)}, Duplikat: {duplicates}, Sheets API calls: {api_calls}")
+    print(f"Cache: hits={_cache_stats['hits']}, misses={_cache_stats['misses']}")
+    if log_enabled('DEBUG'):
         print(f"Hasil: {json.dumps(results, indent=2)}")
+    
+    metrics.increment('RecordFailures', len(failures))
+    metrics.increment('Duplicates', duplicates)
+    metrics.increment('SheetApiCalls', api_calls)
+    
+    return _handler_response(results, failures, records, sqs_info)
+
+def _invocation_error_response(metrics, handler_name, error, event):
+    """Mencatat error yang menggagalkan seluruh invocation dan membangun response-nya."""
+    error_msg = f"Error dalam {handler_name}: {str(error)}"
+    print(error_msg)
+    metrics.increment('InvocationErrors')
+    return _handler_error_response(error_msg, event)
+
+def _end_invocation(metrics, cache_before, context, properties=None):
+    """Menutup invocation: metrik cache dan EMF dikirim, metrik aktif dilepas."""
+    global _current_metrics
+    
+    metrics.increment('CacheHits', _cache_stats['hits'] - cache_before['hits'])
+    metrics.increment('CacheMisses', _cache_stats['misses'] - cache_before['misses'])
+    emit_invocation_metrics(metrics, context, properties)
+    _current_metrics = None
+
+def lambda_handler(event, context):
+    """Fungsi utama yang dieksekusi oleh AWS Lambda."""
+    metrics, cache_before = _begin_invocation(event, 'LAMBDA')
+    
+    try:
+        records, sqs_info = _event_records(event, metrics)
         
-        return {
-            'statusCode': 200,
-            'body': json.dumps({
-                'message': f'Proses untuk file {s3_key} berhasil diselesaikan!',
-                'results': results
-            }, indent=2)
-        }
+        print("Mengambil secrets dari Secret Manager...")
+        with metric_stage('secrets'):
+            config = get_cached('secrets', get_all_secrets)
+        _check_config(config)
+        
+        with metric_stage('google_init'):
+            sheets_service = get_cached('sheets_service', lambda: get_google_services(config.google_creds))
+        
+        sheet_writer = SheetBatchWriter(
+            sheets_service,
+            config.google_sheet_id,
+            max_rows=int(os.environ.get('SHEET_BATCH_SIZE', 100)),
+            max_wait=float(os.environ.get('SHEET_BATCH_WAIT_SECONDS', 5))
+        )
+        results, failures = process_s3_records(records, config, sheet_writer, store=get_idempotency_store())
+        
+        return _records_response(metrics, results, failures, records, sqs_info, sheet_writer.api_calls)
         
     except Exception as e:
-        error_msg = f"Error dalam lambda_handler: {str(e)}"
-        print(error_msg)
+        return _invocation_error_response(metrics, 'lambda_handler', e, event)
+    
+    finally:
+        _end_invocation(metrics, cache_before, context)
+
+# ==== Varian async: lambda_handler_async ====
+# Semua I/O (S3, SES, SNS, Sheets REST) berjalan di satu event loop sehingga I/O
+# banyak record saling tumpang tindih. Membutuhkan aiobotocore dan aiohttp di layer;
+# keduanya dan asyncio di-import lazy agar cold start lambda_handler tidak ikut
+# membayarnya. Parsing dan format email memakai fungsi yang sama dengan lambda_handler.
+
+DEFAULT_ASYNC_MAX_CONCURRENCY = 32
+DEFAULT_SHEETS_ROOT_URL = 'https://sheets.googleapis.com/'
+
+# Event loop, klien aiobotocore dan session aiohttp dipakai ulang antar invocation
+_async_loop = None
+_async_clients = {}
+_async_http_session = None
+
+def _get_async_loop():
+    """Event loop milik container; dipakai ulang agar klien async tetap hidup saat warm start."""
+    global _async_loop
+    import asyncio
+    if _async_loop is None or _async_loop.is_closed():
+        _async_loop = asyncio.new_event_loop()
+    return _async_loop
+
+async def get_async_aws_client(service_name):
+    """Klien aiobotocore untuk service_name, dibuat sekali per container."""
+    client = _async_clients.get(service_name)
+    if client is not None:
+        return client
+    
+    from aiobotocore.config import AioConfig
+    from aiobotocore.session import get_session
+    
+    # Pool koneksi sebesar batas konkurensi agar request tidak antre di pool default (10)
+    max_concurrency = int(os.environ.get('ASYNC_MAX_CONCURRENCY', DEFAULT_ASYNC_MAX_CONCURRENCY))
+    kwargs = {'config': AioConfig(max_pool_connections=max_concurrency)}
+    if service_name == 'ses':
+        kwargs['region_name'] = os.environ.get('AWS_REGION', 'us-east-1')
+    client = await get_session().create_client(service_name, **kwargs).__aenter__()
+    
+    # Coroutine lain mungkin membuat klien yang sama selama await di atas
+    existing = _async_clients.setdefault(service_name, client)
+    if existing is not client:
+        await client.close()
+    return existing
+
+def _get_async_http_session():
+    """Session aiohttp untuk Google REST API (GOOGLE_HTTP_POOL_SIZE, GOOGLE_HTTP_TIMEOUT)."""
+    global _async_http_session
+    if _async_http_session is None or _async_http_session.closed:
+        import aiohttp
         
-        return {
-            'statusCode': 500,
-            'body': json.dumps({
-                'error': error_msg,
-                'file': s3_key if 's3_key' in locals() else 'unknown'
-            })
-        }
\ No newline at end of file
+        pool_size = int(os.environ.get('GOOGLE_HTTP_POOL_SIZE', DEFAULT_GOOGLE_HTTP_POOL_SIZE))
+        timeout = float(os.environ.get('GOOGLE_HTTP_TIMEOUT', DEFAULT_GOOGLE_HTTP_TIMEOUT))
+        _async_http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=max(pool_size, 0)),
+            timeout=aiohttp.ClientTimeout(total=timeout)
+        )
+    return _async_http_session
+
+def _fresh_google_token(credentials, rejected_token=None):
+    """
+    Mengembalikan access token yang masih berlaku, me-refresh jika perlu.
+    Blocking (refresh memakai httplib2), dipanggil lewat asyncio.to_thread.
+    """
+    import google_auth_httplib2
+    
+    timeout = float(os.environ.get('GOOGLE_HTTP_TIMEOUT', DEFAULT_GOOGLE_HTTP_TIMEOUT))
+    request = google_auth_httplib2.Request(google_auth_httplib2.make_pooled_http(timeout=timeout))
+    if rejected_token is not None:
+        google_auth_httplib2.refresh_rejected(credentials, request, rejected_token)
+    else:
+        skew = float(os.environ.get('GOOGLE_TOKEN_REFRESH_SKEW', google_auth_httplib2.DEFAULT_REFRESH_SKEW))
+        google_auth_httplib2.refresh_if_stale(credentials, request, skew)
+    return credentials.token
+
+async def append_rows_to_sheet_async(credentials, sheet_id, rows):
+    """
+    Versi async append_rows_to_sheet lewat Sheets REST API (values.append), melewati
+    rate limiter yang sama dengan service googleapiclient.
+    """
+    import asyncio
+    import google_rate_limit
+    
+    root_url = os.environ.get('GOOGLE_SHEETS_ROOT_URL', DEFAULT_SHEETS_ROOT_URL)
+    url = f"{root_url}v4/spreadsheets/{quote(sheet_id, safe='')}/values/{quote('A:E', safe='')}:append"
+    params = {'valueInputOption': 'USER_ENTERED', 'insertDataOption': 'INSERT_ROWS'}
+    body = {'values': rows, 'majorDimension': 'ROWS'}
+    session = _get_async_http_session()
+    
+    limiter = google_rate_limit.get_default_limiter()
+    project = getattr(credentials, 'project_id', None)
+    max_retries = google_rate_limit.max_retries_from_env()
+    
+    token = await asyncio.to_thread(_fresh_google_token, credentials)
+    refreshed = False
+    throttled = 0
+    while True:
+        if limiter is not None:
+            await asyncio.sleep(await asyncio.to_thread(limiter.reserve, 'sheets', project))
+        async with session.post(url, params=params, json=body,
+                                headers={'Authorization': f'Bearer {token}'}) as response:
+            if response.status == 401 and not refreshed:
+                # Token ditolak (mis. dicabut), refresh sekali lalu ulangi
+                token = await asyncio.to_thread(_fresh_google_token, credentials, token)
+                refreshed = True
+                continue
+            if (response.status in google_rate_limit.RETRY_STATUS_CODES and limiter is not None
+                    and throttled < max_retries):
+                # Kuota habis: jeda bucket bersama sesuai Retry-After lalu ulangi
+                wait = google_rate_limit.retry_after_seconds(
+                    response.headers, default=2 ** throttled + random.uniform(0, 1))
+                print(f"Google sheets {response.status}, menunggu {wait:.1f} detik "
+                      f"(percobaan {throttled + 1}/{max_retries})")
+                await asyncio.to_thread(limiter.pause, 'sheets', wait, project)
+                throttled += 1
+                continue
+            if response.status >= 400:
+                raise RuntimeError(f"Sheets API {response.status}: {(await response.text())[:500]}")
+            return await response.json()
+
+async def write_sheet_rows_async(credentials, sheet_id, keyed_rows, max_rows=100, max_retries=3, backoff_base=1.0):
+    """
+    Mengirim keyed_rows [(key, row), ...] per max_rows baris dengan exponential backoff
+    seperti SheetBatchWriter. Seluruh penulisan dibatasi timeout sink 'sheet'; baris
+    yang belum terkirim saat timeout dicatat gagal.
+    Mengembalikan tuple ({key: bool}, jumlah API call).
+    """
+    import asyncio
+    status = {}
+    api_calls = 0
+    timeout = _sink_timeout('sheet')
+    deadline = time.monotonic() + timeout
+    
+    for start in range(0, len(keyed_rows), max_rows):
+        batch = keyed_rows[start:start + max_rows]
+        rows = [row for _, row in batch]
+        
+        ok = False
+        for attempt in range(max_retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                print(f"Aksi sheet melewati timeout {timeout} detik")
+                break
+            try:
+                api_calls += 1
+                with metric_stage('sheet'):
+                    result = await asyncio.wait_for(append_rows_to_sheet_async(credentials, sheet_id, rows), remaining)
+                print(f"{len(rows)} baris ditambahkan ke Google Sheet. Updated range: {result.get('updates', {}).get('updatedRange')}")
+                ok = True
+                break
+            except asyncio.TimeoutError:
+                print(f"Aksi sheet melewati timeout {timeout} detik")
+                break
+            except Exception as e:
+                print(f"Error saat update Google Sheet (percobaan {attempt + 1}/{max_retries + 1}): {e}")
+                if attempt < max_retries:
+                    backoff = backoff_base * (2 ** attempt) + random.uniform(0, backoff_base)
+                    await asyncio.sleep(min(backoff, max(0, deadline - time.monotonic())))
+        
+        for key, _ in batch:
+            status[key] = ok
+    
+    return status, api_calls
+
+async def _send_html_email_async(sender_email, recipient_email, subject, body_html):
+    ses = await get_async_aws_client('ses')
+    with metric_stage('email'):
+        await ses.send_email(
+            Destination={'ToAddresses': [recipient_email]},
+            Message={
+                'Body': {'Html': {'Charset': 'UTF-8', 'Data': body_html}},
+                'Subject': {'Charset': 'UTF-8', 'Data': subject},
+            },
+            Source=sender_email
+        )
+
+async def send_email_notification_async(sender_email, recipient_email, data, log_filename):
+    """Versi async send_email_notification."""
+    try:
+        subject, body_html = render_result_email(data, log_filename)
+        await _send_html_email_async(sender_email, recipient_email, subject, body_html)
+        print(f"Email notifikasi berhasil dikirim ke {recipient_email}")
+        return True
+    except Exception as e:
+        print(f"Error mengirim email: {e}")
+        return False
+
+async def publish_result_notification_async(topic_arn, data):
+    """Versi async publish_result_notification."""
+    try:
+        sns = await get_async_aws_client('sns')
+        with metric_stage('sns'):
+            await sns.publish(**_result_notification_request(topic_arn, data))
+        print("Notifikasi SNS berhasil dikirim")
+        return True
+    except Exception as e:
+        print(f"SNS failed: {e}")
+        return False
+
+async def dispatch_actions_async(actions):
+    """Seperti dispatch_actions: actions {nama_hasil: (coroutine, nama_sink)}, dijalankan bersamaan."""
+    import asyncio
+    async def run(coroutine, sink):
+        try:
+            return await asyncio.wait_for(coroutine, _sink_timeout(sink))
+        except asyncio.TimeoutError:
+            print(f"Aksi {sink} melewati timeout {_sink_timeout(sink)} detik")
+            return False
+        except Exception as e:
+            print(f"Error menjalankan aksi {sink}: {e}")
+            return False
+    
+    names = list(actions)
+    outcomes = await asyncio.gather(*(run(*actions[name]) for name in names))
+    return dict(zip(names, outcomes))
+
+async def process_s3_record_async(s3_record, config, pending=None):
+    """
+    Versi async process_s3_record; baris sheet dikirim oleh process_s3_records_async.
+    Jika pending (list) diberikan, aksi email/SNS dijadwalkan sebagai task dan
+    pasangan (result, task) ditambahkan ke pending tanpa ditunggu.
+    """
+    import asyncio
+    s3_bucket = s3_record['bucket']['name']
+    s3_key = unquote_plus(s3_record['object']['key'])
+    
+    print(f"Mendeteksi file baru: s3://{s3_bucket}/{s3_key}")
+    
+    try:
+        s3 = await get_async_aws_client('s3')
+        with metric_stage('s3_read'):
+            response = await s3.get_object(Bucket=s3_bucket, Key=s3_key)
+        content_type = response.get('ContentType')
+        content_length = response.get('ContentLength', 0)
+    except Exception as e:
+        print(f"Error membaca file dari S3: {e}")
+        raise RuntimeError(f'Gagal membaca file S3: {str(e)}')
+    record_metric('BytesRead', content_length)
+    
+    stream_threshold = int(os.environ.get('STREAM_THRESHOLD_BYTES', DEFAULT_STREAM_THRESHOLD_BYTES))
+    json_expected = (content_type and 'json' in content_type.lower()) or s3_key.lower().endswith('.json')
+    
+    async with response['Body'] as body:
+        try:
+            if content_length >= stream_threshold and not json_expected:
+                print(f"Membaca file secara streaming. Ukuran: {content_length} bytes")
+                required_fields = [name for name in os.environ.get('STREAM_REQUIRED_FIELDS', '').split(',') if name]
+                with metric_stage('parse'):
+                    processed_data, stopped_early = await _default_log_parser.parse_stream_async(
+                        aiter_text_blocks(body.iter_chunks(STREAM_CHUNK_SIZE)), s3_key, required_fields
+                    )
+                if stopped_early:
+                    print("Semua field wajib ditemukan, pembacaan dihentikan lebih awal")
+                _log_parse_result(processed_data)
+            else:
+                with metric_stage('s3_read'):
+                    log_content = (await body.read()).decode('utf-8')
+                print(f"File berhasil dibaca. Ukuran: {len(log_content)} karakter")
+                
+                # Parsing CPU-bound dijalankan di thread agar event loop tetap melayani I/O lain
+                with metric_stage('parse'):
+                    processed_data = await asyncio.to_thread(process_result_content, log_content, s3_key, content_type)
+        except UnicodeDecodeError as e:
+            raise RuntimeError(f'Gagal membaca file S3: {str(e)}')
+    
+    actions = {}
+    if not is_digest_mode():
+        actions['email_sent'] = (send_email_notification_async(
+            config.sender_email,
+            config.recipient_email,
+            processed_data,
+            os.path.basename(s3_key)
+        ), 'email')
+    
+    topic_arn = os.environ.get('SNS_TOPIC_ARN')
+    if topic_arn:
+        actions['sns_published'] = (publish_result_notification_async(topic_arn, processed_data), 'sns')
+    
+    result = {
+        'file_processed': s3_key,
+        'data_extracted': processed_data,
+        'sheet_queued': True,
+        'sheet_updated': None,
+        'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
+    if pending is None:
+        result.update(await dispatch_actions_async(actions))
+    else:
+        pending.append((result, asyncio.ensure_future(dispatch_actions_async(actions))))
+    return result
+
+async def process_s3_record_once_async(s3_record, config, store, pending=None):
+    """Versi async process_s3_record_once."""
+    import asyncio
+    key = idempotency_key(s3_record)
+    
+    if store is not None and not await asyncio.to_thread(store.claim, key):
+        print(f"Event duplikat dilewati: {key}")
+        return _duplicate_result(s3_record, key)
+    
+    try:
+        result = await process_s3_record_async(s3_record, config, pending)
+    except Exception:
+        if store is not None:
+            await asyncio.to_thread(store.release, key)
+        raise
+    
+    result['idempotency_key'] = key
+    return result
+
+async def send_result_digest_async(config, results):
+    """Versi async send_result_digest (satu penerima dari konfigurasi)."""
+    import asyncio
+    fresh = [result for result in results if not result.get('duplicate')]
+    if not fresh:
+        return
+    
+    print("Sending digest email notification...")
+    subject, body_html = render_digest_email([
+        (result['data_extracted'], os.path.basename(result['file_processed'])) for result in fresh
+    ])
+    try:
+        await asyncio.wait_for(
+            _send_html_email_async(config.sender_email, config.recipient_email, subject, body_html),
+            _sink_timeout('email')
+        )
+        print(f"Email ringkasan ({len(fresh)} hasil) berhasil dikirim ke {config.recipient_email}")
+        sent = True
+    except Exception as e:
+        print(f"Error mengirim email ringkasan: {e}")
+        sent = False
+    
+    for result in fresh:
+        result['email_sent'] = sent
+
+async def process_s3_records_async(records, config, credentials, store=None):
+    """
+    Versi async process_s3_records: semua record diproses bersamaan (dibatasi
+    ASYNC_MAX_CONCURRENCY), lalu baris sheet dikirim dalam satu append bersamaan
+    dengan aksi email/SNS yang masih berjalan.
+    Mengembalikan tuple (results, failures, sheets_api_calls).
+    """
+    import asyncio
+    semaphore = asyncio.Semaphore(int(os.environ.get('ASYNC_MAX_CONCURRENCY', DEFAULT_ASYNC_MAX_CONCURRENCY)))
+    pending = []  # (result, task aksi email/SNS)
+    
+    async def run(record):
+        async with semaphore:
+            return await process_s3_record_once_async(record['s3'], config, store, pending)
+    
+    outcomes = await asyncio.gather(*(run(record) for record in records), return_exceptions=True)
+    
+    results = []
+    failures = []
+    for record, outcome in zip(records, outcomes):
+        if isinstance(outcome, BaseException):
+            item_id = _record_identifier(record)
+            print(f"Error memproses {item_id}: {outcome}")
+            failures.append({'itemIdentifier': item_id, 'error': str(outcome),
+                             'idempotency_key': _record_idempotency_key(record)})
+        else:
+            results.append(outcome)
+    
+    print("Updating Google Sheet...")
+    fresh = [result for result in results if not result.get('duplicate')]
+    sheet_write = write_sheet_rows_async(
+        credentials,
+        config.google_sheet_id,
+        [(result['idempotency_key'], build_sheet_row(result['data_extracted'])) for result in fresh],
+        max_rows=int(os.environ.get('SHEET_BATCH_SIZE', 100))
+    )
+    digest = [send_result_digest_async(config, results)] if is_digest_mode() else []
+    
+    # Append sheet, email/SNS yang masih berjalan, dan email digest ditunggu bersamaan
+    (status, api_calls), *outcomes = await asyncio.gather(
+        sheet_write, *(task for _, task in pending), *digest
+    )
+    for (result, _), action_results in zip(pending, outcomes):
+        result.update(action_results)
+    
+    for result in fresh:
+        result['sheet_updated'] = status.get(result['idempotency_key'], False)
+        if not result['sheet_updated'] and store:
+            # Baris tidak tersimpan, izinkan event yang sama diproses ulang
+            await asyncio.to_thread(store.release, result['idempotency_key'])
+    
+    return results, failures, api_calls
+
+async def handle_event_async(event, context):
+    """Isi lambda_handler_async; bentuk response sama dengan lambda_handler."""
+    import asyncio
+    
+    metrics, cache_before = _begin_invocation(event, 'LAMBDA (ASYNC)')
+    
+    try:
+        records, sqs_info = _event_records(event, metrics)
+        
+        # Secrets hanya diambil saat cache kosong; cukup dijalankan di thread
+        print("Mengambil secrets dari Secret Manager...")
+        with metric_stage('secrets'):
+            config = await asyncio.to_thread(get_cached, 'secrets', get_all_secrets)
+        _check_config(config)
+        
+        with metric_stage('google_init'):
+            credentials = get_cached('google_credentials', lambda: load_google_credentials(config.google_creds))
+        
+        results, failures, api_calls = await process_s3_records_async(
+            records, config, credentials, store=get_idempotency_store()
+        )
+        
+        return _records_response(metrics, results, failures, records, sqs_info, api_calls)
+        
+    except Exception as e:
+        return _invocation_error_response(metrics, 'lambda_handler_async', e, event)
+    
+    finally:
+        _end_invocation(metrics, cache_before, context, {'Handler': 'async'})
+
+async def close_async_resources():
+    """Menutup klien aiobotocore dan session aiohttp (untuk skrip lokal/benchmark)."""
+    global _async_http_session
+    clients = list(_async_clients.values())
+    _async_clients.clear()
+    for client in clients:
+        await client.close()
+    if _async_http_session is not None:
+        await _async_http_session.close()
+        _async_http_session = None
+
+def lambda_handler_async(event, context):
+    """Entry point Lambda varian async (handler: lambda_function.lambda_handler_async)."""
+    return _get_async_loop().run_until_complete(handle_event_async(event, context))
@@ -16,9 +16,15 @@
 
 from __future__ import absolute_import
 
+import contextlib
+import datetime
 import http.client
 import logging
+import queue
+import threading
+import weakref
 
+from google.auth import _helpers
 from google.auth import exceptions
 from google.auth import transport
 import httplib2
@@ -27,6 +33,10 @@ import httplib2
 _LOGGER = logging.getLogger(__name__)
 # Properties present in file-like streams / buffers.
 _STREAM_PROPERTIES = ("read", "seek", "tell")
+# Default maximum number of pooled httplib2.Http instances.
+DEFAULT_POOL_SIZE = 10
+# Default number of seconds before expiry at which credentials are refreshed.
+DEFAULT_REFRESH_SKEW = 300
 
 
 class _Response(transport.Response):
@@ -96,9 +106,9 @@ class Request(transport.Request):
                 to 'GET'.
             body (bytes): The payload / body in HTTP request.
             headers (Mapping[str, str]): Request headers.
-            timeout (Optional[int]): The number of seconds to wait for a
-                response from the server. This is ignored by httplib2 and will
-                issue a warning.
+            timeout (Optional[float]): The number of seconds to wait for a
+                response from the server. It is applied to the socket of the
+                connection used for this request only.
             kwargs: Additional arguments passed throught to the underlying
                 :meth:`httplib2.Http.request` method.
 
@@ -108,17 +118,12 @@ class Request(transport.Request):
         Raises:
             google.auth.exceptions.TransportError: If any exception occurred.
         """
-        if timeout is not None:
-            _LOGGER.warning(
-                "httplib2 transport does not support per-request timeout. "
-                "Set the timeout when constructing the httplib2.Http instance."
-            )
-
         try:
             _LOGGER.debug("Making request: %s %s", method, url)
-            response, data = self.http.request(
-                url, method=method, body=body, headers=headers, **kwargs
-            )
+            with _request_timeout(self.http, timeout):
+                response, data = self.http.request(
+                    url, method=method, body=body, headers=headers, **kwargs
+                )
             return _Response(response, data)
         # httplib2 should catch the lower http error, this is a bug and
         # needs to be fixed there.  Catch the error for the meanwhile.
@@ -126,11 +131,298 @@ class Request(transport.Request):
             raise exceptions.TransportError(exc)
 
 
+@contextlib.contextmanager
+def _request_timeout(http, timeout):
+    """Temporarily applies ``timeout`` to an httplib2.Http instance.
+
+    httplib2 only reads :attr:`httplib2.Http.timeout` when it opens a new
+    connection, so the timeout is also applied to the sockets of connections
+    that are already cached (kept alive) by ``http``.
+
+    Args:
+        http (Union[httplib2.Http, PooledHttp]): The HTTP object.
+        timeout (Optional[float]): The timeout in seconds. ``None`` leaves the
+            HTTP object untouched.
+    """
+    if timeout is None:
+        yield
+        return
+
+    if isinstance(http, PooledHttp):
+        # The pool applies the timeout to the instance it checks out.
+        with http.timeout_override(timeout):
+            yield
+        return
+
+    previous = http.timeout
+    http.timeout = timeout
+    _set_connection_timeouts(http, timeout)
+    try:
+        yield
+    finally:
+        http.timeout = previous
+        _set_connection_timeouts(http, previous)
+
+
+def _set_connection_timeouts(http, timeout):
+    """Sets ``timeout`` on every cached connection of an httplib2.Http."""
+    for conn in list(http.connections.values()):
+        conn.timeout = timeout
+        sock = getattr(conn, "sock", None)
+        if sock is not None:
+            sock.settimeout(timeout)
+
+
+class HttpPool(object):
+    """A thread-safe pool of keep-alive :class:`httplib2.Http` instances.
+
+    :class:`httplib2.Http` is not thread-safe, but each instance keeps its
+    connections (and their TLS sessions) open between requests. The pool hands
+    out one instance per in-flight request so concurrent callers reuse open
+    connections instead of re-handshaking.
+
+    Args:
+        size (int): The maximum number of :class:`httplib2.Http` instances.
+        timeout (Optional[float]): The default socket timeout in seconds.
+        http_kwargs: Additional arguments passed to :class:`httplib2.Http`.
+    """
+
+    def __init__(self, size=DEFAULT_POOL_SIZE, timeout=None, **http_kwargs):
+        self.size = size
+        self.timeout = timeout
+        self._http_kwargs = http_kwargs
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._certificates = []
+
+    def _new_http(self):
+        return httplib2.Http(timeout=self.timeout, **self._http_kwargs)
+
+    def add_certificate(self, key, cert, domain, password=None):
+        """Adds a client certificate to every :class:`httplib2.Http` in the pool.
+
+        The certificate is applied to idle and checked-out instances the next
+        time they are checked out, and to instances created later. Pools from
+        :func:`make_pooled_http` are shared, so this affects every user of the
+        pool.
+
+        Args:
+            key (str): Path to the private key file.
+            cert (str): Path to the certificate file.
+            domain (str): The domain the certificate is used for.
+            password (Optional[str]): Password for the private key.
+        """
+        with self._lock:
+            self._certificates.append((key, cert, domain, password))
+
+    def _apply_certificates(self, http):
+        with self._lock:
+            applied = getattr(http, "_pool_certificates", 0)
+            pending = self._certificates[applied:]
+            http._pool_certificates = len(self._certificates)
+        for key, cert, domain, password in pending:
+            http.add_certificate(key, cert, domain, password=password)
+
+    @contextlib.contextmanager
+    def connection(self, timeout=None):
+        """Checks out an :class:`httplib2.Http` for exclusive use.
+
+        Args:
+            timeout (Optional[float]): Timeout applied for the duration of the
+                checkout, or ``None`` to use the pool default.
+
+        Yields:
+            httplib2.Http: The checked-out instance.
+        """
+        http = None
+        try:
+            http = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                if self._created < self.size:
+                    self._created += 1
+                    http = self._new_http()
+        if http is None:
+            http = self._idle.get()
+        self._apply_certificates(http)
+
+        try:
+            with _request_timeout(http, timeout):
+                yield http
+        except BaseException:
+            # Connection state is unknown after an error; drop cached sockets.
+            http.close()
+            raise
+        finally:
+            self._idle.put(http)
+
+    def close(self):
+        """Closes all idle connections in the pool."""
+        while True:
+            try:
+                http = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            http.close()
+            with self._lock:
+                self._created -= 1
+
+
+class PooledHttp(object):
+    """An httplib2.Http-compatible object backed by a :class:`HttpPool`.
+
+    It can be passed as the ``http`` argument of :class:`AuthorizedHttp` or
+    :class:`Request`, and is safe to share between threads.
+
+    Args:
+        pool (HttpPool): The pool to check connections out of.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.follow_redirects = True
+        self.redirect_codes = httplib2.REDIRECT_CODES
+        self._local = threading.local()
+
+    @contextlib.contextmanager
+    def timeout_override(self, timeout):
+        """Overrides the timeout for requests made by the current thread."""
+        previous = getattr(self._local, "timeout", None)
+        self._local.timeout = timeout
+        try:
+            yield
+        finally:
+            self._local.timeout = previous
+
+    def request(self, uri, method="GET", body=None, headers=None, **kwargs):
+        """Implementation of httplib2's Http.request."""
+        timeout = getattr(self._local, "timeout", None)
+        with self.pool.connection(timeout=timeout) as http:
+            http.follow_redirects = self.follow_redirects
+            http.redirect_codes = self.redirect_codes
+            return http.request(uri, method, body=body, headers=headers, **kwargs)
+
+    def add_certificate(self, key, cert, domain, password=None):
+        """Proxy to :meth:`HttpPool.add_certificate`."""
+        self.pool.add_certificate(key, cert, domain, password=password)
+
+    def close(self):
+        """Closes the idle connections of the underlying pool."""
+        self.pool.close()
+
+    @property
+    def connections(self):
+        """dict: Not tracked per pooled object; always empty."""
+        return {}
+
+    @connections.setter
+    def connections(self, value):
+        pass
+
+    @property
+    def timeout(self):
+        """Optional[float]: The pool's default timeout."""
+        return self.pool.timeout
+
+    @timeout.setter
+    def timeout(self, value):
+        self.pool.timeout = value
+
+
+_shared_pools = {}
+_shared_pools_lock = threading.Lock()
+
+
+def make_pooled_http(pool_size=DEFAULT_POOL_SIZE, timeout=None, **http_kwargs):
+    """Returns a :class:`PooledHttp` backed by a process-wide shared pool.
+
+    Pools are shared per configuration, so every :class:`AuthorizedHttp`
+    created in the same process (for example across AWS Lambda invocations
+    in a warm container) reuses the same keep-alive connections.
+
+    Args:
+        pool_size (int): The maximum number of concurrent connections per host.
+        timeout (Optional[float]): The default socket timeout in seconds.
+        http_kwargs: Additional arguments passed to :class:`httplib2.Http`.
+
+    Returns:
+        PooledHttp: The pooled HTTP object.
+    """
+    key = (pool_size, timeout, tuple(sorted(http_kwargs.items())))
+    with _shared_pools_lock:
+        pool = _shared_pools.get(key)
+        if pool is None:
+            pool = HttpPool(size=pool_size, timeout=timeout, **http_kwargs)
+            _shared_pools[key] = pool
+    return PooledHttp(pool)
+
+
 def _make_default_http():
     """Returns a default httplib2.Http instance."""
     return httplib2.Http()
 
 
+_refresh_locks = weakref.WeakKeyDictionary()
+_refresh_locks_by_id = {}
+_refresh_locks_lock = threading.Lock()
+
+
+def _refresh_lock_for(credentials):
+    """Returns the lock shared by every caller refreshing ``credentials``."""
+    with _refresh_locks_lock:
+        try:
+            lock = _refresh_locks.get(credentials)
+            if lock is None:
+                lock = _refresh_locks[credentials] = threading.Lock()
+        except TypeError:
+            # Credentials that cannot be weakly referenced.
+            lock = _refresh_locks_by_id.setdefault(id(credentials), threading.Lock())
+        return lock
+
+
+def _needs_refresh(credentials, skew):
+    """Whether ``credentials`` are invalid or expire within ``skew`` seconds."""
+    if not credentials.valid:
+        return True
+    expiry = getattr(credentials, "expiry", None)
+    if expiry is None:
+        return False
+    return expiry - datetime.timedelta(seconds=skew) <= _helpers.utcnow()
+
+
+def refresh_if_stale(credentials, request, skew=DEFAULT_REFRESH_SKEW):
+    """Refreshes ``credentials`` if they expire within ``skew`` seconds.
+
+    Concurrent callers sharing the same credentials wait for a single
+    refresh instead of each refreshing.
+
+    Args:
+        credentials (google.auth.credentials.Credentials): The credentials.
+        request (google.auth.transport.Request): Transport used to refresh.
+        skew (float): Seconds before expiry at which to refresh.
+    """
+    with _refresh_lock_for(credentials):
+        if _needs_refresh(credentials, skew):
+            _LOGGER.debug("Refreshing credentials before expiry.")
+            credentials.refresh(request)
+
+
+def refresh_rejected(credentials, request, rejected_token):
+    """Refreshes ``credentials`` after a request was rejected.
+
+    Args:
+        credentials (google.auth.credentials.Credentials): The credentials.
+        request (google.auth.transport.Request): Transport used to refresh.
+        rejected_token (Optional[str]): The token the request was sent
+            with. If another caller already replaced it, the new token is
+            used without refreshing again.
+    """
+    with _refresh_lock_for(credentials):
+        if getattr(credentials, "token", None) == rejected_token:
+            credentials.refresh(request)
+
+
 class AuthorizedHttp(object):
     """A httplib2 HTTP class with credentials.
 
@@ -158,19 +450,26 @@ class AuthorizedHttp(object):
         http=None,
         refresh_status_codes=transport.DEFAULT_REFRESH_STATUS_CODES,
         max_refresh_attempts=transport.DEFAULT_MAX_REFRESH_ATTEMPTS,
+        refresh_skew=DEFAULT_REFRESH_SKEW,
     ):
         """
         Args:
             credentials (google.auth.credentials.Credentials): The credentials
                 to add to the request.
-            http (httplib2.Http): The underlying HTTP object to
-                use to make requests. If not specified, a
-                :class:`httplib2.Http` instance will be constructed.
+            http (Union[httplib2.Http, PooledHttp]): The underlying HTTP
+                object to use to make requests. If not specified, a
+                :class:`httplib2.Http` instance will be constructed. Use
+                :func:`make_pooled_http` to share keep-alive connections
+                between threads and instances.
             refresh_status_codes (Sequence[int]): Which HTTP status codes
                 indicate that credentials should be refreshed and the request
                 should be retried.
             max_refresh_attempts (int): The maximum number of times to attempt
                 to refresh the credentials and retry the request.
+            refresh_skew (float): Credentials are refreshed before a request
+                when they expire within this many seconds, so no request is
+                sent with a token that is known to be stale. Concurrent
+                callers sharing the same credentials perform a single refresh.
         """
 
         if http is None:
@@ -180,10 +479,29 @@ class AuthorizedHttp(object):
         self.credentials = credentials
         self._refresh_status_codes = refresh_status_codes
         self._max_refresh_attempts = max_refresh_attempts
+        self._refresh_skew = refresh_skew
         # Request instance used by internal methods (for example,
         # credentials.refresh).
         self._request = Request(self.http)
 
+    def _refresh_if_stale(self):
+        """Refreshes the credentials if they expire within the refresh skew.
+
+        Concurrent callers sharing the same credentials wait for a single
+        refresh instead of each refreshing.
+        """
+        refresh_if_stale(self.credentials, self._request, self._refresh_skew)
+
+    def _refresh_rejected(self, rejected_token):
+        """Refreshes the credentials after a request was rejected.
+
+        Args:
+            rejected_token (Optional[str]): The token the request was sent
+                with. If another caller already replaced it, the new token is
+                used without refreshing again.
+        """
+        refresh_rejected(self.credentials, self._request, rejected_token)
+
     def close(self):
         """Calls httplib2's Http.close"""
         self.http.close()
@@ -198,14 +516,23 @@ class AuthorizedHttp(object):
         connection_type=None,
         **kwargs
     ):
-        """Implementation of httplib2's Http.request."""
+        """Implementation of httplib2's Http.request.
+
+        In addition to the httplib2 arguments, an optional ``timeout`` (in
+        seconds) keyword argument is applied to this request only.
+        """
 
         _credential_refresh_attempt = kwargs.pop("_credential_refresh_attempt", 0)
+        timeout = kwargs.pop("timeout", None)
 
         # Make a copy of the headers. They will be modified by the credentials
         # and we want to pass the original headers if we recurse.
         request_headers = headers.copy() if headers is not None else {}
 
+        if _needs_refresh(self.credentials, self._refresh_skew):
+            self._refresh_if_stale()
+
+        token = getattr(self.credentials, "token", None)
         self.credentials.before_request(self._request, method, uri, request_headers)
 
         # Check if the body is a file-like stream, and if so, save the body
@@ -215,15 +542,16 @@ class AuthorizedHttp(object):
             body_stream_position = body.tell()
 
         # Make the request.
-        response, content = self.http.request(
-            uri,
-            method,
-            body=body,
-            headers=request_headers,
-            redirections=redirections,
-            connection_type=connection_type,
-            **kwargs
-        )
+        with _request_timeout(self.http, timeout):
+            response, content = self.http.request(
+                uri,
+                method,
+                body=body,
+                headers=request_headers,
+                redirections=redirections,
+                connection_type=connection_type,
+                **kwargs
+            )
 
         # If the response indicated that the credentials needed to be
         # refreshed, then refresh the credentials and re-attempt the
@@ -242,7 +570,7 @@ class AuthorizedHttp(object):
                 self._max_refresh_attempts,
             )
 
-            self.credentials.refresh(self._request)
+            self._refresh_rejected(token)
 
             # Restore the body's stream position if needed.
             if body_stream_position is not None:
@@ -256,6 +584,7 @@ class AuthorizedHttp(object):
                 headers=headers,
                 redirections=redirections,
                 connection_type=connection_type,
+                timeout=timeout,
                 _credential_refresh_attempt=_credential_refresh_attempt + 1,
                 **kwargs
             )
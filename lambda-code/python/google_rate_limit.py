@@ -0,0 +1,353 @@
+"""
+Rate limiter token bucket untuk semua panggilan Google API (Sheets, Drive).
+
+Setiap request menunggu token dari bucket milik (project, API) sebelum dikirim,
+sehingga throughput bertahan di bawah kuota alih-alih naik-turun karena 429.
+Respons 429 (dan 503 dengan Retry-After) mengosongkan bucket tersebut dan menunda
+pengisiannya selama Retry-After untuk semua pemakai, lalu request dicoba ulang;
+setelah jeda request kembali keluar satu per satu dengan jarak 1/rate.
+
+Bucket disimpan di memori proses (default) atau di Redis agar semua container
+Lambda dan script berbagi satu anggaran. Konfigurasi lewat environment:
+
+    GOOGLE_RATE_LIMITS            "sheets=1/5,drive=10/20,proj-a:sheets=5/10"
+                                  (request per detik / burst, opsional per project;
+                                  "off" untuk mematikan)
+    GOOGLE_RATE_LIMIT_REDIS_URL   mis. redis://10.0.1.20:6379/0 (opsional)
+    GOOGLE_RATE_LIMIT_MAX_RETRIES jumlah retry untuk respons 429/503 (default 5)
+
+Dipakai oleh lambda_function.py dan script di folder credentials.
+"""
+import email.utils
+import os
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+# Default konservatif: kuota Sheets 60 request/menit per user (service account)
+DEFAULT_RATE_LIMITS = {
+    (None, 'sheets'): (1.0, 5),
+    (None, 'drive'): (10.0, 20),
+}
+DEFAULT_MAX_RETRIES = 5
+BACKEND_RETRY_SECONDS = 30  # jeda sebelum backend bersama dicoba lagi setelah error
+RETRY_STATUS_CODES = (429, 503)
+REDIS_KEY_PREFIX = 'google-rate-limit'
+
+# Host/path -> nama API; endpoint lain (mis. token OAuth) tidak dibatasi
+_API_HOSTS = {
+    'sheets.googleapis.com': 'sheets',
+    'drive.googleapis.com': 'drive',
+}
+_API_PATH_PREFIXES = (
+    ('/drive/', 'drive'),
+    ('/upload/drive/', 'drive'),
+    ('/batch/drive/', 'drive'),
+    ('/v4/spreadsheets', 'sheets'),
+)
+
+
+def parse_rate_limits(spec):
+    """
+    "sheets=1/5,drive=10,proj-a:sheets=5/10" -> {(project, api): (rate, burst)}.
+    Burst default sama dengan rate (minimal 1).
+    """
+    limits = {}
+    for item in (spec or '').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        target, _, value = item.partition('=')
+        project, _, api = target.rpartition(':')
+        rate_text, _, burst_text = value.partition('/')
+        rate = float(rate_text)
+        burst = float(burst_text) if burst_text else max(rate, 1.0)
+        if rate <= 0 or burst <= 0:
+            raise ValueError(f"Rate limit tidak valid: {item}")
+        limits[(project or None, api.strip().lower())] = (rate, burst)
+    return limits
+
+
+def api_for_uri(uri):
+    """Nama API Google untuk sebuah URI request, atau None jika tidak dibatasi."""
+    parsed = urlparse(uri)
+    api = _API_HOSTS.get(parsed.hostname or '')
+    if api:
+        return api
+    for prefix, name in _API_PATH_PREFIXES:
+        if parsed.path.startswith(prefix):
+            return name
+    return None
+
+
+def retry_after_seconds(headers, default=None):
+    """Nilai header Retry-After (detik atau HTTP-date) dalam detik, atau default."""
+    value = None
+    for name in ('retry-after', 'Retry-After'):
+        if headers and name in headers:
+            value = headers[name]
+            break
+    if value is None:
+        return default
+
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
+class LocalTokenBucketBackend:
+    """Bucket di memori proses; aman dipakai banyak thread."""
+
+    def __init__(self):
+        self._buckets = {}  # key -> (tokens, waktu pengisian terakhir; di masa depan saat dijeda)
+        self._lock = threading.Lock()
+
+    def reserve(self, key, rate, burst, cost=1):
+        """Mengambil cost token (boleh berutang); mengembalikan detik yang harus ditunggu."""
+        with self._lock:
+            now = time.monotonic()
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate) - cost
+            self._buckets[key] = (tokens, now)
+            return -tokens / rate if tokens < 0 else 0.0
+
+    def pause(self, key, seconds, rate):
+        """
+        Mengosongkan bucket key dan menunda pengisiannya sampai seconds detik dari
+        sekarang (atau sampai utang token yang sudah dipesan lunas, jika lebih lama).
+        """
+        with self._lock:
+            now = time.monotonic()
+            resume_at = now + seconds
+            tokens, updated = self._buckets.get(key, (0.0, now))
+            tokens += (now - updated) * rate
+            if tokens < 0:
+                resume_at = max(resume_at, now - tokens / rate)
+            self._buckets[key] = (0.0, resume_at)
+
+
+class RedisTokenBucketBackend:
+    """
+    Bucket di Redis (dihitung atomik dengan skrip Lua memakai jam server Redis),
+    sehingga semua container yang memakai Redis yang sama berbagi satu anggaran.
+    """
+
+    RESERVE_SCRIPT = """
+    local now_parts = redis.call('TIME')
+    local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+    local rate = tonumber(ARGV[1])
+    local burst = tonumber(ARGV[2])
+    local cost = tonumber(ARGV[3])
+
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or burst
+    local updated = tonumber(state[2]) or now
+    tokens = math.min(burst, tokens + (now - updated) * rate) - cost
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+    redis.call('PEXPIRE', KEYS[1], math.ceil((burst - tokens) / rate * 1000) + 60000)
+
+    local wait = 0
+    if tokens < 0 then wait = -tokens / rate end
+    return tostring(wait)
+    """
+
+    PAUSE_SCRIPT = """
+    local now_parts = redis.call('TIME')
+    local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+    local resume_at = now + tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = (tonumber(state[1]) or 0) + (now - (tonumber(state[2]) or now)) * rate
+    if tokens < 0 and now - tokens / rate > resume_at then resume_at = now - tokens / rate end
+    redis.call('HSET', KEYS[1], 'tokens', '0', 'ts', tostring(resume_at))
+    redis.call('PEXPIRE', KEYS[1], math.ceil((resume_at - now) * 1000) + 60000)
+    return 1
+    """
+
+    def __init__(self, client, prefix=REDIS_KEY_PREFIX):
+        self.client = client
+        self.prefix = prefix
+        self._reserve = client.register_script(self.RESERVE_SCRIPT)
+        self._pause = client.register_script(self.PAUSE_SCRIPT)
+
+    @classmethod
+    def from_url(cls, url, prefix=REDIS_KEY_PREFIX):
+        import redis
+
+        return cls(redis.Redis.from_url(url, socket_timeout=2, socket_connect_timeout=2), prefix)
+
+    def reserve(self, key, rate, burst, cost=1):
+        wait = self._reserve(keys=[f"{self.prefix}:{key}"], args=[rate, burst, cost])
+        return float(wait)
+
+    def pause(self, key, seconds, rate):
+        self._pause(keys=[f"{self.prefix}:{key}"], args=[seconds, rate])
+
+
+class RateLimiter:
+    """
+    Token bucket per (project, API). limits: {(project|None, api): (rate, burst)};
+    entry dengan project None berlaku untuk semua project yang tidak punya entry sendiri.
+    Jika backend bersama (Redis) error, limiter memakai bucket lokal sebagai cadangan
+    selama BACKEND_RETRY_SECONDS sebelum mencoba backend bersama lagi.
+    """
+
+    def __init__(self, limits=None, backend=None):
+        self.limits = dict(DEFAULT_RATE_LIMITS if limits is None else limits)
+        self.backend = backend or LocalTokenBucketBackend()
+        self._fallback = LocalTokenBucketBackend()
+        self._backend_retry_at = 0.0
+        self.waited = 0.0
+        self.throttled = 0
+
+    def limit_for(self, api, project=None):
+        """(rate, burst) untuk api dan project, atau None jika tidak dibatasi."""
+        return self.limits.get((project, api)) or self.limits.get((None, api))
+
+    def _key(self, api, project):
+        return f"{project or 'default'}:{api}"
+
+    def _call_backend(self, method, *args):
+        if time.monotonic() >= self._backend_retry_at:
+            try:
+                return getattr(self.backend, method)(*args)
+            except Exception as e:
+                print(f"Backend rate limit error ({e}), memakai bucket lokal {BACKEND_RETRY_SECONDS} detik")
+                self._backend_retry_at = time.monotonic() + BACKEND_RETRY_SECONDS
+        return getattr(self._fallback, method)(*args)
+
+    def reserve(self, api, project=None, cost=1):
+        """Memesan cost token; mengembalikan detik yang harus ditunggu sebelum request dikirim."""
+        limit = self.limit_for(api, project)
+        if limit is None:
+            return 0.0
+        rate, burst = limit
+        return self._call_backend('reserve', self._key(api, project), rate, burst, cost)
+
+    def acquire(self, api, project=None, cost=1):
+        """Versi blocking reserve(): tidur sampai token tersedia."""
+        wait = self.reserve(api, project, cost)
+        if wait > 0:
+            self.waited += wait
+            time.sleep(wait)
+        return wait
+
+    def pause(self, api, seconds, project=None):
+        """Menjeda bucket (project, api) setelah respons 429/503 (mis. sesuai Retry-After)."""
+        limit = self.limit_for(api, project)
+        if limit is None or seconds <= 0:
+            return
+        self.throttled += 1
+        self._call_backend('pause', self._key(api, project), seconds, limit[0])
+
+    def call(self, api, send, project=None, max_retries=DEFAULT_MAX_RETRIES, backoff_base=1.0, before_retry=None):
+        """
+        Menjalankan send() setelah mendapat token. send() mengembalikan
+        (status, headers, hasil); status 429/503 menjeda bucket selama Retry-After
+        (atau exponential backoff) lalu send() diulang sampai max_retries kali.
+        Mengembalikan hasil dari percobaan terakhir.
+        """
+        for attempt in range(max_retries + 1):
+            self.acquire(api, project)
+            status, headers, result = send()
+
+            if status not in RETRY_STATUS_CODES or attempt == max_retries:
+                return result
+
+            backoff = backoff_base * (2 ** attempt) + random.uniform(0, backoff_base)
+            wait = retry_after_seconds(headers, default=backoff)
+            print(f"Google {api} {status}, menunggu {wait:.1f} detik (percobaan {attempt + 1}/{max_retries})")
+            self.pause(api, wait, project)
+            if before_retry is not None:
+                before_retry()
+
+
+class RateLimitedHttp:
+    """
+    Pembungkus objek http ala httplib2 (Http, AuthorizedHttp) untuk googleapiclient:
+    setiap request melewati limiter, dan respons 429/503 dicoba ulang setelah
+    Retry-After (atau exponential backoff) dengan menjeda bucket bersama.
+    """
+
+    def __init__(self, http, limiter, project=None, max_retries=DEFAULT_MAX_RETRIES, backoff_base=1.0):
+        self.http = http
+        self.limiter = limiter
+        self.project = project
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+
+    def request(self, uri, method='GET', body=None, headers=None, **kwargs):
+        api = api_for_uri(uri)
+        if api is None:
+            return self.http.request(uri, method, body=body, headers=headers, **kwargs)
+
+        def send():
+            response, content = self.http.request(uri, method, body=body, headers=headers, **kwargs)
+            return response.status, response, (response, content)
+
+        before_retry = None
+        if hasattr(body, 'seek') and hasattr(body, 'tell'):
+            # Body stream (upload media) dikembalikan ke posisi awal sebelum dikirim ulang
+            body_position = body.tell()
+            before_retry = lambda: body.seek(body_position)
+
+        return self.limiter.call(api, send, self.project, self.max_retries, self.backoff_base, before_retry)
+
+    def __getattr__(self, name):
+        # credentials, timeout, connections, dll. diteruskan ke http di dalamnya
+        return getattr(self.http, name)
+
+
+_default_limiter = None
+_default_limiter_lock = threading.Lock()
+
+
+def get_default_limiter():
+    """
+    Limiter bersama per proses dari environment (lihat docstring modul),
+    atau None jika GOOGLE_RATE_LIMITS=off.
+    """
+    global _default_limiter
+    if _default_limiter is not None:
+        return _default_limiter
+
+    with _default_limiter_lock:
+        if _default_limiter is None:
+            spec = os.environ.get('GOOGLE_RATE_LIMITS')
+            if spec and spec.strip().lower() == 'off':
+                return None
+
+            limits = dict(DEFAULT_RATE_LIMITS)
+            limits.update(parse_rate_limits(spec))
+
+            backend = None
+            redis_url = os.environ.get('GOOGLE_RATE_LIMIT_REDIS_URL')
+            if redis_url:
+                try:
+                    backend = RedisTokenBucketBackend.from_url(redis_url)
+                except Exception as e:
+                    print(f"Redis rate limit tidak tersedia ({e}), memakai bucket lokal")
+
+            _default_limiter = RateLimiter(limits, backend)
+        return _default_limiter
+
+
+def max_retries_from_env():
+    """Jumlah retry untuk respons 429/503 (GOOGLE_RATE_LIMIT_MAX_RETRIES)."""
+    return int(os.environ.get('GOOGLE_RATE_LIMIT_MAX_RETRIES', DEFAULT_MAX_RETRIES))
+
+
+def rate_limited_http(http, project=None, limiter=None):
+    """http dibungkus RateLimitedHttp memakai limiter default, atau http apa adanya jika dimatikan."""
+    limiter = limiter or get_default_limiter()
+    if limiter is None:
+        return http
+    return RateLimitedHttp(http, limiter, project=project, max_retries=max_retries_from_env())
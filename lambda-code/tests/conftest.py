@@ -0,0 +1,47 @@
+"""
+Fixture bersama untuk test lambda_function (AWS memakai moto, tanpa akses jaringan).
+
+Jalankan dari folder lambda-code:
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+import pytest
+
+LAMBDA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+# Modul layer (google_auth_httplib2 vendored, google_rate_limit) seperti /opt/python di Lambda
+sys.path.insert(0, os.path.join(LAMBDA_DIR, 'python'))
+sys.path.insert(0, LAMBDA_DIR)
+
+import lambda_function
+
+REGION = 'us-east-1'
+BUCKET = 'bkt-hasil'
+
+
+@pytest.fixture
+def aws(monkeypatch):
+    """Kredensial palsu dan mock_aws; klien boto3 yang di-cache dibuat ulang di dalam mock."""
+    from moto import mock_aws
+
+    monkeypatch.setenv('AWS_DEFAULT_REGION', REGION)
+    monkeypatch.setenv('AWS_REGION', REGION)
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    # Sink opsional dari environment luar tidak ikut berjalan
+    monkeypatch.delenv('SNS_TOPIC_ARN', raising=False)
+    monkeypatch.delenv('EMAIL_MODE', raising=False)
+
+    with mock_aws():
+        lambda_function._aws_clients.clear()
+        yield
+        lambda_function._aws_clients.clear()
+
+
+@pytest.fixture
+def s3(aws):
+    """Klien S3 dengan bucket BUCKET yang sudah dibuat."""
+    client = lambda_function.get_aws_client('s3')
+    client.create_bucket(Bucket=BUCKET)
+    return client
@@ -0,0 +1,52 @@
+"""
+Service Sheets/Drive dibangun dari discovery document lokal tanpa akses jaringan.
+"""
+import os
+import socket
+import sys
+
+import pytest
+
+import export_discovery
+import lambda_function
+
+
+@pytest.fixture
+def offline(monkeypatch):
+    """Socket diblokir seperti pada export_discovery --verify."""
+    monkeypatch.setattr(socket.socket, 'connect', export_discovery._block_network)
+    monkeypatch.setattr(socket, 'create_connection', export_discovery._block_network)
+
+
+def test_exported_documents_build_offline(tmp_path, monkeypatch):
+    # verify_offline mengubah env dan sys.path; dikembalikan setelah test
+    monkeypatch.setenv('GOOGLE_DISCOVERY_DIR', str(tmp_path))
+    monkeypatch.setattr(sys, 'path', list(sys.path))
+
+    export_discovery.export_documents(str(tmp_path))
+    export_discovery.verify_offline(str(tmp_path))
+
+    assert sorted(os.listdir(tmp_path)) == ['drive.v3.json', 'sheets.v4.json']
+
+
+def test_verify_requires_exported_documents(tmp_path, monkeypatch):
+    monkeypatch.setenv('GOOGLE_DISCOVERY_DIR', str(tmp_path))
+    monkeypatch.setattr(sys, 'path', list(sys.path))
+
+    with pytest.raises(RuntimeError, match='belum diekspor'):
+        export_discovery.verify_offline(str(tmp_path))
+
+
+@pytest.mark.parametrize('service_name, version, resource', [
+    ('sheets', 'v4', 'spreadsheets'),
+    ('drive', 'v3', 'files'),
+])
+def test_static_discovery_fallback_builds_offline(service_name, version, resource, tmp_path, monkeypatch, offline):
+    from google.auth.credentials import AnonymousCredentials
+
+    # Tanpa file discovery: dipakai dokumen statis bawaan googleapiclient
+    monkeypatch.setattr(lambda_function, '_discovery_dirs', lambda: [str(tmp_path)])
+
+    service = lambda_function.build_google_service(service_name, version, AnonymousCredentials())
+
+    assert callable(getattr(service, resource))
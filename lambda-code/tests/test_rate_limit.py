@@ -0,0 +1,52 @@
+"""
+Rate limiter Google setelah 429: request yang menunggu jeda keluar satu per satu
+dengan jarak 1/rate, bukan bersamaan saat jeda berakhir.
+"""
+import time
+
+import pytest
+
+import google_rate_limit
+
+RATE = 20.0
+BURST = 5
+PAUSE = 1.0
+
+
+@pytest.fixture(params=['local', 'redis'])
+def limiter(request):
+    if request.param == 'redis':
+        fakeredis = pytest.importorskip('fakeredis')
+        pytest.importorskip('lupa')  # skrip Lua di fakeredis
+        backend = google_rate_limit.RedisTokenBucketBackend(fakeredis.FakeRedis())
+    else:
+        backend = google_rate_limit.LocalTokenBucketBackend()
+    return google_rate_limit.RateLimiter({(None, 'sheets'): (RATE, BURST)}, backend)
+
+
+def send_times(limiter, count):
+    """Waktu kirim (monotonic) untuk count reservasi berturut-turut."""
+    return [time.monotonic() + limiter.reserve('sheets') for _ in range(count)]
+
+
+def test_waiters_after_pause_are_spaced_by_rate(limiter):
+    assert send_times(limiter, BURST)[-1] == pytest.approx(time.monotonic(), abs=0.05)
+
+    paused_at = time.monotonic()
+    limiter.pause('sheets', PAUSE)
+    times = send_times(limiter, 20)
+
+    assert times[0] - paused_at == pytest.approx(PAUSE + 1 / RATE, abs=0.01)
+    gaps = [later - earlier for earlier, later in zip(times, times[1:])]
+    assert gaps == pytest.approx([1 / RATE] * len(gaps), abs=0.005)
+
+
+def test_pause_keeps_reservations_made_before_it(limiter):
+    # Reservasi yang sudah dipesan melewati akhir jeda tidak boleh tertimpa
+    booked = send_times(limiter, BURST + 40)
+    limiter.pause('sheets', PAUSE)
+    after = send_times(limiter, 2)
+
+    assert booked[-1] - booked[0] > PAUSE
+    assert after[0] - booked[-1] == pytest.approx(1 / RATE, abs=0.01)
+    assert after[1] - after[0] == pytest.approx(1 / RATE, abs=0.005)
@@ -0,0 +1,97 @@
+"""
+Pemeriksaan get_secrets_bulk / get_all_secrets terhadap Secrets Manager moto.
+"""
+import json
+
+import pytest
+
+import lambda_function
+
+SECRETS = {
+    'google-sheet-id': {'sheet_id': 'sheet-123'},
+    'email-config': {'sender_email': 'pengirim@example.com', 'recipient_email': 'dosen@example.com'},
+    'google-creds': {'credentials': {'type': 'service_account', 'project_id': 'tes'}},
+}
+
+
+@pytest.fixture
+def secretsmanager(aws, monkeypatch):
+    monkeypatch.setenv('PROJECT_NAME', 'tes')
+    monkeypatch.setenv('ENVIRONMENT', 'local')
+    lambda_function.invalidate_cache()
+    return lambda_function.get_aws_client('secretsmanager')
+
+
+def create_secrets(client, secrets):
+    for suffix, value in secrets.items():
+        client.create_secret(Name=f"tes-local-{suffix}", SecretString=json.dumps(value))
+
+
+def spy_get_secret(monkeypatch):
+    """Mencatat nama secret yang diambil lewat get_secret (jalur fallback)."""
+    calls = []
+    original = lambda_function.get_secret
+
+    def get_secret(secret_name):
+        calls.append(secret_name)
+        return original(secret_name)
+
+    monkeypatch.setattr(lambda_function, 'get_secret', get_secret)
+    return calls
+
+
+def test_batch_path_returns_config(secretsmanager, monkeypatch):
+    create_secrets(secretsmanager, SECRETS)
+    fallback_calls = spy_get_secret(monkeypatch)
+
+    config = lambda_function.get_all_secrets()
+
+    assert isinstance(config, lambda_function.GradingConfig)
+    assert config.google_sheet_id == 'sheet-123'
+    assert config.sender_email == 'pengirim@example.com'
+    assert config.recipient_email == 'dosen@example.com'
+    assert config.google_creds == SECRETS['google-creds']
+    assert config.missing_fields() == []
+    assert fallback_calls == []
+
+
+def test_missing_secret_falls_back_to_get_secret(secretsmanager, monkeypatch):
+    create_secrets(secretsmanager, {k: v for k, v in SECRETS.items() if k != 'email-config'})
+    fallback_calls = spy_get_secret(monkeypatch)
+
+    with pytest.raises(Exception):
+        lambda_function.get_all_secrets()
+
+    # Errors dari BatchGetSecretValue memicu pengambilan per secret
+    assert sorted(fallback_calls) == sorted(f"tes-local-{suffix}" for suffix in SECRETS)
+
+
+def test_batch_unavailable_falls_back_to_get_secret(secretsmanager, monkeypatch):
+    create_secrets(secretsmanager, SECRETS)
+    fallback_calls = spy_get_secret(monkeypatch)
+
+    def batch_get_secret_value(**kwargs):
+        raise RuntimeError('AccessDenied')
+
+    monkeypatch.setattr(secretsmanager, 'batch_get_secret_value', batch_get_secret_value)
+
+    config = lambda_function.get_all_secrets()
+
+    assert config.google_sheet_id == 'sheet-123'
+    assert config.missing_fields() == []
+    assert len(fallback_calls) == 3
+
+
+def test_incomplete_config_reports_missing_fields(secretsmanager):
+    create_secrets(secretsmanager, dict(SECRETS, **{'email-config': {'sender_email': 'pengirim@example.com'}}))
+
+    config = lambda_function.get_all_secrets()
+    assert config.missing_fields() == ['recipient_email']
+
+    # Handler menolak konfigurasi tidak lengkap dan tidak menyimpannya di cache
+    event = {'Records': [{'s3': {'bucket': {'name': 'bkt-hasil'}, 'object': {'key': 'hasil/a.log'}}}]}
+    response = lambda_function.lambda_handler(event, None)
+
+    assert response['statusCode'] == 500
+    assert 'recipient_email' in json.loads(response['body'])['error']
+    assert 'secrets' not in lambda_function._cache
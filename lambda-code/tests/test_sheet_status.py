@@ -0,0 +1,66 @@
+"""
+Status baris sheet per idempotency key: dua versi object yang sama dalam satu batch
+tidak boleh saling menimpa status (dan klaim idempotency) masing-masing.
+"""
+import threading
+
+from conftest import BUCKET
+import lambda_function
+
+KEY = 'hasil/5025211001.log'
+LOG = "NRP: 5025211001\nScore: 90\nStatus: PASS\n"
+
+
+class FlakySheetsService:
+    """Service Sheets palsu: append pertama gagal, berikutnya berhasil."""
+
+    def __init__(self):
+        self.calls = 0
+        self.rows = []
+        self._lock = threading.Lock()
+
+    def spreadsheets(self):
+        return self
+
+    def values(self):
+        return self
+
+    def append(self, spreadsheetId, range, valueInputOption, insertDataOption, body):
+        service = self
+
+        class Request:
+            def execute(self):
+                with service._lock:
+                    service.calls += 1
+                    if service.calls == 1:
+                        raise RuntimeError('429 Too Many Requests')
+                    service.rows.extend(body['values'])
+                return {'updates': {'updatedRange': f"Sheet1!A1:E{len(body['values'])}"}}
+
+        return Request()
+
+
+def s3_record(version_id, etag):
+    return {
+        'bucket': {'name': BUCKET},
+        'object': {'key': KEY, 'versionId': version_id, 'eTag': etag},
+    }
+
+
+def test_two_versions_of_same_object_keep_separate_status(s3):
+    s3.put_object(Bucket=BUCKET, Key=KEY, Body=LOG.encode())
+    config = lambda_function.GradingConfig('sheet-123', 'pengirim@example.com', 'dosen@example.com')
+    writer = lambda_function.SheetBatchWriter(FlakySheetsService(), config.google_sheet_id,
+                                              max_rows=1, max_retries=0)
+    store = lambda_function.InMemoryIdempotencyStore()
+    records = [{'s3': s3_record('v1', 'etag-1')}, {'s3': s3_record('v2', 'etag-2')}]
+
+    results, failures = lambda_function.process_s3_records(records, config, writer, store=store)
+
+    assert failures == []
+    status = {result['idempotency_key']: result['sheet_updated'] for result in results}
+    assert sorted(status.values()) == [False, True]
+
+    # Klaim dilepas hanya untuk versi yang barisnya gagal ditulis
+    for key, updated in status.items():
+        assert store.claim(key) is not updated
@@ -0,0 +1,98 @@
+"""
+Flush Google Sheet berjalan bersamaan dengan email yang masih dikirim, dan dibatasi
+timeout sink 'sheet' seperti sink lainnya.
+"""
+import asyncio
+import threading
+
+import pytest
+
+from conftest import BUCKET
+import lambda_function
+
+WAIT_SECONDS = 5
+
+
+class SheetsService:
+    """Service Sheets palsu; append memanggil on_append sebelum berhasil."""
+
+    def __init__(self, on_append):
+        self.on_append = on_append
+
+    def spreadsheets(self):
+        return self
+
+    def values(self):
+        return self
+
+    def append(self, **kwargs):
+        service = self
+
+        class Request:
+            def execute(self):
+                service.on_append()
+                return {'updates': {'updatedRange': 'Sheet1!A1:E1'}}
+
+        return Request()
+
+
+@pytest.fixture
+def records(s3):
+    s3.put_object(Bucket=BUCKET, Key='hasil/a.log', Body=b"NRP: 5025211001\nScore: 90\n")
+    return [{'s3': {'bucket': {'name': BUCKET}, 'object': {'key': 'hasil/a.log', 'eTag': str(i)}}}
+            for i in range(4)]
+
+
+@pytest.fixture
+def config():
+    return lambda_function.GradingConfig('sheet-123', 'pengirim@example.com', 'dosen@example.com')
+
+
+def test_sheet_flush_overlaps_email(records, config, monkeypatch):
+    sheet_started = threading.Event()
+    # Email baru selesai setelah flush sheet dimulai; jika flush menunggu email, email timeout
+    monkeypatch.setattr(lambda_function, 'send_email_notification',
+                        lambda *args: sheet_started.wait(WAIT_SECONDS))
+    writer = lambda_function.SheetBatchWriter(SheetsService(sheet_started.set), 'sheet-123')
+
+    results, failures = lambda_function.process_s3_records(records, config, writer)
+
+    assert failures == []
+    assert all(result['email_sent'] and result['sheet_updated'] for result in results)
+
+
+def test_sheet_flush_is_bounded_by_sink_timeout(records, config, monkeypatch):
+    monkeypatch.setenv('SINK_TIMEOUT_SHEET_SECONDS', '0.2')
+    monkeypatch.setattr(lambda_function, 'send_email_notification', lambda *args: True)
+    release = threading.Event()
+    writer = lambda_function.SheetBatchWriter(SheetsService(lambda: release.wait(WAIT_SECONDS)), 'sheet-123')
+    store = lambda_function.InMemoryIdempotencyStore()
+
+    try:
+        results, failures = lambda_function.process_s3_records(records, config, writer, store=store)
+        # Selesai sebelum append dilepas: flush yang macet tidak menahan handler
+        assert not release.is_set()
+    finally:
+        release.set()
+
+    assert failures == []
+    assert [result['sheet_updated'] for result in results] == [False] * len(records)
+    assert all(store.claim(result['idempotency_key']) for result in results)
+
+
+def test_async_sheet_write_is_bounded_by_sink_timeout(monkeypatch):
+    monkeypatch.setenv('SINK_TIMEOUT_SHEET_SECONDS', '0.2')
+
+    async def append_rows_to_sheet_async(credentials, sheet_id, rows):
+        await asyncio.sleep(WAIT_SECONDS)
+
+    monkeypatch.setattr(lambda_function, 'append_rows_to_sheet_async', append_rows_to_sheet_async)
+    keyed_rows = [('k1', ['a']), ('k2', ['b'])]
+
+    status, api_calls = asyncio.run(
+        asyncio.wait_for(lambda_function.write_sheet_rows_async(None, 'sheet-123', keyed_rows, max_rows=1),
+                         WAIT_SECONDS / 2)
+    )
+
+    assert status == {'k1': False, 'k2': False}
+    assert api_calls == 1
@@ -0,0 +1,150 @@
+"""
+Event SQS berisi notifikasi S3 (antrean moto): dedupe objek antar pesan, s3:TestEvent,
+pesan rusak, dan batchItemFailures per messageId.
+"""
+import functools
+from urllib.parse import unquote_plus
+
+import pytest
+
+from conftest import BUCKET, REGION
+import lambda_function
+
+QUEUE_NAME = 'hasil-penilaian'
+LOG = b"NRP: 5025211001\nScore: 90\nStatus: PASS\n"
+
+
+class FailingSheetsService:
+    """Service Sheets palsu yang selalu gagal append."""
+
+    def spreadsheets(self):
+        return self
+
+    def values(self):
+        return self
+
+    def append(self, **kwargs):
+        class Request:
+            def execute(self):
+                raise RuntimeError('503 Service Unavailable')
+
+        return Request()
+
+
+@pytest.fixture
+def queue(s3):
+    """Antrean SQS yang menerima notifikasi ObjectCreated dari BUCKET; (klien, url, arn)."""
+    sqs = lambda_function.get_aws_client('sqs')
+    queue_url = sqs.create_queue(QueueName=QUEUE_NAME)['QueueUrl']
+    queue_arn = sqs.get_queue_attributes(QueueUrl=queue_url, AttributeNames=['QueueArn'])['Attributes']['QueueArn']
+    s3.put_bucket_notification_configuration(
+        Bucket=BUCKET,
+        NotificationConfiguration={
+            'QueueConfigurations': [{'QueueArn': queue_arn, 'Events': ['s3:ObjectCreated:*']}]
+        }
+    )
+    return sqs, queue_url, queue_arn
+
+
+def receive_records(queue):
+    """Semua pesan di antrean, dibungkus seperti record event SQS untuk Lambda."""
+    sqs, queue_url, queue_arn = queue
+    records = []
+    while True:
+        messages = sqs.receive_message(QueueUrl=queue_url, MaxNumberOfMessages=10).get('Messages', [])
+        if not messages:
+            return records
+        records.extend({
+            'messageId': message['MessageId'],
+            'receiptHandle': message['ReceiptHandle'],
+            'body': message['Body'],
+            'eventSource': 'aws:sqs',
+            'eventSourceARN': queue_arn,
+            'awsRegion': REGION,
+        } for message in messages)
+
+
+def notification_ids(records):
+    """messageId pesan yang berisi notifikasi S3 (bukan s3:TestEvent)."""
+    return [record['messageId'] for record in records if 's3:TestEvent' not in record['body']]
+
+
+def resend(queue, records, times):
+    """Mengirim ulang notifikasi S3 dari records (mis. retry produsen) lalu menerimanya lagi."""
+    sqs, queue_url, _ = queue
+    body = next(record['body'] for record in records if 's3:TestEvent' not in record['body'])
+    for _ in range(times):
+        sqs.send_message(QueueUrl=queue_url, MessageBody=body)
+    return receive_records(queue)
+
+
+def test_duplicate_keys_across_messages_are_deduped(s3, queue):
+    s3.put_object(Bucket=BUCKET, Key='hasil/a.log', Body=LOG)
+    records = receive_records(queue)
+    records += resend(queue, records, 2)
+
+    s3_records, message_ids, invalid_message_ids = lambda_function.unwrap_sqs_records(records)
+
+    assert [unquote_plus(record['s3']['object']['key']) for record in s3_records] == ['hasil/a.log']
+    assert list(message_ids.values()) == [notification_ids(records)]
+    assert len(notification_ids(records)) == 3
+    assert invalid_message_ids == []
+
+
+def test_test_event_is_skipped(queue):
+    # Konfigurasi notifikasi bucket mengirim s3:TestEvent ke antrean
+    records = receive_records(queue)
+    assert [record['body'] for record in records if 's3:TestEvent' in record['body']]
+
+    s3_records, message_ids, invalid_message_ids = lambda_function.unwrap_sqs_records(records)
+
+    assert s3_records == []
+    assert message_ids == {}
+    assert invalid_message_ids == []
+
+
+def test_malformed_body_maps_to_message_id(s3, queue):
+    sqs, queue_url, _ = queue
+    s3.put_object(Bucket=BUCKET, Key='hasil/a.log', Body=LOG)
+    sqs.send_message(QueueUrl=queue_url, MessageBody='bukan json')
+    sqs.send_message(QueueUrl=queue_url, MessageBody='{"Records": [{"eventName": "ObjectCreated:Put"}]}')
+    records = receive_records(queue)
+    malformed = [record['messageId'] for record in records if 'bucket' not in record['body']
+                 and 's3:TestEvent' not in record['body']]
+
+    s3_records, message_ids, invalid_message_ids = lambda_function.unwrap_sqs_records(records)
+
+    assert len(s3_records) == 1
+    assert sorted(invalid_message_ids) == sorted(malformed)
+    failures = lambda_function.sqs_batch_item_failures(message_ids, invalid_message_ids, [], [])
+    assert sorted(item['itemIdentifier'] for item in failures) == sorted(malformed)
+
+
+def test_failed_sheet_flush_reports_affected_message_ids(s3, queue, monkeypatch):
+    config = lambda_function.GradingConfig('sheet-123', 'pengirim@example.com', 'dosen@example.com')
+    store = lambda_function.InMemoryIdempotencyStore()
+    monkeypatch.setattr(lambda_function, 'get_all_secrets', lambda: config)
+    monkeypatch.setattr(lambda_function, 'get_google_services', lambda creds: FailingSheetsService())
+    monkeypatch.setattr(lambda_function, 'SheetBatchWriter',
+                        functools.partial(lambda_function.SheetBatchWriter, max_retries=0))
+    monkeypatch.setattr(lambda_function, 'send_email_notification', lambda *args: True)
+    monkeypatch.setattr(lambda_function, '_idempotency_store', store)
+    lambda_function.invalidate_cache()
+
+    s3.put_object(Bucket=BUCKET, Key='hasil/sudah.log', Body=LOG)
+    done = receive_records(queue)
+    # Objek yang sudah diproses sebelumnya menjadi duplikat dan tidak ikut gagal
+    for record in lambda_function.unwrap_sqs_records(done)[0]:
+        store.claim(lambda_function.idempotency_key(record['s3']))
+    s3.put_object(Bucket=BUCKET, Key='hasil/baru.log', Body=LOG)
+    fresh = receive_records(queue)
+    fresh += resend(queue, fresh, 1)
+
+    try:
+        response = lambda_function.lambda_handler({'Records': done + fresh}, None)
+    finally:
+        lambda_function.invalidate_cache()
+
+    failed = sorted(item['itemIdentifier'] for item in response['batchItemFailures'])
+    assert response['statusCode'] == 500
+    assert failed == sorted(notification_ids(fresh))
@@ -145,6 +145,11 @@ module "lambda_processor" {
   s3_filter_prefix = "answer/"
   s3_filter_suffix = ".json"
   
+  # Notifikasi S3 lewat SQS, diproses per batch (lihat modules/lambda)
+  # enable_sqs_ingestion        = true
+  # sqs_batch_size              = 100
+  # sqs_batching_window_seconds = 30
+  
   # Secrets Manager configuration
   secret_name = "google-api-credentials"
   secret_arn  = "arn:aws:secretsmanager:us-east-1:123456789012:secret:google-api-credentials-AbCdEf"
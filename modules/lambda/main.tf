@@ -57,8 +57,9 @@ resource "aws_lambda_function" "main" {
   }
 }
 
-# Lambda Permission untuk S3
+# Lambda Permission untuk S3 (hanya jika S3 memanggil Lambda langsung)
 resource "aws_lambda_permission" "allow_s3_invoke" {
+  count         = var.enable_sqs_ingestion ? 0 : 1
   statement_id  = "AllowExecutionFromS3Bucket"
   action        = "lambda:InvokeFunction"
   function_name = aws_lambda_function.main.function_name
@@ -66,19 +67,94 @@ resource "aws_lambda_permission" "allow_s3_invoke" {
   source_arn    = "arn:aws:s3:::${var.s3_bucket_name}"
 }
 
+moved {
+  from = aws_lambda_permission.allow_s3_invoke
+  to   = aws_lambda_permission.allow_s3_invoke[0]
+}
+
+# Antrean SQS untuk notifikasi S3: lonjakan upload diproses per batch
+resource "aws_sqs_queue" "ingest_dlq" {
+  count                     = var.enable_sqs_ingestion ? 1 : 0
+  name                      = "${local.function_name}-ingest-dlq"
+  message_retention_seconds = 1209600
+
+  tags = local.common_tags
+}
+
+resource "aws_sqs_queue" "ingest" {
+  count = var.enable_sqs_ingestion ? 1 : 0
+  name  = "${local.function_name}-ingest"
+
+  # Harus >= timeout Lambda; 6x mengikuti rekomendasi AWS untuk event source SQS
+  visibility_timeout_seconds = var.timeout * 6
+
+  redrive_policy = jsonencode({
+    deadLetterTargetArn = aws_sqs_queue.ingest_dlq[0].arn
+    maxReceiveCount     = var.sqs_max_receive_count
+  })
+
+  tags = local.common_tags
+}
+
+resource "aws_sqs_queue_policy" "ingest" {
+  count     = var.enable_sqs_ingestion ? 1 : 0
+  queue_url = aws_sqs_queue.ingest[0].id
+
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [{
+      Sid       = "AllowS3SendMessage"
+      Effect    = "Allow"
+      Principal = { Service = "s3.amazonaws.com" }
+      Action    = "sqs:SendMessage"
+      Resource  = aws_sqs_queue.ingest[0].arn
+      Condition = {
+        ArnEquals    = { "aws:SourceArn" = var.s3_bucket_arn }
+        StringEquals = { "aws:SourceAccount" = data.aws_caller_identity.current.account_id }
+      }
+    }]
+  })
+}
+
+resource "aws_lambda_event_source_mapping" "sqs_ingest" {
+  count            = var.enable_sqs_ingestion ? 1 : 0
+  event_source_arn = aws_sqs_queue.ingest[0].arn
+  function_name    = aws_lambda_function.main.arn
+
+  batch_size                         = var.sqs_batch_size
+  maximum_batching_window_in_seconds = var.sqs_batching_window_seconds
+
+  # Handler mengembalikan batchItemFailures berisi messageId yang gagal
+  function_response_types = ["ReportBatchItemFailures"]
+}
+
 # S3 Bucket Notification
 resource "aws_s3_bucket_notification" "bucket_notification" {
   bucket = var.s3_bucket_name
 
-  lambda_function {
-    lambda_function_arn = aws_lambda_function.main.arn
-    events              = ["s3:ObjectCreated:*"]
-    filter_prefix       = var.s3_filter_prefix
-    filter_suffix       = var.s3_filter_suffix
+  dynamic "lambda_function" {
+    for_each = var.enable_sqs_ingestion ? [] : [1]
+    content {
+      lambda_function_arn = aws_lambda_function.main.arn
+      events              = ["s3:ObjectCreated:*"]
+      filter_prefix       = var.s3_filter_prefix
+      filter_suffix       = var.s3_filter_suffix
+    }
+  }
+
+  dynamic "queue" {
+    for_each = var.enable_sqs_ingestion ? [1] : []
+    content {
+      queue_arn     = aws_sqs_queue.ingest[0].arn
+      events        = ["s3:ObjectCreated:*"]
+      filter_prefix = var.s3_filter_prefix
+      filter_suffix = var.s3_filter_suffix
+    }
   }
 
   depends_on = [ aws_lambda_function.main,
-    aws_lambda_permission.allow_s3_invoke
+    aws_lambda_permission.allow_s3_invoke,
+    aws_sqs_queue_policy.ingest
    ]
 
-}
\ No newline at end of file
+}
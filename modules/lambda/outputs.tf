@@ -12,3 +12,13 @@ output "lambda_function_invoke_arn" {
   description = "Invoke ARN of the Lambda function"
   value       = aws_lambda_function.main.invoke_arn
 }
+
+output "ingest_queue_url" {
+  description = "URL of the SQS ingestion queue (null when SQS ingestion is disabled)"
+  value       = var.enable_sqs_ingestion ? aws_sqs_queue.ingest[0].id : null
+}
+
+output "ingest_dlq_arn" {
+  description = "ARN of the ingestion dead-letter queue (null when SQS ingestion is disabled)"
+  value       = var.enable_sqs_ingestion ? aws_sqs_queue.ingest_dlq[0].arn : null
+}
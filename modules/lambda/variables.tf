@@ -99,4 +99,28 @@ variable "additional_tags" {
   description = "Additional tags to apply to all resources"
   type        = map(string)
   default     = {}
-}
\ No newline at end of file
+}
+
+variable "enable_sqs_ingestion" {
+  description = "Route S3 notifications through an SQS queue and invoke Lambda in batches"
+  type        = bool
+  default     = false
+}
+
+variable "sqs_batch_size" {
+  description = "Maximum SQS messages per Lambda invocation"
+  type        = number
+  default     = 100
+}
+
+variable "sqs_batching_window_seconds" {
+  description = "Maximum time to gather a batch before invoking Lambda (required > 0 when batch size > 10)"
+  type        = number
+  default     = 30
+}
+
+variable "sqs_max_receive_count" {
+  description = "Receives before a message is moved to the dead-letter queue"
+  type        = number
+  default     = 5
+}